@@ -1,9 +1,33 @@
-import football_game_data as fgd
+import argparse
+import glob
+import json
 import os
-import football_game_reports
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import football_game_data as fgd
 
 DATA_FILE_FOLDER = './game_files/'
 
+# per half game statistics (result key: (label, home team attribute, away team attribute))
+GAME_STATS = {"goals": ("Goals", "home_team_goals", "away_team_goals"),
+              "assists": ("Assists", "home_team_assists", "away_team_assists"),
+              "shots": ("Shots", "home_team_shots", "away_team_shots"),
+              "saves": ("Saves", "home_team_saves", "away_team_saves"),
+              "corners": ("Corners", "home_team_corners", "away_team_corners"),
+              "yellow_cards": ("Yellow Cards", "homeTeam_yellow_cards", "awayTeam_yellow_cards"),
+              "red_cards": ("Red Cards", "homeTeam_red_cards", "awayTeam_red_cards"),
+              "formation": ("Formation", "homeTeam_formation_name", "awayTeam_formation_name")}
+
+# per half heat map statistics (result key: (label, Heat_Map_Stats function name))
+HEAT_MAP_TOTALS = {"goals": ("Goals", "total_goals"),
+                   "assists": ("Assists", "total_assists"),
+                   "shots": ("Shots", "total_shots"),
+                   "shots_on_target": ("Shots on Target", "total_shots_on_target"),
+                   "possession_instances": ("Possession Instances", "total_possession_instances")}
+
+TOP_NODES = 5                                         # number of top passing roots and tips in the passing results
+
 def choose_file(folder):
     all_files = [f for f in os.listdir(folder) if os.path.isfile(folder+f)]
     filtered_files = []
@@ -21,9 +45,9 @@ def choose_file(folder):
         file_name = filtered_files[index]
     except ValueError:
         file_name = choice
-        
+
     return(folder+file_name)
-    
+
 def print_results_by_half(stat, list):
     COL1 = 30
     COL2 = 40
@@ -33,7 +57,7 @@ def print_results_by_half(stat, list):
     for i in range(len(list)):
         if not isinstance(list[i], str):
             list[i] = str(list[i])
-            
+
     if (stat == "HEADER"):
         home_team = list[0].center(COL3-COL1," ")
         away_team = list[1].center(COL4-COL2," ")
@@ -49,7 +73,7 @@ def print_results(stat, list):
     for i in range(len(list)):
         if not isinstance(list[i], str):
             list[i] = str(list[i])
-            
+
     if (stat == "HEADER"):
         home_team = list[0].center(COL2-COL1," ")
         away_team = list[1].center(COL3-COL2," ")
@@ -57,146 +81,392 @@ def print_results(stat, list):
     else:
         print(stat.rjust(COL1), list[0].center(COL2-COL1), list[1].center(COL3-COL2))
 
-        
-file_name = choose_file(DATA_FILE_FOLDER)
-print("File Chosen = ",file_name)
-
-g1 = fgd.Game_Data(file_name)
-#try:
-#    g1 = fgd.Game_Data(file_name)
-#except:
-#    print("ERROR: Unable to import ", file_name)
-#    quit()
-
-choice = ''
-while (choice.upper() != 'Q'):
-    print("")
-    print("Options")
-    print("(S)core, (G)ame Statistics, (P)assing Graph, P(a)ssing Statistics, Passing Seque(n)ce Histogram")
-    print("(H)eat Map Statistics, Heat (M)ap")
-    print("Output Reports:")
-    print("    (1) Report to Template")
-    print("(Q)uit")
-    choice = input("What is your choice? ")
-    
-    if (choice.upper() == 'S'):
-        print("")
-        print_results("HEADER", [g1.home_team,g1.away_team])
-        print_results("Score", [g1.final_home_team_score(), g1.final_away_team_score()])
-        if (g1.homeTeamPenalty_shootout_goals != "NA"):
-            print_results("Penalty Shootout", [g1.homeTeamPenalty_shootout_goals, g1.awayTeamPenalty_shootout_goals])
+# Results of the commands
+# each function returns a dictionary of plain values (so it can be sent back from a worker process and written as
+# JSON), per half values are dictionaries {"home": {"H1": value, "H2": value}, "away": {"H1": value, "H2": value}}
+def __by_half__(home_value, away_value):
+    # home_value and away_value are called with each half to get the value of the half
+    return({"home": {half: home_value(half) for half in fgd.HALVES}, "away": {half: away_value(half) for half in fgd.HALVES}})
 
-    elif (choice.upper() == 'G'):
-        print("")
-        print_results_by_half("HEADER", [g1.home_team,g1.away_team])
-        print_results_by_half("Goals", [g1.home_team_goals["H1"],g1.home_team_goals["H2"],g1.away_team_goals["H1"],g1.away_team_goals["H2"]])
-        print_results_by_half("Assists", [g1.home_team_assists["H1"],g1.home_team_assists["H2"],g1.away_team_assists["H1"],g1.away_team_assists["H2"]])
-        print_results_by_half("Shots", [g1.home_team_shots["H1"],g1.home_team_shots["H2"],g1.away_team_shots["H1"],g1.away_team_shots["H2"]])        
-        print_results_by_half("Saves", [g1.home_team_saves["H1"],g1.home_team_saves["H2"],g1.away_team_saves["H1"],g1.away_team_saves["H2"]])
-        print_results_by_half("Corners",[g1.home_team_corners["H1"],g1.home_team_corners["H2"],g1.away_team_corners["H1"],g1.away_team_corners["H2"]])
-        print_results_by_half("Yellow Cards", [g1.homeTeam_yellow_cards["H1"],g1.homeTeam_yellow_cards["H2"],g1.awayTeam_yellow_cards["H1"],g1.awayTeam_yellow_cards["H2"]])
-        print_results_by_half("Red Cards", [g1.homeTeam_red_cards["H1"],g1.homeTeam_red_cards["H2"],g1.awayTeam_red_cards["H1"],g1.awayTeam_red_cards["H2"]])
-        print_results_by_half("Formation", [g1.homeTeam_formation_name["H1"],g1.homeTeam_formation_name["H2"],g1.awayTeam_formation_name["H1"],g1.awayTeam_formation_name["H2"]])
-                
-        print("")
-        print("Coach comments H1:")
-        for comment in g1.homeTeamH1Comments:
-            print("\t", g1.home_team, ": ", comment)
-        for comment in g1.awayTeamH1Comments:
-            print("\t", g1.away_team, ": ", comment)
+def __half_list__(values):
+    # the per half values in print_results_by_half order
+    return([values["home"]["H1"], values["home"]["H2"], values["away"]["H1"], values["away"]["H2"]])
 
+def score_results(g1):
+    """Description: Gets the final score of a game
+    Inputs: g1 - Game_Data object
+    Outputs:
+        Returns - dictionary with the teams, the final score and the penalty shootout goals (None if there was no shootout)
+    """
+    results = {"home_team": g1.home_team, "away_team": g1.away_team,
+               "score": {"home": g1.final_home_team_score(), "away": g1.final_away_team_score()},
+               "penalty_shootout": None}
+    if (g1.homeTeamPenalty_shootout_goals != "NA"):
+        results["penalty_shootout"] = {"home": g1.homeTeamPenalty_shootout_goals, "away": g1.awayTeamPenalty_shootout_goals}
+    return(results)
+
+def stats_results(g1):
+    """Description: Gets the per half game statistics and coach comments of a game
+    Inputs: g1 - Game_Data object
+    Outputs:
+        Returns - dictionary with the teams, the GAME_STATS values by half and the comments by half and team
+    """
+    results = {"home_team": g1.home_team, "away_team": g1.away_team, "stats": {}, "comments": {}}
+    for key in GAME_STATS:
+        label, home_attribute, away_attribute = GAME_STATS[key]
+        results["stats"][key] = __by_half__(getattr(g1, home_attribute).get, getattr(g1, away_attribute).get)
+    for half in fgd.HALVES:
+        results["comments"][half] = {"home": list(getattr(g1, "homeTeam" + half + "Comments")),
+                                     "away": list(getattr(g1, "awayTeam" + half + "Comments"))}
+    return(results)
+
+def __node_value__(node_value):
+    # a (node, value) result as a [node, value] list, None stays None
+    return(list(node_value) if node_value != None else None)
+
+def passing_results(g1):
+    """Description: Gets the passing statistics of a game
+    Inputs: g1 - Game_Data object
+    Outputs:
+        Returns - dictionary with the teams and the passing statistics by half, node results are [node, value] lists
+    """
+    def passing_stats(team_prefix):
+        return(lambda half: getattr(g1, team_prefix + half + "Passing_stats"))
+    home_stats = passing_stats("homeTeam")
+    away_stats = passing_stats("awayTeam")
+    results = {"home_team": g1.home_team, "away_team": g1.away_team}
+    results["possession_instances"] = __by_half__(lambda half: home_stats(half).possession_instances, lambda half: away_stats(half).possession_instances)
+    results["max_consecutive_passes"] = __by_half__(lambda half: home_stats(half).max_consecutive_passes, lambda half: away_stats(half).max_consecutive_passes)
+    results["passing_rate"] = __by_half__(lambda half: round(g1.home_team_passing_rate(half), 2), lambda half: round(g1.away_team_passing_rate(half), 2))
+    results["top_passing_roots"] = __by_half__(lambda half: [list(r) for r in home_stats(half).passing_roots(TOP_NODES)],
+                                               lambda half: [list(r) for r in away_stats(half).passing_roots(TOP_NODES)])
+    results["top_passing_tips"] = __by_half__(lambda half: [list(t) for t in home_stats(half).passing_tips(TOP_NODES)],
+                                              lambda half: [list(t) for t in away_stats(half).passing_tips(TOP_NODES)])
+    # the top passer and passing hub are None for a half without passes
+    results["top_passer"] = __by_half__(lambda half: __node_value__(g1.home_team_top_passer(half)), lambda half: __node_value__(g1.away_team_top_passer(half)))
+    results["passing_hub"] = __by_half__(lambda half: __node_value__(g1.home_team_hub_player(half)), lambda half: __node_value__(g1.away_team_hub_player(half)))
+    return(results)
+
+def heat_map_results(g1):
+    """Description: Gets the heat map statistics of a game
+    Inputs: g1 - Game_Data object
+    Outputs:
+        Returns - dictionary with the teams and the HEAT_MAP_TOTALS, passing rate and max consecutive passes by half
+    """
+    results = {"home_team": g1.home_team, "away_team": g1.away_team}
+    for key in HEAT_MAP_TOTALS:
+        label, function_name = HEAT_MAP_TOTALS[key]
+        results[key] = __by_half__(lambda half: getattr(getattr(g1, "homeTeam" + half + "Heat_map_stats"), function_name)(),
+                                   lambda half: getattr(getattr(g1, "awayTeam" + half + "Heat_map_stats"), function_name)())
+    results["passing_rate"] = __by_half__(lambda half: round(g1.home_team_passing_rate_from_heat_map(half), 2),
+                                          lambda half: round(g1.away_team_passing_rate_from_heat_map(half), 2))
+    results["max_consecutive_passes"] = __by_half__(lambda half: getattr(g1, "homeTeam" + half + "Passing_stats").max_consecutive_passes,
+                                                    lambda half: getattr(g1, "awayTeam" + half + "Passing_stats").max_consecutive_passes)
+    return(results)
+
+# Printing of the command results, in the layout of the interactive menu
+def print_score(results):
+    print_results("HEADER", [results["home_team"], results["away_team"]])
+    print_results("Score", [results["score"]["home"], results["score"]["away"]])
+    if results["penalty_shootout"] != None:
+        print_results("Penalty Shootout", [results["penalty_shootout"]["home"], results["penalty_shootout"]["away"]])
+
+def print_stats(results):
+    print_results_by_half("HEADER", [results["home_team"], results["away_team"]])
+    for key in GAME_STATS:
+        print_results_by_half(GAME_STATS[key][0], __half_list__(results["stats"][key]))
+    for half in fgd.HALVES:
         print("")
-        print("Coach comments H2:")
-        for comment in g1.homeTeamH2Comments:
-            print("\t", g1.home_team, ": ", comment)
-        for comment in g1.awayTeamH2Comments:
-            print("\t", g1.away_team, ": ", comment)
-            
-    elif (choice.upper() == 'P'):
-        team = input("(H)ome or (A)way? ")
-        half = int(input("(1)st Half or (2)nd Half? "))
-        weight = int(input("Minimum passing weight: "))
-        omit = input("Omit edges less than weight (Y)es or (N)o? ")
-        if (omit.upper() == 'Y'):
-            g1.draw_passing_graph(team.upper(),half,weight,True)
-        else:
-            g1.draw_passing_graph(team.upper(),half,weight,False)
-    elif (choice.upper() == 'A'):
-        print("")
-        print_results_by_half("HEADER", [g1.home_team,g1.away_team])
-        print_results_by_half("Possession Instances", [g1.homeTeamH1Passing_stats.possession_instances, g1.homeTeamH2Passing_stats.possession_instances, g1.awayTeamH1Passing_stats.possession_instances, g1.awayTeamH2Passing_stats.possession_instances])
-        print_results_by_half("Max Consecutive Passes", [g1.homeTeamH1Passing_stats.max_consecutive_passes, g1.homeTeamH2Passing_stats.max_consecutive_passes, g1.awayTeamH1Passing_stats.max_consecutive_passes, g1.awayTeamH2Passing_stats.max_consecutive_passes])
-        print_results_by_half("Passing Rate (passes/min)", [round(g1.home_team_passing_rate('H1'),2), round(g1.home_team_passing_rate('H2'),2), round(g1.away_team_passing_rate('H1'),2), round(g1.away_team_passing_rate('H2'),2)])
-        ht_H1_roots = g1.homeTeamH1Passing_stats.passing_roots()
-        ht_H2_roots = g1.homeTeamH2Passing_stats.passing_roots()
-        at_H1_roots = g1.awayTeamH1Passing_stats.passing_roots()
-        at_H2_roots = g1.awayTeamH2Passing_stats.passing_roots()
-        for i in range(5):
-            stat = "Top Passing Root " + str(i+1)
-            stat_list = []
-            if len(ht_H1_roots) > i:
-                stat_list.append(ht_H1_roots[i][0] + "-" + str(ht_H1_roots[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(ht_H2_roots) > i:
-                stat_list.append(ht_H2_roots[i][0] + "-" + str(ht_H2_roots[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(at_H1_roots) > i:
-                stat_list.append(at_H1_roots[i][0] + "-" + str(at_H1_roots[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(at_H2_roots) > i:
-                stat_list.append(at_H2_roots[i][0] + "-" + str(at_H2_roots[i][1]))
-            else:
-                stat_list.append("NA")            
-            print_results_by_half(stat, stat_list)
-        
-        ht_H1_tips = g1.homeTeamH1Passing_stats.passing_tips()
-        ht_H2_tips = g1.homeTeamH2Passing_stats.passing_tips()
-        at_H1_tips = g1.awayTeamH1Passing_stats.passing_tips()
-        at_H2_tips = g1.awayTeamH2Passing_stats.passing_tips()
-        for i in range (5):
-            stat = "Player Possession Ends At " + str(i+1)
-            stat_list = []
-            if len(ht_H1_tips) > i:
-                stat_list.append(ht_H1_tips[i][0] + "-" + str(ht_H1_tips[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(ht_H2_tips) > i:
-                stat_list.append(ht_H2_tips[i][0] + "-" + str(ht_H2_tips[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(at_H1_tips) > i:
-                stat_list.append(at_H1_tips[i][0] + "-" + str(at_H1_tips[i][1]))
-            else:
-                stat_list.append("NA")
-            if len(at_H2_tips) > i:
-                stat_list.append(at_H2_tips[i][0] + "-" + str(at_H2_tips[i][1]))
+        print("Coach comments " + half + ":")
+        for comment in results["comments"][half]["home"]:
+            print("\t", results["home_team"], ": ", comment)
+        for comment in results["comments"][half]["away"]:
+            print("\t", results["away_team"], ": ", comment)
+
+def __node_text__(node_value):
+    # "node-value" text of a [node, value] result, "NA" for None
+    if node_value == None:
+        return("NA")
+    return(node_value[0] + "-" + str(node_value[1]))
+
+def __print_top_nodes__(label, values):
+    # prints rows of the top passing nodes (lists of [node, count]) of each team and half, "NA" where a half has fewer
+    node_lists = __half_list__(values)
+    for i in range(TOP_NODES):
+        stat_list = []
+        for nodes in node_lists:
+            if len(nodes) > i:
+                stat_list.append(nodes[i][0] + "-" + str(nodes[i][1]))
             else:
                 stat_list.append("NA")
-            print_results_by_half(stat, stat_list)
-                
-        print_results_by_half("Top Passer", [g1.home_team_top_passer("H1")[0]+"-"+str(g1.home_team_top_passer("H1")[1]), g1.home_team_top_passer("H2")[0]+"-"+str(g1.home_team_top_passer("H2")[1]), g1.away_team_top_passer("H1")[0]+"-"+str(g1.away_team_top_passer("H1")[1]), g1.away_team_top_passer("H2")[0]+"-"+str(g1.away_team_top_passer("H2")[1])])
-        print_results_by_half("Team Passing Hub", [g1.home_team_hub_player("H1")[0]+"-"+str(g1.home_team_hub_player("H1")[1]), g1.home_team_hub_player("H2")[0]+"-"+str(g1.home_team_hub_player("H2")[1]), g1.away_team_hub_player("H1")[0]+"-"+str(g1.away_team_hub_player("H1")[1]), g1.away_team_hub_player("H2")[0]+"-"+str(g1.away_team_hub_player("H2")[1])])
-    elif (choice.upper() == 'N'):
-        half = int(input("(1)st Half or (2)nd Half? "))
-        g1.draw_passing_sequence_histogram(half, 1, 10)
-    elif (choice.upper() == 'H'):
+        print_results_by_half(label + " " + str(i+1), stat_list)
+
+def print_passing(results):
+    print_results_by_half("HEADER", [results["home_team"], results["away_team"]])
+    print_results_by_half("Possession Instances", __half_list__(results["possession_instances"]))
+    print_results_by_half("Max Consecutive Passes", __half_list__(results["max_consecutive_passes"]))
+    print_results_by_half("Passing Rate (passes/min)", __half_list__(results["passing_rate"]))
+    __print_top_nodes__("Top Passing Root", results["top_passing_roots"])
+    __print_top_nodes__("Player Possession Ends At", results["top_passing_tips"])
+    print_results_by_half("Top Passer", [__node_text__(node_value) for node_value in __half_list__(results["top_passer"])])
+    print_results_by_half("Team Passing Hub", [__node_text__(node_value) for node_value in __half_list__(results["passing_hub"])])
+
+def print_heat_map(results):
+    print_results_by_half("HEADER", [results["home_team"], results["away_team"]])
+    for key in HEAT_MAP_TOTALS:
+        print_results_by_half(HEAT_MAP_TOTALS[key][0], __half_list__(results[key]))
+    print_results_by_half("Passing Rate (passes/min)", __half_list__(results["passing_rate"]))
+    print_results_by_half("Max Consecutive Passes", __half_list__(results["max_consecutive_passes"]))
+
+# command: (results function, print function)
+COMMAND_RESULTS = {"score": (score_results, print_score),
+                   "stats": (stats_results, print_stats),
+                   "passing": (passing_results, print_passing),
+                   "heatmap": (heat_map_results, print_heat_map)}
+
+def __image_file__(image_dir, file_name, name):
+    # image file for a game, named after the game data file
+    return(os.path.join(image_dir, os.path.splitext(os.path.basename(file_name))[0] + "_" + name + ".png"))
+
+def __write_image__(image_file, image):
+    with open(image_file, "wb") as image_obj:
+        image_obj.write(image.getvalue())
+
+def __write_images__(g1, command, options):
+    """Description: Writes the passing graph or heat map images of a game
+    Inputs: g1 - Game_Data object
+            command - "passing" or "heatmap"
+            options - dictionary of the command line options (image_dir, teams, halves, weight, omit, map_types, dpi and
+                      image_cache, an optional folder of already rendered images)
+    Outputs:
+        Returns - list of the image files written
+    """
+    image_files = []
+    image_cache = None
+    if options.get("image_cache") != None:
+        import football_game_cache
+        image_cache = football_game_cache.Image_Cache(options["image_cache"])
+    for half in options["halves"]:
+        if command == "passing":
+            for team in options["teams"]:
+                image_file = __image_file__(options["image_dir"], g1.file_name, "passing_" + team + str(half))
+                if image_cache != None:
+                    __write_image__(image_file, image_cache.passing_graph_image(g1, team, half, options["weight"], options["omit"], options["dpi"]))
+                else:
+                    g1.draw_passing_graph(team, half, options["weight"], options["omit"], image_file, options["dpi"])
+                image_files.append(image_file)
+        else:
+            for map_type in options["map_types"]:
+                image_file = __image_file__(options["image_dir"], g1.file_name, "heat_map_" + options["heat_map_team"] + str(half) + map_type)
+                if image_cache != None:
+                    __write_image__(image_file, image_cache.heat_map_image(g1, options["heat_map_team"], half, map_type, options["dpi"]))
+                else:
+                    g1.draw_heat_map(options["heat_map_team"], half, map_type, image_file, options["dpi"])
+                image_files.append(image_file)
+    return(image_files)
+
+def __run_command__(file_name, command, options):
+    """Description: Worker function that runs one command on one game data file
+    Inputs: file_name - the game data file
+            command - one of COMMAND_RESULTS
+            options - dictionary of the command line options (see __write_images__), image_dir None = no images
+    Outputs:
+        Returns - tuple (file_name, results dictionary, None) if the command ran or
+                  tuple (file_name, None, error message) if it failed
+    """
+    try:
+        g1 = fgd.Game_Data(file_name)
+        results = COMMAND_RESULTS[command][0](g1)
+        if options.get("image_dir") != None:
+            results["images"] = __write_images__(g1, command, options)
+        return((file_name, results, None))
+    except Exception as e:
+        return((file_name, None, type(e).__name__ + ": " + str(e)))
+
+def __init_worker__():
+    # commands only write images to files, so never open windows (and don't need a display)
+    import matplotlib
+    matplotlib.use("Agg")
+
+def run_command(game_files, command, options=None, jobs=1):
+    """Description: Runs a command on a batch of game data files, in parallel if more than one job is allowed
+    Inputs: game_files - list of game data files
+            command - one of COMMAND_RESULTS
+            options - dictionary of the command line options (see __run_command__)
+            jobs - number of worker processes (None = one per CPU, 1 = run in this process)
+    Outputs:
+        Returns - list of tuples returned by __run_command__, in game_files order. A file that fails does not stop
+                  the rest of the batch.
+    """
+    if options == None:
+        options = {}
+    if options.get("image_dir") != None:
+        os.makedirs(options["image_dir"], exist_ok=True)
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(game_files)))
+    arguments = (game_files, repeat(command), repeat(options))
+    if jobs == 1:
+        __init_worker__()
+        return(list(map(__run_command__, *arguments)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=__init_worker__) as executor:
+        return(list(executor.map(__run_command__, *arguments)))
+
+def find_inputs(inputs):
+    """Description: Finds the game data files given on the command line
+    Inputs: inputs - list of game data files, glob patterns (e.g. "game_files/2017-*.csv") and folders (searched
+                     with their sub folders for *.csv files)
+    Outputs:
+        Returns - list of game data files, in the order given (each pattern and folder sorted), without duplicates
+    """
+    import football_game_season as fgs
+    game_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            game_files.extend(fgs.find_game_files(path))
+        elif glob.has_magic(path):
+            game_files.extend(sorted(glob.glob(path, recursive=True)))
+        else:
+            game_files.append(path)
+    return(list(dict.fromkeys(game_files)))
+
+def __json_value__(value):
+    # numpy numbers from the stats are written as plain numbers
+    if hasattr(value, "item"):
+        return(value.item())
+    return(str(value))
+
+def interactive(file_name=None):
+    """Description: Runs the interactive menu on one game
+    Inputs: file_name - game data file, None to choose one from DATA_FILE_FOLDER
+    Outputs:
+        prints the chosen results and shows the chosen graphs until (Q)uit is chosen
+    """
+    if file_name == None:
+        file_name = choose_file(DATA_FILE_FOLDER)
+    print("File Chosen = ",file_name)
+
+    g1 = fgd.Game_Data(file_name)
+
+    choice = ''
+    while (choice.upper() != 'Q'):
         print("")
-        print_results_by_half("HEADER", [g1.home_team,g1.away_team])
-        print_results_by_half("Goals", [g1.homeTeamH1Heat_map_stats.total_goals(), g1.homeTeamH2Heat_map_stats.total_goals(), g1.awayTeamH1Heat_map_stats.total_goals(), g1.awayTeamH2Heat_map_stats.total_goals()])
-        print_results_by_half("Assists", [g1.homeTeamH1Heat_map_stats.total_assists(), g1.homeTeamH2Heat_map_stats.total_assists(), g1.awayTeamH1Heat_map_stats.total_assists(), g1.awayTeamH2Heat_map_stats.total_assists()])
-        print_results_by_half("Shots", [g1.homeTeamH1Heat_map_stats.total_shots(), g1.homeTeamH2Heat_map_stats.total_shots(), g1.awayTeamH1Heat_map_stats.total_shots(), g1.awayTeamH2Heat_map_stats.total_shots()])
-        print_results_by_half("Shots on Target", [g1.homeTeamH1Heat_map_stats.total_shots_on_target(), g1.homeTeamH2Heat_map_stats.total_shots_on_target(), g1.awayTeamH1Heat_map_stats.total_shots_on_target(), g1.awayTeamH2Heat_map_stats.total_shots_on_target()])
-        print_results_by_half("Possession Instances", [g1.homeTeamH1Heat_map_stats.total_possession_instances(), g1.homeTeamH2Heat_map_stats.total_possession_instances(), g1.awayTeamH1Heat_map_stats.total_possession_instances(), g1.awayTeamH2Heat_map_stats.total_possession_instances()])
-        print_results_by_half("Passing Rate (passes/min)", [round(g1.home_team_passing_rate_from_heat_map('H1'),2), round(g1.home_team_passing_rate_from_heat_map('H2'),2), round(g1.away_team_passing_rate_from_heat_map('H1'),2), round(g1.away_team_passing_rate_from_heat_map('H2'),2)])
-        print_results_by_half("Max Consecutive Passes", [g1.homeTeamH1Passing_stats.max_consecutive_passes, g1.homeTeamH2Passing_stats.max_consecutive_passes, g1.awayTeamH1Passing_stats.max_consecutive_passes, g1.awayTeamH2Passing_stats.max_consecutive_passes])
-    elif (choice.upper() == 'M'):
-        team = input("(H)ome or (A)way or (B)oth? ")
-        half = int(input("(1)st Half or (2)nd Half? "))
-        map_type = input("(S)hot, (P)ass, (l)ost Possession? ")
-        g1.draw_heat_map(team.upper(),half,map_type.upper())
-    elif (choice == "1"):
-        reports_object = football_game_reports.football_game_reports(g1)
-        reports_object.create_report_from_template("report.docx")
\ No newline at end of file
+        print("Options")
+        print("(S)core, (G)ame Statistics, (P)assing Graph, P(a)ssing Statistics, Passing Seque(n)ce Histogram")
+        print("(H)eat Map Statistics, Heat (M)ap")
+        print("Output Reports:")
+        print("    (1) Report to Template")
+        print("(Q)uit")
+        choice = input("What is your choice? ")
+
+        if (choice.upper() == 'S'):
+            print("")
+            print_score(score_results(g1))
+        elif (choice.upper() == 'G'):
+            print("")
+            print_stats(stats_results(g1))
+        elif (choice.upper() == 'P'):
+            team = input("(H)ome or (A)way? ")
+            half = int(input("(1)st Half or (2)nd Half? "))
+            weight = int(input("Minimum passing weight: "))
+            omit = input("Omit edges less than weight (Y)es or (N)o? ")
+            if (omit.upper() == 'Y'):
+                g1.draw_passing_graph(team.upper(),half,weight,True)
+            else:
+                g1.draw_passing_graph(team.upper(),half,weight,False)
+        elif (choice.upper() == 'A'):
+            print("")
+            print_passing(passing_results(g1))
+        elif (choice.upper() == 'N'):
+            half = int(input("(1)st Half or (2)nd Half? "))
+            g1.draw_passing_sequence_histogram(half, 1, 10)
+        elif (choice.upper() == 'H'):
+            print("")
+            print_heat_map(heat_map_results(g1))
+        elif (choice.upper() == 'M'):
+            team = input("(H)ome or (A)way or (B)oth? ")
+            half = int(input("(1)st Half or (2)nd Half? "))
+            map_type = input("(S)hot, (P)ass, (l)ost Possession? ")
+            g1.draw_heat_map(team.upper(),half,map_type.upper())
+        elif (choice == "1"):
+            import football_game_reports
+            reports_object = football_game_reports.football_game_reports(g1)
+            reports_object.create_report_from_template("report.docx")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze football game data files. Without a command the interactive menu is started.")
+    inputs = argparse.ArgumentParser(add_help=False)
+    inputs.add_argument("games", nargs="+", help="game data files, glob patterns or folders of game data files")
+    inputs.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes (0 = one per CPU)")
+    inputs.add_argument("--json", action="store_true", help="write the results as JSON")
+    halves = argparse.ArgumentParser(add_help=False)
+    halves.add_argument("--image-dir", default=None, help="folder to write the images to (no images if not given)")
+    halves.add_argument("--half", type=int, choices=(1, 2), action="append", help="half of the images (default both)")
+    halves.add_argument("--dpi", type=int, default=100, help="resolution of the images")
+    halves.add_argument("--image-cache", default=None, help="folder to keep rendered images in between runs")
+
+    commands = parser.add_subparsers(dest="command")
+    interactive_parser = commands.add_parser("interactive", help="interactive menu for one game")
+    interactive_parser.add_argument("game", nargs="?", default=None, help="game data file (default choose from " + DATA_FILE_FOLDER + ")")
+    commands.add_parser("score", parents=[inputs], help="final score")
+    commands.add_parser("stats", parents=[inputs], help="game statistics and coach comments by half")
+    passing_parser = commands.add_parser("passing", parents=[inputs, halves], help="passing statistics and passing graph images")
+    passing_parser.add_argument("--team", choices=("H", "A"), action="append", help="team of the passing graph images (default both)")
+    passing_parser.add_argument("--weight", type=int, default=1, help="minimum passing weight drawn prominently")
+    passing_parser.add_argument("--omit", action="store_true", help="omit edges less than the weight")
+    heat_map_parser = commands.add_parser("heatmap", parents=[inputs, halves], help="heat map statistics and heat map images")
+    heat_map_parser.add_argument("--team", choices=("H", "A", "B"), default="B", help="team of the heat map images (B = both)")
+    heat_map_parser.add_argument("--map-type", choices=("S", "P", "L"), action="append", help="shot, pass or lost possession heat maps (default all)")
+    report_parser = commands.add_parser("report", parents=[inputs], help="write .docx reports")
+    report_parser.add_argument("-o", "--output-dir", default="reports", help="folder to write the reports to")
+    report_parser.add_argument("-t", "--template", default=None, help="docxtpl report template")
+    report_parser.add_argument("--image-target", choices=("screen", "print", "archive"), default="screen", help="resolution and size of the report images")
+    report_parser.add_argument("--image-cache", default=None, help="folder to keep rendered images in between runs")
+    args = parser.parse_args(argv)
+
+    if args.command == None or args.command == "interactive":
+        interactive(getattr(args, "game", None))
+        return(0)
+
+    game_files = find_inputs(args.games)
+    jobs = args.jobs if args.jobs > 0 else None
+    output = []
+    failed = 0
+    if args.command == "report":
+        import football_game_reports as fgr
+        template = args.template if args.template != None else fgr.REPORT_TEMPLATE_FILE
+        for file_name, output_file, error, timings in fgr.create_reports(game_files, args.output_dir, jobs, template, args.image_target, None, args.image_cache):
+            output.append({"file": file_name, "report": output_file, "error": error})
+            if error != None:
+                failed = failed + 1
+            if not args.json:
+                print(file_name + "  " + (output_file if error == None else "FAILED: " + error))
+    else:
+        options = {}
+        if args.command == "passing":
+            options = {"image_dir": args.image_dir, "halves": args.half or [1, 2], "dpi": args.dpi, "image_cache": args.image_cache,
+                       "teams": args.team or ["H", "A"], "weight": args.weight, "omit": args.omit}
+        elif args.command == "heatmap":
+            options = {"image_dir": args.image_dir, "halves": args.half or [1, 2], "dpi": args.dpi, "image_cache": args.image_cache,
+                       "heat_map_team": args.team, "map_types": args.map_type or ["S", "P", "L"]}
+        for file_name, results, error in run_command(game_files, args.command, options, jobs):
+            output.append({"file": file_name, "results": results, "error": error})
+            if error != None:
+                failed = failed + 1
+            if not args.json:
+                print("")
+                print("File = " + file_name)
+                if error == None:
+                    COMMAND_RESULTS[args.command][1](results)
+                    for image_file in results.get("images", []):
+                        print("Image written to " + image_file)
+                else:
+                    print("FAILED: " + error)
+
+    if args.json:
+        json.dump(output, sys.stdout, indent=2, default=__json_value__)
+        print()
+    return(1 if failed else 0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
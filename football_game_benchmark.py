@@ -0,0 +1,237 @@
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import numpy as np
+import matplotlib
+import football_game_data as fgd
+import football_game_season as fgs
+
+GAME_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_files")
+DEFAULT_SCALES = (10, 100)
+DEFAULT_THRESHOLD = 0.4                               # a benchmark regresses when its best time is this fraction slower than the baseline
+# thresholds of the benchmarks that vary more from run to run than the parsing and stats benchmarks (name prefix: fraction)
+BENCHMARK_THRESHOLDS = {"heat_map_totals": 0.6, "draw_heat_map_": 0.6, "create_report": 0.6}
+MIN_COMPARE_REPEAT = 3                                # fewest timings of each benchmark when comparing to a baseline
+# reference baseline with the thresholds of each benchmark, made with: python football_game_benchmark.py --repeat 9 -o benchmark_baseline.json
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+def scale_game_file(file_name, scale, output_file):
+    """Description: Writes a copy of a game data file with every passing tree row repeated, to make a bigger game
+    with the same layout
+    Inputs: file_name - the game data file to scale
+            scale - number of times each passing tree row is written
+            output_file - the file to write the scaled game to
+    Outputs:
+        Returns - number of passing tree rows in the scaled game
+    """
+    tree_rows = 0
+    with open(file_name, newline="") as in_obj, open(output_file, "w", newline="") as out_obj:
+        writer = csv.writer(out_obj)
+        in_tree = False
+        for row in csv.reader(in_obj):
+            if len(row) > 0 and row[0] != "":
+                in_tree = row[0].endswith("PASSING TREE")
+                writer.writerow(row)
+            elif in_tree:
+                for i in range(scale):
+                    writer.writerow(row)
+                tree_rows = tree_rows + scale
+            else:
+                writer.writerow(row)
+    return(tree_rows)
+
+def passing_tree_branches(file_name):
+    """Description: Reads the passing tree rows of a game data file
+    Inputs: file_name - the game data file
+    Outputs:
+        Returns - list of passing tree branches (list of nodes, as given to Passing_Stats.process_tree_branch)
+    """
+    branches = []
+    with open(file_name, newline="") as file_obj:
+        in_tree = False
+        for row in csv.reader(file_obj):
+            if len(row) > 0 and row[0] != "":
+                in_tree = row[0].endswith("PASSING TREE")
+            elif in_tree and len(row) > 1 and row[1] != "":
+                branches.append(row[1:])
+    return(branches)
+
+def time_function(function, repeat=5, number=None):
+    """Description: Times a function
+    Inputs: function - function to time, called with no arguments
+            repeat - number of timings to take
+            number - number of calls per timing (None = enough calls for each timing to take at least 0.2 seconds,
+                     see timeit.Timer.autorange, so short functions are not timed from a single noisy call)
+    Outputs:
+        Returns - dictionary with the median, min and max seconds per call and the repeat and number used
+    """
+    if number == None:
+        number = timeit.Timer(function).autorange()[0]
+    timings = []
+    for i in range(repeat):
+        start_time = time.perf_counter()
+        for j in range(number):
+            function()
+        timings.append((time.perf_counter() - start_time) / number)
+    return({"median": statistics.median(timings), "min": min(timings), "max": max(timings), "repeat": repeat, "number": number})
+
+def run_benchmarks(game_folder=GAME_FOLDER, scales=DEFAULT_SCALES, repeat=5, render=True, report=True):
+    """Description: Runs the benchmarks
+    Inputs: game_folder - folder of game data files to benchmark with
+            scales - passing tree scale factors of the synthetic games (see scale_game_file)
+            repeat - number of timings to take of each benchmark
+            render - False to skip the heat map rendering benchmark
+            report - False to skip the report benchmark
+    Outputs:
+        Returns - dictionary (benchmark name: timing dictionary returned by time_function, plus any sizes)
+    """
+    matplotlib.use("Agg")
+    results = {}
+    game_files = fgs.find_game_files(game_folder)
+    results["parse_game_files"] = time_function(lambda: [fgd.Game_Data(f) for f in game_files], repeat)
+    results["parse_game_files"]["games"] = len(game_files)
+
+    games = [fgd.Game_Data(f) for f in game_files]
+    # the largest real game is used as the base of the synthetic games and the rendering benchmarks
+    base_file = max(game_files, key=os.path.getsize)
+    base_game = fgd.Game_Data(base_file)
+
+    with tempfile.TemporaryDirectory(prefix="football_benchmark_") as temp_dir:
+        for scale in scales:
+            scaled_file = os.path.join(temp_dir, "scaled_" + str(scale) + ".csv")
+            tree_rows = scale_game_file(base_file, scale, scaled_file)
+            name = "parse_scaled_x" + str(scale)
+            results[name] = time_function(lambda: fgd.Game_Data(scaled_file), repeat)
+            results[name]["tree_rows"] = tree_rows
+
+            branches = passing_tree_branches(scaled_file)
+            def process_branches():
+                stats = fgd.Passing_Stats()
+                graph = fgd.Passing_Graph()
+                for branch in branches:
+                    stats.process_tree_branch(graph, branch)
+            name = "process_tree_branch_x" + str(scale)
+            results[name] = time_function(process_branches, repeat)
+            results[name]["tree_rows"] = len(branches)
+
+        heat_maps = []
+        for game in games:
+            for team in ("homeTeam", "awayTeam"):
+                for half in fgd.HALVES:
+                    heat_maps.append(getattr(game, team + half + "Heat_map_stats"))
+        total_methods = [getattr(fgd.Heat_Map_Stats, name) for name in dir(fgd.Heat_Map_Stats) if name.startswith("total_")]
+        results["heat_map_totals"] = time_function(lambda: [method(heat_map) for heat_map in heat_maps for method in total_methods], repeat)
+        results["heat_map_totals"]["calls"] = len(heat_maps) * len(total_methods)
+
+        if render:
+            image_file = os.path.join(temp_dir, "heat_map.png")
+            for map_type in ("P", "S", "L"):
+                results["draw_heat_map_" + map_type] = time_function(lambda: base_game.draw_heat_map("B", 1, map_type, image_file, dpi=100), repeat)
+
+        if report:
+            try:
+                import football_game_reports as fgr
+            except ImportError as e:
+                results["create_report"] = {"skipped": str(e)}
+            else:
+                report_file = os.path.join(temp_dir, "report.docx")
+                report = fgr.football_game_reports(base_game, fgr.REPORT_TEMPLATE_FILE)
+                results["create_report"] = time_function(lambda: report.create_report_from_template(report_file), repeat)
+    return(results)
+
+def benchmark_thresholds(results, baseline=None, threshold=DEFAULT_THRESHOLD):
+    """Description: Gets the regression threshold of each benchmark
+    Inputs: results - dictionary returned by run_benchmarks
+            baseline - optional benchmark output (see main) whose "thresholds" dictionary (benchmark name: fraction)
+                       overrides the thresholds of single benchmarks
+            threshold - threshold of the benchmarks without one in BENCHMARK_THRESHOLDS or the baseline
+    Outputs:
+        Returns - dictionary (benchmark name: fraction the best time may be slower than the baseline's best time)
+    """
+    overrides = baseline.get("thresholds", {}) if baseline != None else {}
+    thresholds = {}
+    for name in results:
+        if "min" not in results[name]:
+            continue
+        limit = threshold
+        for prefix in BENCHMARK_THRESHOLDS:
+            if name.startswith(prefix):
+                limit = max(limit, BENCHMARK_THRESHOLDS[prefix])
+        thresholds[name] = overrides.get(name, limit)
+    return(thresholds)
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Description: Compares benchmark results to a baseline. The best (min) times are compared, which vary much less
+    from run to run than the medians.
+    Inputs: results - dictionary returned by run_benchmarks
+            baseline - benchmark output (see main) to compare to
+            threshold - see benchmark_thresholds
+    Outputs:
+        Returns - dictionary (benchmark name: {"baseline", "current", "ratio", "threshold", "regression"}) for each
+                  benchmark timed in both
+    """
+    comparison = {}
+    thresholds = benchmark_thresholds(results, baseline, threshold)
+    for name, timing in results.items():
+        base_timing = baseline.get("results", {}).get(name)
+        if base_timing == None or "min" not in base_timing or "min" not in timing:
+            continue
+        ratio = timing["min"] / base_timing["min"] if base_timing["min"] > 0 else float("inf")
+        limit = thresholds[name]
+        comparison[name] = {"baseline": base_timing["min"], "current": timing["min"], "ratio": ratio,
+                            "threshold": limit, "regression": ratio > 1.0 + limit}
+    return(comparison)
+
+def environment():
+    return({"python": platform.python_version(), "numpy": np.__version__, "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(), "parser_version": fgd.PARSER_VERSION,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parsing, stats and rendering of football game data")
+    parser.add_argument("--games", default=GAME_FOLDER, help="folder of game data files")
+    parser.add_argument("--scales", type=int, nargs="*", default=list(DEFAULT_SCALES), help="passing tree scale factors of the synthetic games")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timings of each benchmark")
+    parser.add_argument("--no-render", action="store_true", help="skip the heat map rendering benchmarks")
+    parser.add_argument("--no-report", action="store_true", help="skip the report benchmark")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE_FILE, help="benchmark output JSON file to compare to (default " + os.path.basename(BASELINE_FILE) + ")")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="fraction slower than the baseline that counts as a regression (for benchmarks without their own threshold)")
+    parser.add_argument("-o", "--output", help="file to write the JSON output to (default standard output)")
+    args = parser.parse_args(argv)
+
+    repeat = args.repeat
+    if args.baseline != None and repeat < MIN_COMPARE_REPEAT:
+        # the best of one or two timings varies too much from run to run to compare to a baseline
+        print("using --repeat " + str(MIN_COMPARE_REPEAT) + " to compare to the baseline", file=sys.stderr)
+        repeat = MIN_COMPARE_REPEAT
+    results = run_benchmarks(args.games, args.scales, repeat, not args.no_render, not args.no_report)
+    output = {"environment": environment(), "results": results}
+    regressions = []
+    baseline = None
+    if args.baseline != None:
+        with open(args.baseline) as baseline_obj:
+            baseline = json.load(baseline_obj)
+    # the thresholds applied are always written, so the output can be used as a baseline
+    output["thresholds"] = benchmark_thresholds(results, baseline, args.threshold)
+    if baseline != None:
+        output["comparison"] = compare_to_baseline(results, baseline, args.threshold)
+        regressions = [name for name in output["comparison"] if output["comparison"][name]["regression"]]
+        output["regressions"] = regressions
+
+    if args.output == None:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as output_obj:
+            json.dump(output, output_obj, indent=2)
+    return(1 if regressions else 0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,397 @@
+import json
+import os
+from array import array
+import numpy as np
+import football_game_data as fgd
+
+# Binary game file layout:
+#   8 bytes   - FILE_MAGIC
+#   8 bytes   - little endian unsigned length of the JSON header
+#   header    - JSON with the text fields of the game and the dtype, shape and byte offset of every array
+#   arrays    - raw little endian arrays, each starting on an ARRAY_ALIGNMENT byte boundary
+#
+# Arrays (T = team, 0 home / 1 away, H = half, 0 H1 / 1 H2, P = period in fgd.PERIODS order):
+#   period_stats        [T, P, stat]  int32  - per period stats in fgd.PERIOD_STATS order
+#   passing_stats       [T, H, 3]     int32  - total passes, possession instances, max consecutive passes
+#   defending_zone      [T, H]        int32  - zone each team defended
+#   heat_map            [T, H, 18, 8] int32  - heat map zones 1-18, stats in fgd.HEAT_MAP_STATS order
+#   graph_offsets       [T*2+H + 1]   int64  - start of each passing graph in the edge arrays
+#   edge_from, edge_to  [edges]       int16  - node numbers (index into the header "nodes" list)
+#   edge_weight         [edges]       int32 or float64 (float64 if any weight in the game is not a whole number)
+#   graph_node_offsets  [T*2+H + 1]   int64  - start of each passing graph in graph_nodes
+#   graph_nodes         [nodes]       int16  - graph nodes in the order they were added
+#   formation_offsets   [T*2+H + 1]   int64  - start of each formation in formation_nodes / formation_xy
+#   formation_nodes     [nodes]       int16
+#   formation_xy        [nodes, 2]    float64
+#   histogram_offsets   [T*2+H + 1]   int64  - start of each passing sequence histogram in histogram
+#   histogram           [entries, 2]  int32  - (passes in sequence, number of sequences)
+#   tree_offsets        [T*2+H + 1]   int64  - start of each list of passing tree roots / tips
+#   tree_roots, tree_tips [branches]  int16  - empty for Passing_Stats that don't keep the tree lists
+#   root_count_offsets  [T*2+H + 1]   int64  - start of each passing tree root count table in root_counts
+#   root_counts         [entries, 2]  int32  - (node number, number of sequences started), most frequent first
+#   tip_count_offsets   [T*2+H + 1]   int64  - start of each passing tree tip count table in tip_counts
+#   tip_counts          [entries, 2]  int32  - (node number, number of sequences ended), most frequent first
+#   sequence_offsets    [T*2+H + 1]   int64  - start of each team half's passing sequences in sequence_lengths
+#   sequence_lengths    [sequences]   int16  - number of nodes in each passing sequence
+#   sequence_data_offsets [T*2+H + 1] int64  - start of each team half's passing sequence nodes in sequence_data
+#   sequence_data       [nodes]       int16  - nodes of the passing sequences from the root to the tip, empty for
+#                                              Passing_Stats that don't keep the tree lists (files written before the
+#                                              sequences were added don't have the sequence arrays)
+FILE_MAGIC = b"FGDBIN01"
+FILE_EXTENSION = ".fgb"
+ARRAY_ALIGNMENT = 64
+
+TEAM_HALVES = (("homeTeam", "H1"), ("homeTeam", "H2"), ("awayTeam", "H1"), ("awayTeam", "H2"))
+
+def __game_arrays__(game):
+    """Description: Flattens a Game_Data object into the arrays of the binary game file
+    Inputs: game - Game_Data object
+    Outputs:
+        Returns - tuple (header dictionary, dictionary of numpy arrays)
+    """
+    nodes = []
+    node_numbers = {}
+    def node_number(node):
+        if node not in node_numbers:
+            node_numbers[node] = len(nodes)
+            nodes.append(node)
+        return(node_numbers[node])
+
+    arrays = {}
+    period_stats = np.zeros((2, len(fgd.PERIODS), len(fgd.PERIOD_STATS)), dtype=np.int32)
+    for s, stat in enumerate(fgd.PERIOD_STATS):
+        for t in range(2):
+            values = getattr(game, fgd.PERIOD_STATS[stat][t])
+            for p, period in enumerate(fgd.PERIODS):
+                period_stats[t, p, s] = values[period]
+    arrays["period_stats"] = period_stats
+
+    passing_stats = np.zeros((2, 2, 3), dtype=np.int32)
+    defending_zone = np.zeros((2, 2), dtype=np.int32)
+    heat_map = np.zeros((2, 2, 18, len(fgd.HEAT_MAP_STATS)), dtype=np.int32)
+    graph_offsets = [0]
+    edges = []
+    graph_node_offsets = [0]
+    graph_nodes = []
+    formation_offsets = [0]
+    formation_nodes = []
+    formation_xy = []
+    histogram_offsets = [0]
+    histogram = []
+    tree_offsets = [0]
+    tree_roots = []
+    tree_tips = []
+    root_count_offsets = [0]
+    root_counts = []
+    tip_count_offsets = [0]
+    tip_counts = []
+    sequence_offsets = [0]
+    sequence_lengths = []
+    sequence_data_offsets = [0]
+    sequence_data = []
+    for i, (team, half) in enumerate(TEAM_HALVES):
+        t = i // 2
+        h = i % 2
+        stats = getattr(game, team + half + "Passing_stats")
+        passing_stats[t, h] = [stats.total_passes, stats.possession_instances, stats.max_consecutive_passes]
+        heat_map_stats = getattr(game, team + half + "Heat_map_stats")
+        defending_zone[t, h] = heat_map_stats.team_defending_zone
+        heat_map[t, h] = heat_map_stats.zone_stats[1:]
+
+        graph = getattr(game, team + half + "Passing_graph")
+        for node in graph.nodes:
+            graph_nodes.append(node_number(node))
+        graph_node_offsets.append(len(graph_nodes))
+        for u, v, d in graph.edges(data=True):
+            edges.append((node_number(u), node_number(v), d["weight"]))
+        graph_offsets.append(len(edges))
+
+        for node, xy in getattr(game, team + half + "Formation").items():
+            formation_nodes.append(node_number(node))
+            formation_xy.append(xy)
+        formation_offsets.append(len(formation_nodes))
+
+        histogram.extend(sorted(stats.passing_sequence_histogram.items()))
+        histogram_offsets.append(len(histogram))
+
+        tree_roots.extend(node_number(node) for node in stats.tree_roots)
+        tree_tips.extend(node_number(node) for node in stats.tree_tips)
+        tree_offsets.append(len(tree_roots))
+        root_counts.extend((node_number(node), count) for node, count in stats.passing_roots())
+        root_count_offsets.append(len(root_counts))
+        tip_counts.extend((node_number(node), count) for node, count in stats.passing_tips())
+        tip_count_offsets.append(len(tip_counts))
+        sequence_nodes, sequence_numbers, offsets = stats.passing_sequences()
+        sequence_lengths.extend(np.diff(offsets).tolist())
+        sequence_offsets.append(len(sequence_lengths))
+        sequence_data.extend(node_number(sequence_nodes[n]) for n in sequence_numbers.tolist())
+        sequence_data_offsets.append(len(sequence_data))
+
+    weights = [edge[2] for edge in edges]
+    if all(isinstance(w, (int, np.integer)) for w in weights):
+        weight_dtype = np.int32
+    else:
+        weight_dtype = np.float64
+    arrays["passing_stats"] = passing_stats
+    arrays["defending_zone"] = defending_zone
+    arrays["heat_map"] = heat_map
+    arrays["graph_offsets"] = np.array(graph_offsets, dtype=np.int64)
+    arrays["edge_from"] = np.array([edge[0] for edge in edges], dtype=np.int16)
+    arrays["edge_to"] = np.array([edge[1] for edge in edges], dtype=np.int16)
+    arrays["edge_weight"] = np.array(weights, dtype=weight_dtype)
+    arrays["graph_node_offsets"] = np.array(graph_node_offsets, dtype=np.int64)
+    arrays["graph_nodes"] = np.array(graph_nodes, dtype=np.int16)
+    arrays["formation_offsets"] = np.array(formation_offsets, dtype=np.int64)
+    arrays["formation_nodes"] = np.array(formation_nodes, dtype=np.int16)
+    arrays["formation_xy"] = np.array(formation_xy, dtype=np.float64).reshape(-1, 2)
+    arrays["histogram_offsets"] = np.array(histogram_offsets, dtype=np.int64)
+    arrays["histogram"] = np.array(histogram, dtype=np.int32).reshape(-1, 2)
+    arrays["tree_offsets"] = np.array(tree_offsets, dtype=np.int64)
+    arrays["tree_roots"] = np.array(tree_roots, dtype=np.int16)
+    arrays["tree_tips"] = np.array(tree_tips, dtype=np.int16)
+    arrays["root_count_offsets"] = np.array(root_count_offsets, dtype=np.int64)
+    arrays["root_counts"] = np.array(root_counts, dtype=np.int32).reshape(-1, 2)
+    arrays["tip_count_offsets"] = np.array(tip_count_offsets, dtype=np.int64)
+    arrays["tip_counts"] = np.array(tip_counts, dtype=np.int32).reshape(-1, 2)
+    arrays["sequence_offsets"] = np.array(sequence_offsets, dtype=np.int64)
+    arrays["sequence_lengths"] = np.array(sequence_lengths, dtype=np.int16)
+    arrays["sequence_data_offsets"] = np.array(sequence_data_offsets, dtype=np.int64)
+    arrays["sequence_data"] = np.array(sequence_data, dtype=np.int16)
+
+    header = {"home_team": game.home_team,
+              "away_team": game.away_team,
+              "game_date": game.game_date,
+              "file_name": game.file_name,
+              "durations": [game.h1Duration, game.h2Duration, game.ot1Duration, game.ot2Duration],
+              "penalty_shootout_goals": [game.homeTeamPenalty_shootout_goals, game.awayTeamPenalty_shootout_goals],
+              "formation_names": [[game.homeTeam_formation_name[p] for p in fgd.PERIODS], [game.awayTeam_formation_name[p] for p in fgd.PERIODS]],
+              "comments": [game.homeTeamH1Comments, game.homeTeamH2Comments, game.awayTeamH1Comments, game.awayTeamH2Comments],
+              "keep_tree_lists": [getattr(game, team + half + "Passing_stats").keep_tree_lists for team, half in TEAM_HALVES],
+              "nodes": nodes}
+    return((header, arrays))
+
+def write_game(game, file_name):
+    """Description: Writes a Game_Data object to a binary game file
+    Inputs: game - Game_Data object to write
+            file_name - name of the binary game file to create
+    Outputs:
+        writes the file
+    """
+    header, arrays = __game_arrays__(game)
+    # the array offsets depend on the header length, so lay the arrays out relative to the start of the data first
+    layout = {}
+    offset = 0
+    data_length = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        layout[name] = {"dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape), "offset": offset}
+        offset = offset + array.nbytes
+        data_length = max(data_length, offset)
+    header["arrays"] = layout
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = -(-(16 + len(header_bytes)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+    header_bytes = header_bytes + b" " * (data_start - 16 - len(header_bytes))
+
+    with open(file_name, "wb") as file_obj:
+        file_obj.write(FILE_MAGIC)
+        file_obj.write(len(header_bytes).to_bytes(8, "little"))
+        file_obj.write(header_bytes)
+        for name, array in arrays.items():
+            file_obj.seek(data_start + layout[name]["offset"])
+            file_obj.write(np.ascontiguousarray(array, dtype=layout[name]["dtype"]).tobytes())
+        file_obj.truncate(data_start + data_length)
+
+class Binary_Game(object):
+    """Description: This class is used to read a binary game file written by write_game. The file is memory mapped and
+    the arrays are read only views into the mapping, so opening a game only reads its header.
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, "rb") as file_obj:
+            if file_obj.read(8) != FILE_MAGIC:
+                raise ValueError(file_name + " is not a binary game file")
+            header_length = int.from_bytes(file_obj.read(8), "little")
+            self.header = json.loads(file_obj.read(header_length).decode("utf-8"))
+        self.__data_start__ = 16 + header_length
+        self.__map__ = np.memmap(file_name, dtype=np.uint8, mode="r")
+        self.home_team = self.header["home_team"]
+        self.away_team = self.header["away_team"]
+        self.game_date = self.header["game_date"]
+
+    def array(self, name):
+        """Description: Returns one of the arrays in the file without copying it
+        Inputs: name - the array name (see the layout at the top of football_game_binary.py)
+        Outputs:
+            Returns - read only numpy array backed by the memory mapped file
+        """
+        layout = self.header["arrays"][name]
+        return(np.ndarray(layout["shape"], dtype=np.dtype(layout["dtype"]), buffer=self.__map__,
+                          offset=self.__data_start__ + layout["offset"]))
+
+    def period_stat(self, stat):
+        """Description: Returns a per period stat for both teams
+        Inputs: stat - the stat name from the data file (key of fgd.PERIOD_STATS, e.g. "GOALS")
+        Outputs:
+            Returns - array [team, period] (team 0 = home, 1 = away; periods in fgd.PERIODS order)
+        """
+        return(self.array("period_stats")[:, :, list(fgd.PERIOD_STATS).index(stat)])
+
+    def final_score(self):
+        """Description: Returns the final score
+        Inputs: None
+        Outputs:
+            Returns - tuple (home team score, away team score)
+        """
+        goals = self.period_stat("GOALS").sum(axis=1)
+        return((int(goals[0]), int(goals[1])))
+
+    def passing_edges(self, team, half):
+        """Description: Returns the edge list of one passing graph
+        Inputs: team - "H" for home team or "A" for away team
+                half - 1 for first half, 2 for second half
+        Outputs:
+            Returns - tuple of arrays (from node numbers, to node numbers, weights); node numbers index self.header["nodes"]
+        """
+        i = (0 if team == "H" else 2) + half - 1
+        offsets = self.array("graph_offsets")
+        start = offsets[i]
+        end = offsets[i + 1]
+        return((self.array("edge_from")[start:end], self.array("edge_to")[start:end], self.array("edge_weight")[start:end]))
+
+    def passing_sequences(self, team, half):
+        """Description: Returns the passing sequences of one team half (see fgd.Passing_Stats.passing_sequences)
+        Inputs: team - "H" for home team or "A" for away team
+                half - 1 for first half, 2 for second half
+        Outputs:
+            Returns - tuple (self.header["nodes"], int16 array of node numbers, int64 array of sequence offsets), the
+                      arrays are empty for files without passing sequences
+        """
+        if "sequence_data" not in self.header["arrays"]:
+            return((self.header["nodes"], np.zeros(0, dtype=np.int16), np.zeros(1, dtype=np.int64)))
+        i = (0 if team == "H" else 2) + half - 1
+        sequence_offsets = self.array("sequence_offsets")
+        data_offsets = self.array("sequence_data_offsets")
+        lengths = self.array("sequence_lengths")[sequence_offsets[i]:sequence_offsets[i + 1]]
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        return((self.header["nodes"], self.array("sequence_data")[data_offsets[i]:data_offsets[i + 1]], offsets))
+
+    def to_game_data(self):
+        """Description: Builds a Game_Data object from the binary game
+        Inputs: None
+        Outputs:
+            Returns - Game_Data object with the same contents as the game that was written
+        """
+        header = self.header
+        nodes = header["nodes"]
+        game = fgd.Game_Data()
+        game.file_name = header["file_name"]
+        game.home_team = header["home_team"]
+        game.away_team = header["away_team"]
+        game.game_date = header["game_date"]
+        game.h1Duration, game.h2Duration, game.ot1Duration, game.ot2Duration = header["durations"]
+        game.homeTeamPenalty_shootout_goals, game.awayTeamPenalty_shootout_goals = header["penalty_shootout_goals"]
+        game.homeTeamH1Comments, game.homeTeamH2Comments, game.awayTeamH1Comments, game.awayTeamH2Comments = [list(c) for c in header["comments"]]
+        for p, period in enumerate(fgd.PERIODS):
+            game.homeTeam_formation_name[period] = header["formation_names"][0][p]
+            game.awayTeam_formation_name[period] = header["formation_names"][1][p]
+
+        period_stats = self.array("period_stats")
+        for s, stat in enumerate(fgd.PERIOD_STATS):
+            for t in range(2):
+                values = getattr(game, fgd.PERIOD_STATS[stat][t])
+                for p, period in enumerate(fgd.PERIODS):
+                    values[period] = int(period_stats[t, p, s])
+
+        passing_stats = self.array("passing_stats")
+        defending_zone = self.array("defending_zone")
+        heat_map = self.array("heat_map")
+        graph_offsets = self.array("graph_offsets")
+        edge_from = self.array("edge_from")
+        edge_to = self.array("edge_to")
+        edge_weight = self.array("edge_weight").tolist()
+        graph_node_offsets = self.array("graph_node_offsets")
+        graph_nodes = self.array("graph_nodes")
+        formation_offsets = self.array("formation_offsets")
+        formation_nodes = self.array("formation_nodes")
+        formation_xy = self.array("formation_xy")
+        histogram_offsets = self.array("histogram_offsets")
+        histogram = self.array("histogram")
+        tree_offsets = self.array("tree_offsets")
+        tree_roots = self.array("tree_roots")
+        tree_tips = self.array("tree_tips")
+        root_count_offsets = self.array("root_count_offsets")
+        root_counts = self.array("root_counts")
+        tip_count_offsets = self.array("tip_count_offsets")
+        tip_counts = self.array("tip_counts")
+        for i, (team, half) in enumerate(TEAM_HALVES):
+            t = i // 2
+            h = i % 2
+            stats = getattr(game, team + half + "Passing_stats")
+            stats.total_passes, stats.possession_instances, stats.max_consecutive_passes = [int(x) for x in passing_stats[t, h]]
+            # the possession instances are only reset by the first passing tree branch processed
+            stats.reset_possession_instances = bool(histogram_offsets[i] == histogram_offsets[i + 1])
+            for length, count in histogram[histogram_offsets[i]:histogram_offsets[i + 1]]:
+                stats.passing_sequence_histogram[int(length)] = int(count)
+            stats.tree_roots = [nodes[n] for n in tree_roots[tree_offsets[i]:tree_offsets[i + 1]]]
+            stats.tree_tips = [nodes[n] for n in tree_tips[tree_offsets[i]:tree_offsets[i + 1]]]
+            stats.keep_tree_lists = header["keep_tree_lists"][i]
+            for node, count in root_counts[root_count_offsets[i]:root_count_offsets[i + 1]]:
+                stats.tree_root_counts[nodes[node]] = int(count)
+            for node, count in tip_counts[tip_count_offsets[i]:tip_count_offsets[i + 1]]:
+                stats.tree_tip_counts[nodes[node]] = int(count)
+            _, sequence_data, sequence_offsets = self.passing_sequences("H" if t == 0 else "A", h + 1)
+            if len(sequence_data) > 0:
+                # number the nodes in the order they first appear, as process_tree_branch did
+                numbers, first_positions = np.unique(sequence_data, return_index=True)
+                numbers = numbers[np.argsort(first_positions)]
+                local_numbers = np.zeros(len(nodes), dtype=np.int32)
+                local_numbers[numbers] = np.arange(len(numbers))
+                stats.sequence_nodes = [nodes[n] for n in numbers.tolist()]
+                stats.sequence_node_numbers = {node: j for j, node in enumerate(stats.sequence_nodes)}
+                stats.sequence_data = array("i", local_numbers[sequence_data].tolist())
+                stats.sequence_offsets = array("q", sequence_offsets.tolist())
+
+            heat_map_stats = getattr(game, team + half + "Heat_map_stats")
+            heat_map_stats.set_team_defending_zone(int(defending_zone[t, h]))
+            if heat_map[t, h].any():
+                heat_map_stats.zone_stats[1:] = heat_map[t, h]
+                heat_map_stats.zones[1:] = True
+
+            formation = getattr(game, team + half + "Formation")
+            for j in range(formation_offsets[i], formation_offsets[i + 1]):
+                formation[nodes[formation_nodes[j]]] = np.array(formation_xy[j])
+
+            graph = getattr(game, team + half + "Passing_graph")
+            graph.add_nodes_from(nodes[n] for n in graph_nodes[graph_node_offsets[i]:graph_node_offsets[i + 1]])
+            graph.add_weighted_edges_from((nodes[edge_from[j]], nodes[edge_to[j]], edge_weight[j]) for j in range(graph_offsets[i], graph_offsets[i + 1]))
+        return(game)
+
+def write_archive(games, folder):
+    """Description: Writes a collection of games to a folder of binary game files
+    Inputs: games - iterable of Game_Data objects (e.g. a football_game_season.Season)
+            folder - the folder to write the binary game files to, created if it doesn't exist
+    Outputs:
+        Returns - list of the binary game files written
+    """
+    os.makedirs(folder, exist_ok=True)
+    file_names = []
+    for game in games:
+        name = os.path.splitext(os.path.basename(game.file_name or (game.home_team + "_vs_" + game.away_team)))[0]
+        file_name = os.path.join(folder, name + FILE_EXTENSION)
+        write_game(game, file_name)
+        file_names.append(file_name)
+    return(file_names)
+
+def scan_archive(folder):
+    """Description: Opens every binary game file in a folder (including sub folders), one at a time
+    Inputs: folder - the folder to scan
+    Outputs:
+        Yields - Binary_Game object for each file, in file name order
+    """
+    file_names = []
+    for dir_path, dir_names, names in os.walk(folder):
+        for f in names:
+            if f.endswith(FILE_EXTENSION):
+                file_names.append(os.path.join(dir_path, f))
+    for file_name in sorted(file_names):
+        yield Binary_Game(file_name)
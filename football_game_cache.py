@@ -0,0 +1,386 @@
+import hashlib
+import io
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import football_game_data as fgd
+
+class Game_Cache(object):
+    """Description: This class is used to keep parsed Game_Data objects in a cache folder so that a game data file
+    that has not changed does not have to be parsed (and its passing graphs rebuilt) again
+    """
+    ENTRY_EXTENSION = ".game"
+
+    def __init__(self, cache_dir, max_entries=None, max_bytes=None):
+        """Description: Creates the cache, the cache folder is created if it doesn't exist
+        Inputs: cache_dir - folder to store the parsed games in
+                max_entries - maximum number of games to keep in the cache (None = no limit)
+                max_bytes - maximum total size of the cached games in bytes (None = no limit)
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0                                 # number of games loaded from the cache
+        self.misses = 0                               # number of games that had to be parsed
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def __path_key__(self, file_name):
+        return(hashlib.sha256(os.path.abspath(file_name).encode("utf-8")).hexdigest()[:32])
+
+    def __entry_name__(self, file_name, keep_tree_lists, dense_graphs=False):
+        """Description: Creates the cache entry name for a game data file
+        Inputs: file_name - the game data file
+                keep_tree_lists - the Game_Data keep_tree_lists option the game is parsed with
+                dense_graphs - the Game_Data dense_graphs option the game is parsed with
+        Outputs:
+            Returns - entry name made of a hash of the file path and a hash of the file contents, parser version and options
+        """
+        content_hash = hashlib.sha256()
+        content_hash.update(str(fgd.PARSER_VERSION).encode("utf-8") + b"\0" + str(keep_tree_lists).encode("utf-8") + b"\0" + str(dense_graphs).encode("utf-8") + b"\0")
+        with open(file_name, "rb") as file_obj:
+            content_hash.update(file_obj.read())
+        return(self.__path_key__(file_name) + "-" + content_hash.hexdigest()[:32] + self.ENTRY_EXTENSION)
+
+    def __entries__(self):
+        """Description: Lists the entries in the cache folder
+        Inputs: None
+        Outputs:
+            Returns - list of [last used time, size in bytes, path] for each entry, least recently used first
+        """
+        entries = []
+        for f in os.listdir(self.cache_dir):
+            if f.endswith(self.ENTRY_EXTENSION):
+                path = os.path.join(self.cache_dir, f)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append([stat.st_mtime, stat.st_size, path])
+        entries.sort()
+        return(entries)
+
+    def load(self, file_name, evict=True, keep_tree_lists=True, dense_graphs=False):
+        """Description: Loads a game from the cache, or parses it and adds it to the cache if the file is not in the
+        cache or has changed since it was cached
+        Inputs: file_name - the game data file to load
+                evict - True to remove least recently used entries if the cache is over its limits after adding the game
+                keep_tree_lists - passed to Game_Data
+                dense_graphs - passed to Game_Data
+        Outputs:
+            Returns - Game_Data object for the file
+        """
+        entry_name = self.__entry_name__(file_name, keep_tree_lists, dense_graphs)
+        entry_path = os.path.join(self.cache_dir, entry_name)
+        try:
+            with open(entry_path, "rb") as entry_obj:
+                game = pickle.load(entry_obj)
+            os.utime(entry_path)                      # mark the entry as most recently used
+            self.hits = self.hits + 1
+            return(game)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # a stale or corrupt entry (e.g. pickled from classes that have changed since), remove it and parse again
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+
+        self.misses = self.misses + 1
+        game = fgd.Game_Data(file_name, keep_tree_lists, dense_graphs)
+        self.invalidate(file_name)                    # drop entries for older contents of the same file
+        temp_path = entry_path + "." + str(os.getpid()) + ".tmp"
+        with open(temp_path, "wb") as entry_obj:
+            pickle.dump(game, entry_obj, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+        if evict:
+            self.evict()
+        return(game)
+
+    def invalidate(self, file_name=None):
+        """Description: Removes cache entries
+        Inputs: file_name - game data file to remove the entries for (None = remove every entry)
+        Outputs:
+            Returns - number of entries removed
+        """
+        if file_name == None:
+            prefix = ""
+        else:
+            prefix = self.__path_key__(file_name) + "-"
+        removed = 0
+        for f in os.listdir(self.cache_dir):
+            if f.startswith(prefix) and f.endswith(self.ENTRY_EXTENSION):
+                try:
+                    os.remove(os.path.join(self.cache_dir, f))
+                    removed = removed + 1
+                except FileNotFoundError:
+                    pass
+        return(removed)
+
+    def evict(self):
+        """Description: Removes the least recently used entries until the cache is within max_entries and max_bytes
+        Inputs: None
+        Outputs:
+            Returns - number of entries removed
+        """
+        entries = self.__entries__()
+        total_bytes = sum(entry[1] for entry in entries)
+        removed = 0
+        for last_used, size, path in entries:
+            over_entries = self.max_entries != None and len(entries) - removed > self.max_entries
+            over_bytes = self.max_bytes != None and total_bytes > self.max_bytes
+            if not (over_entries or over_bytes):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            removed = removed + 1
+            total_bytes = total_bytes - size
+        return(removed)
+
+    def stats(self):
+        """Description: Returns the cache counters
+        Inputs: None
+        Outputs:
+            Returns - dictionary with the number of hits, misses, entries and bytes in the cache
+        """
+        entries = self.__entries__()
+        return({"hits": self.hits, "misses": self.misses, "entries": len(entries), "bytes": sum(entry[1] for entry in entries)})
+
+IMAGE_CACHE_VERSION = 1                               # change when the drawing code changes, so older cached images are not used
+
+class Image_Cache(object):
+    """Description: This class is used to keep rendered heat map and passing graph PNG images, so an image that was
+    already rendered for the same game and render parameters is not drawn again. Images are kept in memory and
+    optionally in a cache folder (which several processes can share), each with a size limit. An image is found by a
+    key made from a hash of the game data file contents and the render parameters. The cache can be used from several
+    threads, e.g. to keep the disk reads and writes out of an event loop.
+    """
+    IMAGE_EXTENSION = ".png"
+
+    def __init__(self, cache_dir=None, max_memory_bytes=64*1024*1024, max_disk_bytes=512*1024*1024):
+        """Description: Creates the cache, the cache folder is created if it doesn't exist
+        Inputs: cache_dir - folder to also keep the images in (None = only keep them in memory)
+                max_memory_bytes - maximum total size of the images kept in memory
+                max_disk_bytes - maximum total size of the images in the cache folder (None = no limit)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.images = OrderedDict()                   # dictionary (key: PNG image bytes), least recently used first
+        self.memory_bytes = 0
+        self.hits = 0                                 # number of images found in memory or in the cache folder
+        self.misses = 0                               # number of images that had to be rendered
+        self.__game_hashes__ = {}                     # dictionary (file name: (file size and mtime, hash of the file contents))
+        # total size of the images in the cache folder as last counted by evict plus the images written since, None
+        # until it is first counted (other processes sharing the folder are only seen when it is counted again)
+        self.disk_bytes = None
+        self.__lock__ = threading.Lock()              # guards the images in memory, the sizes and the counters
+        if cache_dir != None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def game_hash(self, game):
+        """Description: Hashes the data a game's images are drawn from
+        Inputs: game - Game_Data object
+        Outputs:
+            Returns - hash of the game data file contents (remembered until the file changes), or of the pickled game
+                      for games that were not read from a file (e.g. a live game snapshot)
+        """
+        content_hash = hashlib.sha256(str(fgd.PARSER_VERSION).encode("utf-8") + b"\0")
+        if game.file_name == None:
+            content_hash.update(pickle.dumps(game, protocol=pickle.HIGHEST_PROTOCOL))
+            return(content_hash.hexdigest())
+        stat = os.stat(game.file_name)
+        file_stat = (stat.st_size, stat.st_mtime_ns)
+        entry = self.__game_hashes__.get(game.file_name)
+        if entry == None or entry[0] != file_stat:
+            with open(game.file_name, "rb") as file_obj:
+                content_hash.update(file_obj.read())
+            entry = (file_stat, content_hash.hexdigest())
+            self.__game_hashes__[game.file_name] = entry
+        return(entry[1])
+
+    def key(self, game_hash, image_type, **parameters):
+        """Description: Makes the cache key of an image
+        Inputs: game_hash - hash of the game (see game_hash)
+                image_type - kind of image, e.g. "heat_map" or "passing_graph"
+                parameters - render parameters (team, half, map type, weight, omit, dpi, figsize, ...)
+        Outputs:
+            Returns - key (hex string)
+        """
+        key_hash = hashlib.sha256()
+        key_hash.update((str(IMAGE_CACHE_VERSION) + "\0" + game_hash + "\0" + image_type + "\0").encode("utf-8"))
+        key_hash.update(repr(sorted(parameters.items())).encode("utf-8"))
+        return(key_hash.hexdigest()[:40])
+
+    def __image_path__(self, key):
+        return(os.path.join(self.cache_dir, key + self.IMAGE_EXTENSION))
+
+    def get(self, key):
+        """Description: Finds an image in memory or in the cache folder
+        Inputs: key - the image key
+        Outputs:
+            Returns - PNG image bytes or None if the image is not cached
+        """
+        with self.__lock__:
+            image = self.images.get(key)
+            if image != None:
+                self.images.move_to_end(key)
+        if image == None and self.cache_dir != None:
+            path = self.__image_path__(key)
+            try:
+                with open(path, "rb") as image_obj:
+                    image = image_obj.read()
+                os.utime(path)                        # mark the image as most recently used
+                self.__remember__(key, image)
+            except FileNotFoundError:
+                pass
+        with self.__lock__:
+            if image == None:
+                self.misses = self.misses + 1
+            else:
+                self.hits = self.hits + 1
+        return(image)
+
+    def __remember__(self, key, image):
+        # keeps an image in memory, dropping the least recently used images over max_memory_bytes
+        with self.__lock__:
+            self.__remember_locked__(key, image)
+
+    def __remember_locked__(self, key, image):
+        if key in self.images:
+            self.memory_bytes = self.memory_bytes - len(self.images.pop(key))
+        if len(image) > self.max_memory_bytes:
+            return
+        self.images[key] = image
+        self.memory_bytes = self.memory_bytes + len(image)
+        while self.memory_bytes > self.max_memory_bytes:
+            old_key, old_image = self.images.popitem(last=False)
+            self.memory_bytes = self.memory_bytes - len(old_image)
+
+    def put(self, key, image):
+        """Description: Adds an image to the cache
+        Inputs: key - the image key
+                image - PNG image bytes
+        Outputs:
+            Keeps the image in memory and in the cache folder
+        """
+        self.__remember__(key, image)
+        if self.cache_dir != None:
+            path = self.__image_path__(key)
+            temp_path = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+            with open(temp_path, "wb") as image_obj:
+                image_obj.write(image)
+            try:
+                replaced_bytes = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced_bytes = 0
+            os.replace(temp_path, path)
+            with self.__lock__:
+                if self.disk_bytes != None:
+                    self.disk_bytes = self.disk_bytes + len(image) - replaced_bytes
+                over_limit = self.max_disk_bytes != None and (self.disk_bytes == None or self.disk_bytes > self.max_disk_bytes)
+            # the cache folder is only listed when it may be over its limit
+            if over_limit:
+                self.evict()
+
+    def evict(self):
+        """Description: Removes the least recently used images from the cache folder until it is within max_disk_bytes
+        Inputs: None
+        Outputs:
+            Returns - number of images removed
+        """
+        if self.cache_dir == None or self.max_disk_bytes == None:
+            return(0)
+        entries = []
+        for f in os.listdir(self.cache_dir):
+            if f.endswith(self.IMAGE_EXTENSION):
+                path = os.path.join(self.cache_dir, f)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append([stat.st_mtime, stat.st_size, path])
+        entries.sort()
+        total_bytes = sum(entry[1] for entry in entries)
+        removed = 0
+        for last_used, size, path in entries:
+            if total_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            removed = removed + 1
+            total_bytes = total_bytes - size
+        with self.__lock__:
+            self.disk_bytes = total_bytes
+        return(removed)
+
+    def image(self, key, render):
+        """Description: Returns a cached image, rendering and caching it if it is not cached
+        Inputs: key - the image key
+                render - function called with no arguments that returns the PNG image (bytes or io.BytesIO)
+        Outputs:
+            Returns - PNG image bytes
+        """
+        image = self.get(key)
+        if image != None:
+            return(image)
+        image = render()
+        if not isinstance(image, bytes):
+            image = image.getvalue()
+        self.put(key, image)
+        return(image)
+
+    def heat_map_key(self, game, team, half, map_type, dpi=100, figsize=None):
+        # key of a heat map image (see Game_Data.heat_map_image for the parameters)
+        return(self.key(self.game_hash(game), "heat_map", team=team, half=half, map_type=map_type, dpi=dpi, figsize=figsize))
+
+    def passing_graph_key(self, game, team, half, weight, omit, dpi=100, figsize=None):
+        # key of a passing graph image (see Game_Data.passing_graph_image for the parameters)
+        return(self.key(self.game_hash(game), "passing_graph", team=team, half=half, weight=weight, omit=bool(omit), dpi=dpi, figsize=figsize))
+
+    def heat_map_image(self, game, team, half, map_type, dpi=100, figsize=None):
+        """Description: Game_Data.heat_map_image through the cache
+        Inputs: game - Game_Data object
+                team, half, map_type, dpi, figsize - see Game_Data.heat_map_image
+        Outputs:
+            Returns - io.BytesIO object with the PNG image, positioned at the start
+        """
+        key = self.heat_map_key(game, team, half, map_type, dpi, figsize)
+        return(io.BytesIO(self.image(key, lambda: game.heat_map_image(team, half, map_type, dpi, figsize))))
+
+    def passing_graph_image(self, game, team, half, weight, omit, dpi=100, figsize=None):
+        """Description: Game_Data.passing_graph_image through the cache
+        Inputs: game - Game_Data object
+                team, half, weight, omit, dpi, figsize - see Game_Data.passing_graph_image
+        Outputs:
+            Returns - io.BytesIO object with the PNG image, positioned at the start
+        """
+        key = self.passing_graph_key(game, team, half, weight, omit, dpi, figsize)
+        return(io.BytesIO(self.image(key, lambda: game.passing_graph_image(team, half, weight, omit, dpi, figsize))))
+
+    def clear(self):
+        """Description: Removes every image from memory and from the cache folder"""
+        with self.__lock__:
+            self.images.clear()
+            self.memory_bytes = 0
+            self.disk_bytes = 0 if self.cache_dir != None else None
+        if self.cache_dir != None:
+            for f in os.listdir(self.cache_dir):
+                if f.endswith(self.IMAGE_EXTENSION):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, f))
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self):
+        """Description: Returns the cache counters
+        Inputs: None
+        Outputs:
+            Returns - dictionary with the number of hits and misses and the images and bytes kept in memory
+        """
+        return({"hits": self.hits, "misses": self.misses, "memory_images": len(self.images), "memory_bytes": self.memory_bytes})
@@ -1,23 +1,80 @@
-from collections import Counter
+from array import array
+from collections import Counter, namedtuple
 import csv
+import io
+import locale
+import os
+import threading
+import types
 import networkx as nx
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from matplotlib.patches import Arc
 
+# version of the parsed Game_Data layout, increment it whenever the parser or the parsed objects change so that
+# cached games (see football_game_cache.py) are parsed again
+PARSER_VERSION = 6
+
+PERIODS = ("H1", "H2", "OT1", "OT2")
+HALVES = ("H1", "H2")
+
+# per period statistics in the data file (field name: (home team Game_Data attribute, away team Game_Data attribute))
+PERIOD_STATS = {"GOALS": ("home_team_goals", "away_team_goals"),
+                "ASSISTS": ("home_team_assists", "away_team_assists"),
+                "SHOTS": ("home_team_shots", "away_team_shots"),
+                "SAVES": ("home_team_saves", "away_team_saves"),
+                "CORNERS": ("home_team_corners", "away_team_corners"),
+                "YELLOW CARDS": ("homeTeam_yellow_cards", "awayTeam_yellow_cards"),
+                "RED CARDS": ("homeTeam_red_cards", "awayTeam_red_cards")}
+
+# Heat_Map_Stats zone statistics, in the order add_zone takes them (each is also available as Heat_Map_Stats.zone_<name>)
+HEAT_MAP_STATS = ("shots_off_target", "shots_on_target", "shots_scored", "own_goals", "assists", "passes",
+                  "possession_instances", "lost_possession_instances")
+
+# zone numbers with the pitch turned around (zone z becomes zone 19 - z, zone 0 is not a zone and stays 0)
+MIRRORED_ZONES = np.concatenate(([0], np.arange(18, 0, -1)))
+
 class Heat_Map_Stats(object):
     """Description: This class is used to collect passing and shooting statistics by processing a heat map
     """
+    # column of each statistic in zone_stats (same order as HEAT_MAP_STATS and the add_zone arguments)
+    SHOTS_OFF_TARGET = 0
+    SHOTS_ON_TARGET = 1
+    SHOTS_SCORED = 2
+    OWN_GOALS = 3
+    ASSISTS = 4
+    PASSES = 5
+    POSSESSION_INSTANCES = 6
+    LOST_POSSESSION_INSTANCES = 7
+    NUM_ZONES = 18
+
     def __init__(self):
         self.team_defending_zone = 0
-        self.zone_shots_off_target = {}                # dictionary containing number of shots not on target in each zone (zone #: # shots)
-        self.zone_shots_on_target = {}                 # dictionary containing number of shots on target but not scored in each zone (zone #: # shots]
-        self.zone_shots_scored = {}                   # dictionary containing number of shots scored in each zone (zone #: # goals)
-        self.zone_own_goals = {}                          # dictionary containing number of shots scored as own goals in each zone (zone#: # own goals)
-        self.zone_assists = {}                       # dictionary containing number of assist passes completed in each zone (zone#: # assists)
-        self.zone_passes = {}                        # dictionary containing number of passes completed in each zone (zone #: # passes)
-        self.zone_possession_instances = {}           # dictionary containing number of possession instances (3 consecutive passes) in each zone (zone #: # possessions)
-        self.zone_lost_possession_instances = {}       # dictionary containing number of times lost possession in each zone (zone#: # lost possessions)
+        self.zone_stats = np.zeros((self.NUM_ZONES + 1, len(HEAT_MAP_STATS)), dtype=np.int64)    # matrix of statistics for each zone (zone #, stat column), row 0 is not used
+        self.zones = np.zeros(self.NUM_ZONES + 1, dtype=bool)                                   # True for each zone # that has been added
+
+    def __zone_dictionary__(self, column):
+        """Description: Returns one statistic as a dictionary (zone #: value) of the zones that have been added. The
+        statistics are kept in self.zone_stats, so the dictionary is built from it on each call and is read-only:
+        writing to it raises TypeError, update the statistics with add_zone instead
+        Inputs: column - the zone_stats column of the statistic
+        Outputs:
+            Returns - read-only dictionary (types.MappingProxyType, zone #: value)
+        """
+        return(types.MappingProxyType({int(zone): int(self.zone_stats[zone, column]) for zone in np.flatnonzero(self.zones)}))
+
+    # read-only dictionaries containing the number of each statistic in each zone (zone #: value)
+    zone_shots_off_target = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.SHOTS_OFF_TARGET))
+    zone_shots_on_target = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.SHOTS_ON_TARGET))            # shots on target but not scored
+    zone_shots_scored = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.SHOTS_SCORED))
+    zone_own_goals = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.OWN_GOALS))
+    zone_assists = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.ASSISTS))
+    zone_passes = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.PASSES))
+    zone_possession_instances = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.POSSESSION_INSTANCES))  # 3 consecutive passes
+    zone_lost_possession_instances = property(lambda self: self.__zone_dictionary__(Heat_Map_Stats.LOST_POSSESSION_INSTANCES))
 
     def set_team_defending_zone(self, zone_num):
         """Description: Set the zone number that the team that this heat map is for is defending
@@ -39,27 +96,116 @@ class Heat_Map_Stats(object):
                 possessions - the number of possession instances ended in this zone
                 lost_possession - the number of times possession lost in the this zone
         Outputs:
-            Adds zone to the dictionary if it isn't already in. If the zone is already in the dictionary, then it overwrites the values with the new values
+            Adds zone to the zone statistics. If the zone has already been added, then it overwrites the values with the new values
         """
-        self.zone_shots_off_target[zone_num] = shots_off_target
-        self.zone_shots_on_target[zone_num] = shots_on_target
-        self.zone_shots_scored[zone_num] = shots_scored
-        self.zone_own_goals[zone_num] = own_goals
-        self.zone_assists[zone_num] = assists
-        self.zone_passes[zone_num] = passes
-        self.zone_possession_instances[zone_num] = possessions
-        self.zone_lost_possession_instances[zone_num] = lost_possession
-        
+        if zone_num < 0 or zone_num > self.NUM_ZONES:
+            raise ValueError("zone number out of range: " + str(zone_num))
+        self.zone_stats[zone_num] = (shots_off_target, shots_on_target, shots_scored, own_goals, assists, passes, possessions, lost_possession)
+        self.zones[zone_num] = True
+
+    def increment_zone(self, zone_num, column, amount=1):
+        """Description: Adds to one statistic of a zone, e.g. as events are recorded during a game
+        Inputs: zone_num - the zone number (1 - NUM_ZONES)
+                column - zone_stats column of the statistic (e.g. Heat_Map_Stats.PASSES)
+                amount - the number to add
+        Outputs:
+            Updates the zone statistics, the zone counts as added from then on
+        """
+        if zone_num < 1 or zone_num > self.NUM_ZONES:
+            raise ValueError("zone number out of range: " + str(zone_num))
+        self.zone_stats[zone_num, column] += amount
+        self.zones[zone_num] = True
+
+    def total(self, *columns):
+        """Description: Add one or more statistics from all zones and return the total value
+        Inputs: columns - zone_stats columns of the statistics to add
+        Outputs:
+            Returns - Sum of the statistics in all zones (a float for averaged heat maps)
+        """
+        return(self.zone_stats[:, list(columns)].sum().item())
+
+    def zone_ratios(self, *columns):
+        """Description: Calculate the share of the total of one or more statistics that is in each zone
+        Inputs: columns - zone_stats columns of the statistics to add
+        Outputs:
+            Returns - array indexed by zone # of the fraction of the total in each zone (all 0 if the total is 0)
+        """
+        zone_totals = self.zone_stats[:, list(columns)].sum(axis=1)
+        total = zone_totals.sum()
+        if total == 0:
+            return(np.zeros(len(zone_totals)))
+        return(zone_totals / total)
+
+    @classmethod
+    def sum(cls, heat_maps):
+        """Description: Add the statistics of several heat maps zone by zone, as they were recorded
+        Inputs: heat_maps - iterable of Heat_Map_Stats objects
+        Outputs:
+            Returns - new Heat_Map_Stats object with the zone statistics of all the heat maps added together
+        """
+        total = cls()
+        heat_maps = list(heat_maps)
+        if heat_maps:
+            total.zone_stats = np.sum([heat_map.zone_stats for heat_map in heat_maps], axis=0)
+            total.zones = np.any([heat_map.zones for heat_map in heat_maps], axis=0)
+        return(total)
+
+    def defends_far_end(self):
+        """Description: Checks which end of the pitch the team was defending
+        Inputs: None
+        Outputs:
+            Returns - True if the team defended the goal at the zone 16-18 end of the pitch
+        """
+        return(self.team_defending_zone > 9)
+
+    def normalized(self):
+        """Description: Orients the heat map so the team defends the zone 1-3 end of the pitch and attacks towards zones 16-18
+        Inputs: None
+        Outputs:
+            Returns - new Heat_Map_Stats object with the zones mirrored if the team defended the far end
+        """
+        return(self.aggregate([self]))
+
+    @classmethod
+    def aggregate(cls, heat_maps, average=False):
+        """Description: Combines heat maps from different halves and games. Each heat map is first oriented so the team
+        defends the zone 1-3 end of the pitch (turning the pitch around maps zone z to zone 19 - z), then the zones are
+        added (or averaged) in one batched operation
+        Inputs: heat_maps - iterable of Heat_Map_Stats objects
+                average - False to add the heat maps, True to average them
+        Outputs:
+            Returns - new Heat_Map_Stats object defending zone 2 (the goal at the zone 1-3 end), raises ValueError if
+                      a heat map has no defending zone (e.g. its file has no DEFENDING ZONE row), since it can't be
+                      turned the right way
+        """
+        combined = cls()
+        combined.set_team_defending_zone(2)
+        heat_maps = list(heat_maps)
+        if not heat_maps:
+            return(combined)
+        unknown = [heat_map.team_defending_zone for heat_map in heat_maps if not 1 <= heat_map.team_defending_zone <= cls.NUM_ZONES]
+        if unknown:
+            raise ValueError(str(len(unknown)) + " of the heat maps have no defending zone (" +
+                             ", ".join(str(zone) for zone in sorted(set(unknown))) + ")")
+        zone_stats = np.stack([heat_map.zone_stats for heat_map in heat_maps])
+        zones = np.stack([heat_map.zones for heat_map in heat_maps])
+        far_end = np.array([heat_map.team_defending_zone > 9 for heat_map in heat_maps])
+        zone_stats[far_end] = zone_stats[far_end][:, MIRRORED_ZONES]
+        zones[far_end] = zones[far_end][:, MIRRORED_ZONES]
+        if average:
+            combined.zone_stats = zone_stats.mean(axis=0)
+        else:
+            combined.zone_stats = zone_stats.sum(axis=0)
+        combined.zones = zones.any(axis=0)
+        return(combined)
+
     def total_passes(self):
         """Description: Add the passes from all zones and return the total value
         Inputs: None
         Outputs:
             Returns - Sum of all the passes in all zones
         """
-        total_passes = 0
-        for zone in self.zone_passes:
-            total_passes = total_passes + self.zone_passes[zone]
-        return(total_passes)
+        return(self.total(self.PASSES))
 
     def total_possession_instances(self):
         """Description: Add the possession instances from all zones and return the total value
@@ -67,10 +213,7 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the possession instances in all zones
         """
-        total_possession = 0
-        for zone in self.zone_possession_instances:
-            total_possession = total_possession + self.zone_possession_instances[zone]
-        return(total_possession)
+        return(self.total(self.POSSESSION_INSTANCES))
 
     def total_lost_possession_instances(self):
         """Description: Add the lost possession instances from all zones and return the total value
@@ -78,10 +221,7 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the lost possession instances in all zones
         """
-        total_lost_possession = 0
-        for zone in self.zoneLost_possession_instances:
-            total_lost_possession = total_lost_possession + self.zoneLost_possession_instances[zone]
-        return(total_lost_possession)
+        return(self.total(self.LOST_POSSESSION_INSTANCES))
 
     def total_shots_on_target(self):
         """Description: Add the shots on target from all zones and return the total value
@@ -89,16 +229,7 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the shots on target in all zones
         """
-        total_shots = 0
-        for zone in self.zone_shots_on_target:
-            total_shots = total_shots + self.zone_shots_on_target[zone]
-            
-        for zone in self.zone_shots_scored:
-            total_shots = total_shots + self.zone_shots_scored[zone]
-
-        for zone in self.zone_own_goals:
-            total_shots = total_shots + self.zone_own_goals[zone]
-        return(total_shots)
+        return(self.total(self.SHOTS_ON_TARGET, self.SHOTS_SCORED, self.OWN_GOALS))
 
     def total_shots(self):
         """Description: Add the shots from all zones and return the total value
@@ -106,19 +237,7 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the shots in all zones
         """
-        total_shots = 0
-        for zone in self.zone_shots_off_target:
-            total_shots = total_shots + self.zone_shots_off_target[zone]
-
-        for zone in self.zoneShots_on_target:
-            total_shots = total_shots + self.zone_shots_on_target[zone]
-            
-        for zone in self.zone_shots_scored:
-            total_shots = total_shots + self.zone_shots_scored[zone]
-
-        for zone in self.zone_own_goals:
-            total_shots = total_shots + self.zone_own_goals[zone]
-        return(total_shots)
+        return(self.total(self.SHOTS_OFF_TARGET, self.SHOTS_ON_TARGET, self.SHOTS_SCORED, self.OWN_GOALS))
         
     def total_goals(self):
         """Description: Add the shots scored from all zones and return the total value
@@ -126,13 +245,7 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the goals in all zones
         """
-        total_shots = 0
-        for zone in self.zone_shots_scored:
-            total_shots = total_shots + self.zone_shots_scored[zone]
-
-        for zone in self.zone_own_goals:
-            total_shots = total_shots + self.zone_own_goals[zone]
-        return(total_shots)
+        return(self.total(self.SHOTS_SCORED, self.OWN_GOALS))
 
         
     def total_assists(self):
@@ -141,23 +254,322 @@ class Heat_Map_Stats(object):
         Outputs:
             Returns - Sum of all the assists in all zones
         """
-        total_assists = 0
-        for zone in self.zone_assists:
-            total_assists = total_assists + self.zone_assists[zone]
-        return(total_assists)
+        return(self.total(self.ASSISTS))
         
 
+class Passing_Graph(nx.DiGraph):
+    """Description: This class is a networkx DiGraph of the passes between players that remembers its passing metrics
+    (see metrics) until the graph is changed. Edge weights must be changed through add_edge (e.g.
+    graph.add_edge(u, v, weight=w)) rather than by assigning to graph[u][v]['weight'] so the metrics are recalculated.
+    """
+    def __init__(self, incoming_graph_data=None, **attr):
+        self.__metrics__ = None                       # dictionary of passing metrics, None until metrics is called after a change
+        super().__init__(incoming_graph_data, **attr)
+
+    @staticmethod
+    def calculate_metrics(graph):
+        """Description: Calculates the passing metrics of a graph in one pass over its edges
+        Inputs: graph - a networkx DiGraph with the number of passes between players in the 'weight' edge attribute
+        Outputs:
+            Returns - dictionary with
+                          total_passes - sum of the weights of all the edges
+                          out_degree - dictionary (node: weighted out degree, i.e. passes made)
+                          in_degree - dictionary (node: weighted in degree, i.e. passes received)
+                          top_passer - (node, passes made) for the node with the most passes made
+                          hub_player - (node, passes made + received) for the node involved in the most passes
+                      the first node in graph order wins ties, top_passer and hub_player are None if the graph has no nodes
+        """
+        out_degree = dict.fromkeys(graph, 0)
+        in_degree = dict.fromkeys(graph, 0)
+        total_passes = 0
+        for u, v, d in graph.edges(data=True):
+            weight = d.get('weight', 1)
+            total_passes = total_passes + weight
+            out_degree[u] = out_degree[u] + weight
+            in_degree[v] = in_degree[v] + weight
+
+        top_passer = None
+        hub_player = None
+        for node in out_degree:
+            degree = out_degree[node] + in_degree[node]
+            if top_passer == None or out_degree[node] > top_passer[1]:
+                top_passer = (node, out_degree[node])
+            if hub_player == None or degree > hub_player[1]:
+                hub_player = (node, degree)
+        return({"total_passes": total_passes, "out_degree": out_degree, "in_degree": in_degree,
+                "top_passer": top_passer, "hub_player": hub_player})
+
+    def add_passes(self, path):
+        """Description: Adds one pass along each edge of a path, adding the edges and nodes that aren't in the graph yet
+        Inputs: path - list of nodes in order of pass propagation
+        Outputs:
+            Increments the 'weight' of each edge in the path
+        """
+        for i in range(0,len(path)-1):
+            if self.has_edge(path[i],path[i+1]):
+                x = self[path[i]][path[i+1]]['weight']
+                self.add_edge(path[i],path[i+1],weight=x+1)
+            else:
+                self.add_edge(path[i],path[i+1],weight=1)
+
+    def metrics(self):
+        """Description: Returns the passing metrics of the graph (see calculate_metrics), calculating them only if the
+        graph has changed since the last call
+        Inputs: None
+        Outputs:
+            Returns - dictionary of passing metrics
+        """
+        if self.__metrics__ == None:
+            self.__metrics__ = self.calculate_metrics(self)
+        return(self.__metrics__)
+
+    def invalidate_metrics(self):
+        """Description: Clears the remembered passing metrics, called by every function that changes the graph
+        Inputs: None
+        Outputs:
+            Sets member variable self.__metrics__ to None
+        """
+        self.__metrics__ = None
+
+    def add_node(self, node_for_adding, **attr):
+        self.invalidate_metrics()
+        super().add_node(node_for_adding, **attr)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        self.invalidate_metrics()
+        super().add_nodes_from(nodes_for_adding, **attr)
+
+    def remove_node(self, n):
+        self.invalidate_metrics()
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        self.invalidate_metrics()
+        super().remove_nodes_from(nodes)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        self.invalidate_metrics()
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        self.invalidate_metrics()
+        super().add_edges_from(ebunch_to_add, **attr)
+
+    def remove_edge(self, u, v):
+        self.invalidate_metrics()
+        super().remove_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        self.invalidate_metrics()
+        super().remove_edges_from(ebunch)
+
+    def update(self, edges=None, nodes=None):
+        self.invalidate_metrics()
+        super().update(edges, nodes)
+
+    def clear(self):
+        self.invalidate_metrics()
+        super().clear()
+
+    def clear_edges(self):
+        self.invalidate_metrics()
+        super().clear_edges()
+
+class Dense_Passing_Graph(object):
+    """Description: This class is a compact alternative to Passing_Graph for the small (about 20 node) passing graphs of
+    one team in one half. The number of passes between players is kept in a NumPy weight matrix indexed through a node
+    index map. It supports the graph operations Game_Data uses and converts to a networkx DiGraph for drawing.
+    """
+    INITIAL_CAPACITY = 24
+
+    def __init__(self):
+        self.node_index = {}                          # dictionary (node: row / column of the node in weights)
+        self.node_list = []                           # nodes in the order they were added
+        self.weights = np.zeros((self.INITIAL_CAPACITY, self.INITIAL_CAPACITY), dtype=np.int32)    # number of passes (from node, to node)
+        self.edge_mask = np.zeros((self.INITIAL_CAPACITY, self.INITIAL_CAPACITY), dtype=bool)      # True for each (from node, to node) edge in the graph
+        self.__metrics__ = None                       # dictionary of passing metrics, None until metrics is called after a change
+        self.__networkx__ = None                      # networkx copy of the graph, None until to_networkx is called after a change
+
+    def __changed__(self):
+        self.__metrics__ = None
+        self.__networkx__ = None
+
+    def __node__(self, node):
+        """Description: Returns the index of a node, adding the node if it isn't in the graph yet
+        Inputs: node - the node
+        Outputs:
+            Returns - row / column of the node in the weight matrix
+        """
+        index = self.node_index.get(node)
+        if index == None:
+            index = len(self.node_list)
+            if index == len(self.weights):
+                # grow the matrices to twice the size
+                size = max(2 * index, self.INITIAL_CAPACITY)
+                weights = np.zeros((size, size), dtype=self.weights.dtype)
+                weights[:index, :index] = self.weights
+                edge_mask = np.zeros((size, size), dtype=bool)
+                edge_mask[:index, :index] = self.edge_mask
+                self.weights = weights
+                self.edge_mask = edge_mask
+            self.node_index[node] = index
+            self.node_list.append(node)
+            self.__changed__()
+        return(index)
+
+    def __getstate__(self):
+        # only pickle the used part of the matrices, the cached metrics and networkx copy are rebuilt when needed
+        n = len(self.node_list)
+        state = dict(self.__dict__)
+        state["weights"] = self.weights[:n, :n].copy()
+        state["edge_mask"] = self.edge_mask[:n, :n].copy()
+        state["__metrics__"] = None
+        state["__networkx__"] = None
+        return(state)
+
+    def __len__(self):
+        return(len(self.node_list))
+
+    def __iter__(self):
+        return(iter(self.node_list))
+
+    def __contains__(self, node):
+        return(node in self.node_index)
+
+    @property
+    def nodes(self):
+        return(list(self.node_list))
+
+    def add_nodes_from(self, nodes_for_adding):
+        for node in nodes_for_adding:
+            self.__node__(node)
+
+    def has_edge(self, u, v):
+        return(u in self.node_index and v in self.node_index and bool(self.edge_mask[self.node_index[u], self.node_index[v]]))
+
+    def add_weighted_edges_from(self, ebunch_to_add):
+        """Description: Adds edges, setting the weight of edges that are already in the graph
+        Inputs: ebunch_to_add - iterable of (from node, to node, weight) tuples
+        Outputs:
+            Updates the weight matrix (which becomes floating point if a weight isn't a whole number type)
+        """
+        for u, v, weight in ebunch_to_add:
+            i = self.__node__(u)
+            j = self.__node__(v)
+            if not isinstance(weight, (int, np.integer)) and self.weights.dtype != np.float64:
+                self.weights = self.weights.astype(np.float64)
+            self.weights[i, j] = weight
+            self.edge_mask[i, j] = True
+        self.__changed__()
+
+    def add_passes(self, path):
+        """Description: Adds one pass along each edge of a path, adding the edges and nodes that aren't in the graph yet
+        Inputs: path - list of nodes in order of pass propagation
+        Outputs:
+            Increments the weight of each edge in the path
+        """
+        if len(path) < 2:
+            return
+        indexes = [self.__node__(node) for node in path]
+        weights = self.weights
+        edge_mask = self.edge_mask
+        for k in range(len(indexes) - 1):
+            weights[indexes[k], indexes[k + 1]] += 1
+            edge_mask[indexes[k], indexes[k + 1]] = True
+        self.__changed__()
+
+    def edges(self, data=False):
+        """Description: Returns the edges of the graph in node order
+        Inputs: data - True to return the edge weight with each edge
+        Outputs:
+            Returns - list of (from node, to node) tuples, or (from node, to node, {'weight': weight}) tuples if data is True
+        """
+        from_nodes, to_nodes = np.nonzero(self.edge_mask)
+        if data:
+            weights = self.weights[from_nodes, to_nodes].tolist()
+            return([(self.node_list[i], self.node_list[j], {'weight': w}) for i, j, w in zip(from_nodes.tolist(), to_nodes.tolist(), weights)])
+        return([(self.node_list[i], self.node_list[j]) for i, j in zip(from_nodes.tolist(), to_nodes.tolist())])
+
+    def __degree__(self, weighted_degree):
+        return([(node, weighted_degree[i].item()) for i, node in enumerate(self.node_list)])
+
+    def out_degree(self, weight='weight'):
+        n = len(self.node_list)
+        return(self.__degree__(self.weights[:n, :n].sum(axis=1)))
+
+    def in_degree(self, weight='weight'):
+        n = len(self.node_list)
+        return(self.__degree__(self.weights[:n, :n].sum(axis=0)))
+
+    def degree(self, weight='weight'):
+        n = len(self.node_list)
+        return(self.__degree__(self.weights[:n, :n].sum(axis=1) + self.weights[:n, :n].sum(axis=0)))
+
+    def metrics(self):
+        """Description: Returns the passing metrics of the graph (same dictionary as Passing_Graph.calculate_metrics),
+        calculating them with matrix reductions only if the graph has changed since the last call
+        Inputs: None
+        Outputs:
+            Returns - dictionary of passing metrics
+        """
+        if self.__metrics__ == None:
+            n = len(self.node_list)
+            weights = self.weights[:n, :n]
+            out_degree = weights.sum(axis=1)
+            in_degree = weights.sum(axis=0)
+            degree = out_degree + in_degree
+            top_passer = None
+            hub_player = None
+            if n > 0:
+                top = int(np.argmax(out_degree))
+                hub = int(np.argmax(degree))
+                top_passer = (self.node_list[top], out_degree[top].item())
+                hub_player = (self.node_list[hub], degree[hub].item())
+            self.__metrics__ = {"total_passes": weights.sum().item(),
+                                "out_degree": dict(zip(self.node_list, out_degree.tolist())),
+                                "in_degree": dict(zip(self.node_list, in_degree.tolist())),
+                                "top_passer": top_passer, "hub_player": hub_player}
+        return(self.__metrics__)
+
+    def to_networkx(self):
+        """Description: Converts the graph to a networkx DiGraph (e.g. for drawing), only building it again if the graph
+        has changed since the last call
+        Inputs: None
+        Outputs:
+            Returns - networkx DiGraph with the same nodes and weighted edges
+        """
+        if self.__networkx__ == None:
+            graph = nx.DiGraph()
+            graph.add_nodes_from(self.node_list)
+            graph.add_weighted_edges_from((u, v, d['weight']) for u, v, d in self.edges(data=True))
+            self.__networkx__ = graph
+        return(self.__networkx__)
+
 class Passing_Stats(object):
     """Description: This object is used to collect passing statistics by processing passing tree branches
     """
-    def __init__(self):
+    def __init__(self, keep_tree_lists=True):
+        # keep_tree_lists - False to only keep the root and tip counts instead of the lists of every root and tip and
+        #                   the passing sequences, which keeps the memory used by each game bounded when loading large
+        #                   batches of games
         self.total_passes = 0                         # Total number of passes completed
         self.possession_instances = 0                 # Number of times 3 consecutive passes reached
         self.max_consecutive_passes = 0                # Max number of passes in a passing sequence
         self.passing_sequence_histogram = {}           # Dictionary for histogram of how many instances each passing sequence length there are {1: x, 2: y, 3: z, ...}
         self.tree_roots = []                          # array of passing nodes that were the root of a passing sequence
         self.tree_tips = []                           # array of passing nodes that were the end of a passing sequence
+        self.keep_tree_lists = keep_tree_lists        # flag to add each root and tip to tree_roots and tree_tips
+        self.tree_root_counts = Counter()             # number of passing sequences started by each passing node
+        self.tree_tip_counts = Counter()              # number of passing sequences ended by each passing node
+        self.__sorted_roots__ = None                  # tree_root_counts sorted by count, None until passing_roots is called after a new branch
+        self.__sorted_tips__ = None                   # tree_tip_counts sorted by count, None until passing_tips is called after a new branch
         self.reset_possession_instances = True         # flag to reset the possession instances variable the first time process_tree_branch is called
+        # passing sequences (the nodes from the root to the tip of each branch) as node numbers in one flat array,
+        # sequence i is sequence_data[sequence_offsets[i]:sequence_offsets[i+1]] (only kept with keep_tree_lists)
+        self.sequence_nodes = []                      # nodes in node number order
+        self.sequence_node_numbers = {}               # dictionary (node: node number)
+        self.sequence_data = array("i")
+        self.sequence_offsets = array("q", [0])
         
     def process_tree_branch(self,graph,tree_branch):
         # graph is a directed graph to add the path in the tree branch to
@@ -172,11 +584,10 @@ class Passing_Stats(object):
                 tip = tree_branch[i]
                 break
             passes = passes+1
-            if graph.has_edge(tree_branch[i],tree_branch[i+1]):
-                x = graph[tree_branch[i]][tree_branch[i+1]]['weight']
-                graph[tree_branch[i]][tree_branch[i+1]]['weight'] = x+1
-            else:
-                graph.add_weighted_edges_from([(tree_branch[i],tree_branch[i+1],1)])
+        if isinstance(graph, (Passing_Graph, Dense_Passing_Graph)):
+            graph.add_passes(tree_branch[0:passes+1])
+        else:
+            Passing_Graph.add_passes(graph, tree_branch[0:passes+1])
 
         self.possession_instances = self.possession_instances + int(passes / 3)
         
@@ -186,22 +597,460 @@ class Passing_Stats(object):
         else:
             self.passing_sequence_histogram[passes] = 1
             
-        self.tree_roots.append(tree_branch[0])
-        self.tree_tips.append(tip)
+        self.tree_root_counts[tree_branch[0]] += 1
+        self.tree_tip_counts[tip] += 1
+        self.__sorted_roots__ = None
+        self.__sorted_tips__ = None
+        if self.keep_tree_lists:
+            self.tree_roots.append(tree_branch[0])
+            self.tree_tips.append(tip)
+            for node in tree_branch[0:passes+1]:
+                number = self.sequence_node_numbers.get(node)
+                if number == None:
+                    number = len(self.sequence_nodes)
+                    self.sequence_node_numbers[node] = number
+                    self.sequence_nodes.append(node)
+                self.sequence_data.append(number)
+            self.sequence_offsets.append(len(self.sequence_data))
         self.total_passes = self.total_passes + passes
         if passes > self.max_consecutive_passes:
             self.max_consecutive_passes = passes
 
-    def passing_roots(self):
-        tree_roots_freq = Counter(self.tree_roots)
-        c = tree_roots_freq.most_common()
-        return c
+    def passing_roots(self, n=None):
+        """Description: Returns the passing nodes that started passing sequences, most frequent first
+        Inputs: n - optional number of nodes to return (None = all of them)
+        Outputs:
+            Returns - list of (node, number of sequences started) tuples
+        """
+        if self.__sorted_roots__ == None:
+            self.__sorted_roots__ = self.tree_root_counts.most_common()
+        return self.__sorted_roots__[:n]
+
+    def passing_tips(self, n=None):
+        """Description: Returns the passing nodes that ended passing sequences, most frequent first
+        Inputs: n - optional number of nodes to return (None = all of them)
+        Outputs:
+            Returns - list of (node, number of sequences ended) tuples
+        """
+        if self.__sorted_tips__ == None:
+            self.__sorted_tips__ = self.tree_tip_counts.most_common()
+        return self.__sorted_tips__[:n]
 
-    def passing_tips(self):
-        tree_tips_freq = Counter(self.tree_tips)
-        c = tree_tips_freq.most_common()
-        return c
+    def passing_sequences(self):
+        """Description: Returns the passing sequences as arrays (see football_game_sequences for analysis of them)
+        Inputs: None
+        Outputs:
+            Returns - tuple (list of nodes, int32 array of node numbers, int64 array of sequence offsets), sequence i is
+                      nodes[numbers[offsets[i]:offsets[i+1]]] from the root to the tip
+        """
+        return((list(self.sequence_nodes), np.array(self.sequence_data, dtype=np.int32), np.array(self.sequence_offsets, dtype=np.int64)))
         
+def __build_data_file_fields__():
+    """Description: Builds the table of field types in the data file for the parser
+    Inputs: None
+    Outputs:
+        Returns - dictionary (field key: [parse function name, skip first line, only one line, target attributes, target key]) where
+                      parse function name - the Game_Data function that gets called to parse this entry (None = field is recognized but not stored)
+                      skip first line - if the first line that contained the key does not contain valid data to parse
+                      only one line - if the field only contains data on the first line and ignore any subsequent lines
+                      target attributes - names of the Game_Data attributes the parse function updates
+                      target key - the dictionary key or attribute name the parse function updates
+    """
+    fields = {"HOME TEAM": ["__parse_text__", False, True, (), "home_team"],
+              "AWAY TEAM": ["__parse_text__", False, True, (), "away_team"],
+              "GAME DATE": ["__parse_text__", False, True, (), "game_date"],
+              "H1 DURATION": ["__parse_duration__", False, True, (), "h1Duration"],
+              "H2 DURATION": ["__parse_duration__", False, True, (), "h2Duration"],
+              "OT1 DURATION": ["__parse_duration__", False, True, (), "ot1Duration"],
+              "OT2 DURATION": ["__parse_duration__", False, True, (), "ot2Duration"],
+              "HT PENALTY SHOOTOUT GOALS": ["__parse_pk_shootout__", False, True, (), "homeTeamPenalty_shootout_goals"],
+              "AT PENALTY SHOOTOUT GOALS": ["__parse_pk_shootout__", False, True, (), "awayTeamPenalty_shootout_goals"],
+              "H1 COMMENTS": ["__parse_comments__", True, False, ("homeTeamH1Comments", "awayTeamH1Comments"), None],
+              "H2 COMMENTS": ["__parse_comments__", True, False, ("homeTeamH2Comments", "awayTeamH2Comments"), None]
+             }
+
+    # per period statistics stored in a dictionary keyed by period
+    for team, team_index in (("HT", 0), ("AT", 1)):
+        for period in PERIODS:
+            for stat in PERIOD_STATS:
+                fields[team + " " + period + " " + stat] = ["__parse_stat__", False, True, (PERIOD_STATS[stat][team_index],), period]
+
+    # per half statistics stored in the Passing_Stats, Heat_Map_Stats and passing graph objects of each team
+    for team, team_prefix in (("HT", "homeTeam"), ("AT", "awayTeam")):
+        for period in PERIODS:
+            prefix = team + " " + period + " "
+            if period in HALVES:
+                passing_stats = team_prefix + period + "Passing_stats"
+                passing_graph = team_prefix + period + "Passing_graph"
+                heat_map_stats = team_prefix + period + "Heat_map_stats"
+                fields[prefix + "POSSESSION"] = ["__parse_possession__", False, True, (passing_stats,), None]
+                fields[prefix + "MAX PASSES"] = ["__parse_max_passes__", False, True, (passing_stats,), None]
+                fields[prefix + "FORMATION"] = ["__parse_formation__", False, False, (team_prefix + "_formation_name", team_prefix + period + "Formation", passing_graph), period]
+                fields[prefix + "PASSING GRAPH"] = ["__parse_passing_graph__", True, False, (passing_graph,), None]
+                fields[prefix + "PASSING TREE"] = ["__parse_passing_tree__", True, False, (passing_stats, passing_graph), None]
+                fields[prefix + "DEFENDING ZONE"] = ["__parse_team_defending_zone__", False, True, (heat_map_stats,), None]
+                fields[prefix + "HEAT MAP"] = ["__parse_heat_map__", True, False, (heat_map_stats,), None]
+            else:
+                # possession and max passes are recorded for extra time but there is nowhere to keep them
+                fields[prefix + "POSSESSION"] = [None, False, True, (), None]
+                fields[prefix + "MAX PASSES"] = [None, False, True, (), None]
+    return(fields)
+
+DATA_FILE_FIELDS = __build_data_file_fields__()
+
+def __build_lazy_groups__():
+    """Description: Builds the table of attribute groups a lazy Game_Data parses on first use
+    Inputs: None
+    Outputs:
+        Returns - dictionary (group: tuple of the Game_Data attributes in the group) where group is a (team prefix, half)
+                  tuple for the formation, passing and heat map objects of a team in a half or "comments"
+    """
+    groups = {}
+    for team_prefix in ("homeTeam", "awayTeam"):
+        for half in HALVES:
+            groups[(team_prefix, half)] = (team_prefix + half + "Formation", team_prefix + half + "Passing_graph",
+                                           team_prefix + half + "Passing_stats", team_prefix + half + "Heat_map_stats")
+    groups["comments"] = ("homeTeamH1Comments", "awayTeamH1Comments", "homeTeamH2Comments", "awayTeamH2Comments")
+    return(groups)
+
+LAZY_GROUPS = __build_lazy_groups__()
+LAZY_ATTRIBUTES = {attribute: group for group in LAZY_GROUPS for attribute in LAZY_GROUPS[group]}
+# group of the data file fields that update an attribute of a lazy group (fields that aren't listed are parsed when the file is indexed)
+LAZY_FIELDS = {key: LAZY_ATTRIBUTES[attribute] for key in DATA_FILE_FIELDS
+               for attribute in DATA_FILE_FIELDS[key][3] if attribute in LAZY_ATTRIBUTES}
+
+# default heat map column numbers, updated from the heat map header row
+HEAT_MAP_COLUMNS = {"PASSES COMPLETED": 2,
+                    "ASSISTS": 3,
+                    "3RD CONSECUTIVE PASS INSTANCES": 4,
+                    "SHOTS OFF TARGET": 5,
+                    "SHOTS ON TARGET": 6,
+                    "SHOTS SCORED": 7,
+                    "OWN GOALS SCORED": 8,
+                    "LOST POSSESSION": 9}
+
+def __csv_records__(file_obj):
+    """Description: Reads the rows of a CSV file opened in binary mode, with the byte offset of each row. A row with a
+    quoted cell that spans lines (e.g. a comment with a line break) is read as one row.
+    Inputs: file_obj - binary file object, read from its current position
+    Outputs:
+        Yields - tuple (byte offset of the row, bytes of the row)
+    """
+    offset = file_obj.tell()
+    record = b""
+    for line in file_obj:
+        record = record + line
+        # quotes inside a quoted cell are doubled, so an odd number of quotes means the cell continues on the next line
+        if record.count(b'"') % 2 == 0:
+            yield((offset, record))
+            offset = offset + len(record)
+            record = b""
+    if record:
+        yield((offset, record))
+
+def __has_multiline_cell__(data):
+    """Description: Checks if a CSV file has a quoted cell that spans lines
+    Inputs: data - bytes of the file
+    Outputs:
+        Returns - True if a line break is inside a quoted cell
+    """
+    # the quotes pair up (a doubled quote inside a quoted cell makes an empty pair), so a line break between the two
+    # quotes of a pair is inside a quoted cell
+    start = data.find(b'"')
+    while start >= 0:
+        end = data.find(b'"', start + 1)
+        if end < 0 or data.find(b"\n", start, end) >= 0 or data.find(b"\r", start, end) >= 0:
+            return(True)
+        start = data.find(b'"', end + 1)
+    return(False)
+
+def __decode_record__(record, encoding):
+    # decodes a row read by __csv_records__ with the newlines translated the way open() does for the eager parse
+    return(record.decode(encoding).replace("\r\n", "\n").replace("\r", "\n"))
+
+def __row_int__(row, col):
+    """Description: Converts one cell of a data file row to an integer
+    Inputs: row - list of cells in the row
+            col - column number of the cell
+    Outputs:
+        Returns - integer value of the cell, or 0 if the cell is empty, missing or not a number
+    """
+    try:
+        return(int(row[col]))
+    except (ValueError, IndexError):
+        return(0)
+
+def __heat_map_header_columns__(header):
+    """Description: Finds the column number of each heat map statistic from the heat map header row
+    Inputs: header - the heat map header row
+    Outputs:
+        Returns - tuple of column numbers (zone, passes, assists, possessions, shots off target, shots on target,
+                  shots scored, own goals, lost possession)
+    """
+    columns = dict(HEAT_MAP_COLUMNS)
+    i = 0
+    for heading in header:
+        if heading.upper() in columns:
+            columns[heading.upper()] = i
+        i = i + 1
+    return((1, columns["PASSES COMPLETED"], columns["ASSISTS"], columns["3RD CONSECUTIVE PASS INSTANCES"],
+            columns["SHOTS OFF TARGET"], columns["SHOTS ON TARGET"], columns["SHOTS SCORED"],
+            columns["OWN GOALS SCORED"], columns["LOST POSSESSION"]))
+
+# Events yielded by read_game_events. key is the DATA_FILE_FIELDS key of the field the event came from, team is
+# "HT" or "AT" and period is the period of the field ("H1", "H2", ...)
+Header_Field = namedtuple("Header_Field", ["key", "value"])                             # one line fields and formation names
+Formation_Node = namedtuple("Formation_Node", ["key", "team", "period", "node", "x", "y"])
+Passing_Edge = namedtuple("Passing_Edge", ["key", "team", "period", "from_node", "to_node", "weight"])
+Passing_Branch = namedtuple("Passing_Branch", ["key", "team", "period", "nodes"])       # nodes from the root to the tip
+Heat_Map_Zone = namedtuple("Heat_Map_Zone", ["key", "team", "period", "zone", "stats"]) # stats in HEAT_MAP_STATS order
+Comment = namedtuple("Comment", ["key", "team", "period", "text"])
+
+def __header_event__(field, row):
+    return(Header_Field(field[0], row[1]))
+
+def __header_int_event__(field, row):
+    return(Header_Field(field[0], __row_int__(row, 1)))
+
+def __defending_zone_event__(field, row):
+    return(Header_Field(field[0], int(row[1])))
+
+def __formation_event__(field, row):
+    if (row[0] != ""):                  # this is the first row
+        return(Header_Field(field[0], row[1]))
+    return(Formation_Node(field[0], field[1], field[2], row[2], float(row[3]), float(row[4])))
+
+def __passing_edge_event__(field, row):
+    return(Passing_Edge(field[0], field[1], field[2], row[1], row[2], float(row[3])))
+
+def __passing_branch_event__(field, row):
+    # the branch ends at the first empty node after the root (see Passing_Stats.process_tree_branch)
+    nodes = [row[1]]
+    for node in row[2:]:
+        if node == "":
+            break
+        nodes.append(node)
+    return(Passing_Branch(field[0], field[1], field[2], tuple(nodes)))
+
+def __heat_map_zone_event__(field, row):
+    zone_col, passes_col, assists_col, possessions_col, shots_off_target_col, shots_on_target_col, shots_scored_col, own_goals_col, lost_possession_col = field[3]
+    stats = (__row_int__(row, shots_off_target_col), __row_int__(row, shots_on_target_col), __row_int__(row, shots_scored_col),
+             __row_int__(row, own_goals_col), __row_int__(row, assists_col), __row_int__(row, passes_col),
+             __row_int__(row, possessions_col), __row_int__(row, lost_possession_col))
+    return(Heat_Map_Zone(field[0], field[1], field[2], int(row[zone_col]), stats))
+
+def __comment_event__(field, row):
+    if (row[1] == "HT" or row[1] == "AT"):
+        return(Comment(field[0], row[1], field[2], row[2]))
+    return(None)
+
+# event function and the types of event it returns for each DATA_FILE_FIELDS parse function
+EVENT_PARSERS = {"__parse_text__": (__header_event__, (Header_Field,)),
+                 "__parse_duration__": (__header_int_event__, (Header_Field,)),
+                 "__parse_stat__": (__header_int_event__, (Header_Field,)),
+                 "__parse_possession__": (__header_int_event__, (Header_Field,)),
+                 "__parse_max_passes__": (__header_int_event__, (Header_Field,)),
+                 "__parse_pk_shootout__": (__header_int_event__, (Header_Field,)),
+                 "__parse_team_defending_zone__": (__defending_zone_event__, (Header_Field,)),
+                 "__parse_formation__": (__formation_event__, (Header_Field, Formation_Node)),
+                 "__parse_passing_graph__": (__passing_edge_event__, (Passing_Edge,)),
+                 "__parse_passing_tree__": (__passing_branch_event__, (Passing_Branch,)),
+                 "__parse_heat_map__": (__heat_map_zone_event__, (Heat_Map_Zone,)),
+                 "__parse_comments__": (__comment_event__, (Comment,))}
+
+def read_game_events(file_name, event_types=None):
+    """Description: Streams through a game data file, yielding an event for each piece of data as it is read. Nothing
+    is kept between rows, so only the data the consumer keeps uses memory.
+    Inputs: file_name - the game data file to read
+            event_types - optional collection of event types (e.g. (Passing_Branch,)) to yield, fields that can't
+                          give one of the types are skipped without being parsed
+    Outputs:
+        Yields - Header_Field, Formation_Node, Passing_Edge, Passing_Branch, Heat_Map_Zone and Comment events, in file order
+    """
+    with open(file_name) as csv_file_obj:
+        reader_obj = csv.reader(csv_file_obj)
+        parse = None                        # event function for the rows after the first row of the current field
+        for row in reader_obj:
+            if not row:
+                continue
+            if row[0] in DATA_FILE_FIELDS:
+                # start of new field to parse
+                parser_name, skip_first, only_one, target_attributes, target_key = DATA_FILE_FIELDS[row[0]]
+                parse = None
+                if parser_name != None:
+                    parse, types = EVENT_PARSERS[parser_name]
+                    if event_types != None and not any(event_type in event_types for event_type in types):
+                        parse = None
+                if parse != None:
+                    words = row[0].split(" ")
+                    if words[0] in ("HT", "AT"):
+                        field = (row[0], words[0], words[1])
+                    else:
+                        field = (row[0], None, words[0])
+                    if parser_name == "__parse_heat_map__":
+                        field = field + (__heat_map_header_columns__(row),)
+                    if skip_first == False:
+                        event = parse(field, row)
+                        if event != None and (event_types == None or type(event) in event_types):
+                            yield event
+                if only_one == True:
+                    parse = None
+            elif row[0] != "":
+                parse = None
+            elif parse != None:
+                event = parse(field, row)
+                if event != None and (event_types == None or type(event) in event_types):
+                    yield event
+
+#TODO: these currently can't be changed without messing up the plot because not all parameters are calculated off of them
+PITCH_LENGTH = 150
+PITCH_WIDTH = 90
+
+def __zone_map__():
+    """Description: Calculates the center point of each zone of the pitch
+    Inputs: None
+    Outputs:
+        Returns - list of x,y coordinates by zone ([zone][x,y]) for the center point of each zone
+    """
+    #create zone map points
+    zone_map = []
+    zoneX = PITCH_WIDTH / 3 / 2
+    zoneY = PITCH_LENGTH / 6 / 2
+    zone_width = PITCH_WIDTH / 3
+    zone_length = PITCH_LENGTH / 6
+    zone_zero = [zone_width*zone_length, zone_width, zone_length]
+    zone_map.append(zone_zero)                                                # No Zone 0, but this element contains the following list: 
+                                                                            #   [0] = the maximum bubble size (area) that can be plotted in any of the zones, 
+                                                                            #   [1] = the zone width
+                                                                            #   [2] = the zone length
+    zone_map.append([zoneX, zoneY])                                          # Zone 1 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 2 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 3 [x,y]
+    zoneY = zoneY + PITCH_LENGTH/6
+    zone_map.append([zoneX, zoneY])                                          # Zone 4 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 5 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 6 [x,y]
+    zoneY = zoneY + PITCH_LENGTH/6
+    zone_map.append([zoneX, zoneY])                                          # Zone 7 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 8 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 9 [x,y]
+    zoneY = zoneY + PITCH_LENGTH/6
+    zone_map.append([zoneX, zoneY])                                          # Zone 10 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 11 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 12 [x,y]
+    zoneY = zoneY + PITCH_LENGTH/6
+    zone_map.append([zoneX, zoneY])                                          # Zone 13 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 14 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 15 [x,y]
+    zoneY = zoneY + PITCH_LENGTH/6
+    zone_map.append([zoneX, zoneY])                                          # Zone 16 [x,y]
+    zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 17 [x,y]
+    zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 18 [x,y]
+    return(zone_map)
+
+# the pitch never changes, so the zone centers are only calculated once
+ZONE_MAP = __zone_map__()
+
+def __draw_pitch_lines__(ax):
+    """Description: Draws the lines of a field split into zones
+    Inputs: ax - matplotlib Axes to draw the pitch on
+    Outputs:
+        plots the pitch with zones labeled
+    """
+    #Pitch Outline & Centre Line
+    ax.plot([0,0],[0,PITCH_LENGTH], color="black")
+    ax.plot([0,PITCH_WIDTH],[PITCH_LENGTH,PITCH_LENGTH], color="black")
+    ax.plot([PITCH_WIDTH,PITCH_WIDTH],[PITCH_LENGTH,0], color="black")
+    ax.plot([PITCH_WIDTH,0],[0,0], color="black")
+    ax.plot([0,PITCH_WIDTH],[PITCH_LENGTH/2,PITCH_LENGTH/2], color="black")
+
+    #Left Penalty Area
+    ax.plot([65,25],[21,21],color="black")
+    ax.plot([65,65],[0,21],color="black")
+    ax.plot([25,25],[21,0],color="black")
+
+    #Right Penalty Area
+    ax.plot([65,65],[PITCH_LENGTH,129],color="black")
+    ax.plot([65,25],[129,129],color="black")
+    ax.plot([25,25],[129,PITCH_LENGTH],color="black")
+
+    #Prepare Circles
+    centre_circle = plt.Circle((PITCH_WIDTH/2,PITCH_LENGTH/2),9.15,color="black",fill=False)
+
+    #Draw Circles
+    ax.add_patch(centre_circle)
+
+    #Prepare Arcs
+    left_arc = Arc((45,17),height=18.3,width=18.3,angle=0,theta1=28,theta2=152,color="black")
+    right_arc = Arc((45,133),height=18.3,width=18.3,angle=0,theta1=208,theta2=332,color="black")
+
+    #Draw Arcs
+    ax.add_patch(left_arc)
+    ax.add_patch(right_arc)
+
+    # Draw zones
+    ax.plot([PITCH_WIDTH/3,PITCH_WIDTH/3],[0,PITCH_LENGTH],color="red")
+    ax.plot([2*PITCH_WIDTH/3,2*PITCH_WIDTH/3],[0,PITCH_LENGTH],color="red")
+    ax.plot([0,PITCH_WIDTH],[PITCH_LENGTH/6,PITCH_LENGTH/6],color="red")
+    ax.plot([0,PITCH_WIDTH],[2*PITCH_LENGTH/6,2*PITCH_LENGTH/6],color="red")
+    ax.plot([0,PITCH_WIDTH],[3*PITCH_LENGTH/6,3*PITCH_LENGTH/6],color="red")
+    ax.plot([0,PITCH_WIDTH],[4*PITCH_LENGTH/6,4*PITCH_LENGTH/6],color="red")
+    ax.plot([0,PITCH_WIDTH],[5*PITCH_LENGTH/6,5*PITCH_LENGTH/6],color="red")
+
+    #Tidy Axes
+    ax.axis('off')
+
+class Pitch_Figure(object):
+    """Description: This class keeps a figure with the pitch drawn on it so that heat maps written to image files
+    only have to draw their own data. After each heat map is written, reset() takes the figure back to the bare pitch.
+    The figure is not managed by pyplot, so it never shows up in plt.show(). A Pitch_Figure must not be shared
+    between threads.
+    """
+    def __init__(self, figsize):
+        self.figure = Figure(figsize=figsize)
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot(1,1,1)
+        __draw_pitch_lines__(self.axes)
+        self.__pitch_artists__ = set(self.axes.get_children())
+        self.__data_limits__ = self.axes.dataLim.frozen()
+        self.__subplot_params__ = {name: getattr(self.figure.subplotpars, name) for name in ("left", "right", "bottom", "top", "wspace", "hspace")}
+
+    def reset(self):
+        """Description: Removes everything drawn on the figure since it was created, leaving only the pitch
+        Inputs: None
+        Outputs:
+            Returns the figure to the state it had after the pitch was drawn
+        """
+        for artist in self.axes.get_children():
+            if artist not in self.__pitch_artists__:
+                artist.remove()
+        self.axes.set_title("", pad=rcParams["axes.titlepad"])
+        self.axes.dataLim.set(self.__data_limits__)
+        self.axes.set_autoscale_on(True)
+        self.axes.autoscale_view()
+        self.figure.subplots_adjust(**self.__subplot_params__)
+
+# pitch figures made so far, kept per thread since a Pitch_Figure must not be shared between threads
+# (__pitch_figures__.figures is a dictionary (figure size: Pitch_Figure object) of the current thread)
+__pitch_figures__ = threading.local()
+
+def pitch_figure(figsize=None):
+    """Description: Returns the current thread's cached Pitch_Figure of a figure size, creating it the first time the
+    size is used in the thread
+    Inputs: figsize - (width, height) of the figure in inches (default 7 x 8)
+    Outputs:
+        Returns - Pitch_Figure object
+    """
+    if figsize == None:
+        figsize = (7,8)
+    figsize = tuple(figsize)
+    figures = getattr(__pitch_figures__, "figures", None)
+    if figures == None:
+        figures = __pitch_figures__.figures = {}
+    if figsize not in figures:
+        figures[figsize] = Pitch_Figure(figsize)
+    return(figures[figsize])
+
 class Game_Data(object):  
     h1Duration = 45
     h2Duration = 45
@@ -210,7 +1059,14 @@ class Game_Data(object):
     homeTeamPenalty_shootout_goals = "NA"
     awayTeamPenalty_shootout_goals = "NA"
     
-    def __init__(self,file_name):
+    def __init__(self,file_name=None,keep_tree_lists=True,dense_graphs=False,lazy=False):
+        # file_name - game data file to parse (None = create an empty game to fill in)
+        # keep_tree_lists - False to not keep the list of every passing tree root and tip (see Passing_Stats)
+        # dense_graphs - True to keep the passing graphs as Dense_Passing_Graph objects instead of networkx based Passing_Graph objects
+        # lazy - True to only parse the one line fields (team names, durations and period stats) now and each group of
+        #        LAZY_GROUPS attributes (formations, passing and heat map objects of a team in a half, comments) the
+        #        first time one of its attributes is used. The data file must not change until every group is parsed.
+        self.file_name = file_name
         self.home_team = ""
         self.away_team = ""
         self.game_date = ""
@@ -230,465 +1086,216 @@ class Game_Data(object):
         self.awayTeam_red_cards = {"H1":0, "H2":0, "OT1":0, "OT2":0}
         self.homeTeam_formation_name = {"H1":"", "H2":"", "OT1":"", "OT2":""}
         self.awayTeam_formation_name = {"H1":"", "H2":"", "OT1":"", "OT2":""}
-        self.homeTeamH1Formation = {}
-        self.awayTeamH1Formation = {}
-        self.homeTeamH2Formation = {}
-        self.awayTeamH2Formation = {}
-        self.homeTeamH1Passing_graph = nx.DiGraph()
-        self.homeTeamH2Passing_graph = nx.DiGraph()
-        self.awayTeamH1Passing_graph = nx.DiGraph()
-        self.awayTeamH2Passing_graph = nx.DiGraph()
-        self.homeTeamH1Passing_stats = Passing_Stats()
-        self.homeTeamH2Passing_stats = Passing_Stats()
-        self.awayTeamH1Passing_stats = Passing_Stats()
-        self.awayTeamH2Passing_stats = Passing_Stats()
-        self.homeTeamH1Heat_map_stats = Heat_Map_Stats()
-        self.homeTeamH2Heat_map_stats = Heat_Map_Stats()
-        self.awayTeamH1Heat_map_stats = Heat_Map_Stats()
-        self.awayTeamH2Heat_map_stats = Heat_Map_Stats()
-        self.homeTeamH1Comments = []
-        self.awayTeamH1Comments = []
-        self.homeTeamH2Comments = []
-        self.awayTeamH2Comments = []
-
-        # Dictionary for field types in data file for parser
-        # each dictionary key has a list with the following values:
-        #       parse function - the function that gets called to parse this entry
-        #       skip first line - if the first line that contained the key does not contain valid data to parse
-        #       only one line - if the field only contains data on the first line and ignore any subsequent lines
-        self.__dataFileFields__ = {"HOME TEAM": [self.__parse_home_team__, False, True],
-                                   "AWAY TEAM": [self.__parse_away_team__, False, True],
-                                   "GAME DATE": [self.__parse_game_date__, False, True],
-                                   "H1 DURATION": [self.__parse_duration__, False, True],
-                                   "H2 DURATION": [self.__parse_duration__, False, True],
-                                   "OT1 DURATION": [self.__parse_duration__, False, True],
-                                   "OT2 DURATION": [self.__parse_duration__, False, True],
-                                   "HT H1 GOALS": [self.__parse_goals__, False, True],
-                                   "AT H1 GOALS": [self.__parse_goals__, False, True],
-                                   "HT H2 GOALS": [self.__parse_goals__, False, True],
-                                   "AT H2 GOALS": [self.__parse_goals__, False, True],
-                                   "HT OT1 GOALS": [self.__parse_goals__, False, True],
-                                   "AT OT1 GOALS": [self.__parse_goals__, False, True],
-                                   "HT OT2 GOALS": [self.__parse_goals__, False, True],
-                                   "AT OT2 GOALS": [self.__parse_goals__, False, True],
-                                   "HT H1 ASSISTS": [self.__parse_assists__, False, True],
-                                   "AT H1 ASSISTS": [self.__parse_assists__, False, True],
-                                   "HT H2 ASSISTS": [self.__parse_assists__, False, True],
-                                   "AT H2 ASSISTS": [self.__parse_assists__, False, True],
-                                   "HT OT1 ASSISTS": [self.__parse_assists__, False, True],
-                                   "AT OT1 ASSISTS": [self.__parse_assists__, False, True],
-                                   "HT OT2 ASSISTS": [self.__parse_assists__, False, True],
-                                   "AT OT2 ASSISTS": [self.__parse_assists__, False, True],
-                                   "HT H1 SHOTS": [self.__parse_shots__, False, True],
-                                   "AT H1 SHOTS": [self.__parse_shots__, False, True],
-                                   "HT H2 SHOTS": [self.__parse_shots__, False, True],
-                                   "AT H2 SHOTS": [self.__parse_shots__, False, True],
-                                   "HT OT1 SHOTS": [self.__parse_shots__, False, True],
-                                   "AT OT1 SHOTS": [self.__parse_shots__, False, True],
-                                   "HT OT2 SHOTS": [self.__parse_shots__, False, True],
-                                   "AT OT2 SHOTS": [self.__parse_shots__, False, True],
-                                   "HT H1 SAVES": [self.__parse_saves__, False, True],
-                                   "AT H1 SAVES": [self.__parse_saves__, False, True],
-                                   "HT H2 SAVES": [self.__parse_saves__, False, True],
-                                   "AT H2 SAVES": [self.__parse_saves__, False, True],
-                                   "HT OT1 SAVES": [self.__parse_saves__, False, True],
-                                   "AT OT1 SAVES": [self.__parse_saves__, False, True],
-                                   "HT OT2 SAVES": [self.__parse_saves__, False, True],
-                                   "AT OT2 SAVES": [self.__parse_saves__, False, True],
-                                   "HT H1 CORNERS": [self.__parse_corners__, False, True],
-                                   "AT H1 CORNERS": [self.__parse_corners__, False, True],
-                                   "HT H2 CORNERS": [self.__parse_corners__, False, True],
-                                   "AT H2 CORNERS": [self.__parse_corners__, False, True],
-                                   "HT OT1 CORNERS": [self.__parse_corners__, False, True],
-                                   "AT OT1 CORNERS": [self.__parse_corners__, False, True],
-                                   "HT OT2 CORNERS": [self.__parse_corners__, False, True],
-                                   "AT OT2 CORNERS": [self.__parse_corners__, False, True],
-                                   "HT H1 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "AT H1 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "HT H2 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "AT H2 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "HT OT1 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "AT OT1 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "HT OT2 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "AT OT2 YELLOW CARDS": [self.__parse_yellow_cards__, False, True],
-                                   "HT H1 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "AT H1 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "HT H2 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "AT H2 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "HT OT1 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "AT OT1 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "HT OT2 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "AT OT2 RED CARDS": [self.__parse_red_cards__, False, True],
-                                   "HT H1 POSSESSION": [self.__parse_possession__, False, True],
-                                   "AT H1 POSSESSION": [self.__parse_possession__, False, True],
-                                   "HT H2 POSSESSION": [self.__parse_possession__, False, True],
-                                   "AT H2 POSSESSION": [self.__parse_possession__, False, True],
-                                   "HT OT1 POSSESSION": [self.__parse_possession__, False, True],
-                                   "AT OT1 POSSESSION": [self.__parse_possession__, False, True],
-                                   "HT OT2 POSSESSION": [self.__parse_possession__, False, True],
-                                   "AT OT2 POSSESSION": [self.__parse_possession__, False, True],
-                                   "HT H1 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "AT H1 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "HT H2 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "AT H2 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "HT OT1 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "AT OT1 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "HT OT2 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "AT OT2 MAX PASSES": [self.__parse_max_passes__, False, True],
-                                   "HT H1 FORMATION": [self.__parse_formation__, False, False],
-                                   "HT H2 FORMATION": [self.__parse_formation__, False, False],
-                                   "AT H1 FORMATION": [self.__parse_formation__, False, False],
-                                   "AT H2 FORMATION": [self.__parse_formation__, False, False],
-                                   "HT H1 PASSING GRAPH": [self.__parse_passing_graph__, True, False],
-                                   "AT H1 PASSING GRAPH": [self.__parse_passing_graph__, True, False],
-                                   "HT H2 PASSING GRAPH": [self.__parse_passing_graph__, True, False],
-                                   "AT H2 PASSING GRAPH": [self.__parse_passing_graph__, True, False],
-                                   "HT H1 PASSING TREE": [self.__parse_passing_tree__, True, False],
-                                   "HT H2 PASSING TREE": [self.__parse_passing_tree__, True, False],
-                                   "AT H1 PASSING TREE": [self.__parse_passing_tree__, True, False],
-                                   "AT H2 PASSING TREE": [self.__parse_passing_tree__, True, False],
-                                   "HT H1 DEFENDING ZONE": [self.__parse_team_defending_zone__, False, True],
-                                   "HT H2 DEFENDING ZONE": [self.__parse_team_defending_zone__, False, True],
-                                   "AT H1 DEFENDING ZONE": [self.__parse_team_defending_zone__, False, True],
-                                   "AT H2 DEFENDING ZONE": [self.__parse_team_defending_zone__, False, True],                                   
-                                   "HT H1 HEAT MAP": [self.__parse_heat_map__, True, False],
-                                   "HT H2 HEAT MAP": [self.__parse_heat_map__, True, False],
-                                   "AT H1 HEAT MAP": [self.__parse_heat_map__, True, False],
-                                   "AT H2 HEAT MAP": [self.__parse_heat_map__, True, False],                                   
-                                   "HT PENALTY SHOOTOUT GOALS": [self.__parse_pk_shootout__, False, True],
-                                   "AT PENALTY SHOOTOUT GOALS": [self.__parse_pk_shootout__, False, True],
-                                   "H1 COMMENTS": [self.__parse_comments__, True, False],
-                                   "H2 COMMENTS": [self.__parse_comments__, True, False]
-                                  }
-
-        self.__read_file__(file_name)
+        self.__group_options__ = (keep_tree_lists, dense_graphs)
+        self.__lazy_groups__ = set()        # groups in LAZY_GROUPS that have not been parsed yet
+        self.__lazy_sections__ = {}         # dictionary (group: list of byte offsets of the group's fields in the file)
+        if lazy and file_name != None:
+            self.__lazy_groups__ = set(LAZY_GROUPS)
+        else:
+            for group in LAZY_GROUPS:
+                self.__init_group__(group)
 
-    # Data file parsing functions
-    def __parse_home_team__(self, _, row):
-        self.home_team = row[1]
-    
-    def __parse_away_team__(self, _, row):
-        self.away_team = row[1]
-    
-    def __parse_game_date__(self, _, row):
-        self.game_date = row[1]
-        
-    def __parse_duration__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[0]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if (period == 'H1'):
-            self.h1Duration = value
-        elif (period == 'H2'):
-            self.h2Duration = value
-        elif (period == 'OT1'):
-            self.ot1Duration = value
-        elif (period == 'OT2'):
-            self.ot2Duration = value
-    
-    def __parse_goals__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.home_team_goals[period] = value
-        elif parse_string[0] == "AT":
-            self.away_team_goals[period] = value
-
-    def __parse_assists__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.home_team_assists[period] = value
-        elif parse_string[0] == "AT":
-            self.away_team_assists[period] = value
-
-    def __parse_shots__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.home_team_shots[period] = value
-        elif parse_string[0] == "AT":
-            self.away_team_shots[period] = value
-
-    def __parse_saves__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.home_team_saves[period] = value
-        elif parse_string[0] == "AT":
-            self.away_team_saves[period] = value
-
-    def __parse_corners__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.home_team_corners[period] = value
-        elif parse_string[0] == "AT":
-            self.away_team_corners[period] = value
-
-    def __parse_yellow_cards__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.homeTeam_yellow_cards[period] = value
-        elif parse_string[0] == "AT":
-            self.awayTeam_yellow_cards[period] = value
-
-    def __parse_red_cards__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.homeTeam_red_cards[period] = value
-        elif parse_string[0] == "AT":
-            self.awayTeam_red_cards[period] = value
-
-    def __parse_possession__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Passing_stats.possession_instances = value
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Passing_stats.possession_instances = value
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Passing_stats.possession_instances = value
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Passing_stats.possession_instances = value
-
-    def __parse_max_passes__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
+        if file_name != None:
+            if lazy:
+                self.__index_file__(file_name)
+            else:
+                self.__read_file__(file_name)
+
+    def __init_group__(self, group):
+        # creates the empty objects of one of the LAZY_GROUPS attribute groups
+        keep_tree_lists, dense_graphs = self.__group_options__
+        if group == "comments":
+            for attribute in LAZY_GROUPS[group]:
+                setattr(self, attribute, [])
+        else:
+            formation, passing_graph, passing_stats, heat_map_stats = LAZY_GROUPS[group]
+            setattr(self, formation, {})
+            setattr(self, passing_graph, Dense_Passing_Graph() if dense_graphs else Passing_Graph())
+            setattr(self, passing_stats, Passing_Stats(keep_tree_lists))
+            setattr(self, heat_map_stats, Heat_Map_Stats())
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set, which includes the groups of a lazy game that have not been parsed yet
+        group = LAZY_ATTRIBUTES.get(name)
+        if group != None and group in self.__dict__.get("__lazy_groups__", ()):
+            self.__materialize__(group)
+            return(self.__dict__[name])
+        raise AttributeError("'Game_Data' object has no attribute '" + name + "'")
+
+    def __index_file__(self, file_name):
+        """Description: Reads a game data file for a lazy game, parsing the one line fields and recording where the
+        fields of each LAZY_GROUPS group start, so the group can be parsed when it is first used
+        Inputs: file_name - the game data file
+        Outputs:
+            Fills self.__lazy_sections__ and the attributes of the one line fields
+        """
+        encoding = locale.getpreferredencoding(False)
+        with open(file_name, "rb") as file_obj:
+            stat = os.fstat(file_obj.fileno())
+            self.__file_stat__ = (stat.st_size, stat.st_mtime_ns)
+            data = file_obj.read()
+        if __has_multiline_cell__(data):
+            lines = (record for offset, record in __csv_records__(io.BytesIO(data)))
+        else:
+            lines = io.BytesIO(data)
+        offset = 0
+        for line in lines:
+            # only the first row of a field starts with a key, every other row starts with an empty cell
+            if line[:1] not in (b",", b"\r", b"\n"):
+                row = next(csv.reader([__decode_record__(line, encoding)]), None)
+                if row and row[0] in DATA_FILE_FIELDS:
+                    group = LAZY_FIELDS.get(row[0])
+                    if group != None:
+                        self.__lazy_sections__.setdefault(group, []).append(offset)
+                        parser_name, skip_first, only_one, target_attributes, target_key = DATA_FILE_FIELDS[row[0]]
+                        if parser_name == "__parse_formation__":
+                            # the formation names are not part of a group, so they are kept when indexing
+                            getattr(self, target_attributes[0])[target_key] = row[1]
+                    else:
+                        parse, skip_first, only_one, target = self.__resolve_field__(row)
+                        if (parse != None and skip_first == False):
+                            parse(target, row)
+            offset = offset + len(line)
+
+    def __materialize__(self, group):
+        """Description: Parses the fields of one LAZY_GROUPS group of a lazy game
+        Inputs: group - the group to parse
+        Outputs:
+            Creates the attributes of the group
+        """
+        self.__init_group__(group)
+        offsets = self.__lazy_sections__.get(group, [])
         try:
-            value = int(row[1])
-        except:
-            value = 0
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Passing_stats.max_consecutive_passes = value
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Passing_stats.max_consecutive_passes = value
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Passing_stats.max_consecutive_passes = value
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Passing_stats.max_consecutive_passes = value
-            
-    def __parse_formation__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        if (key_val[0] == row[0]):              # this is the first row
-            if parse_string[0] == "HT":
-                self.homeTeam_formation_name[period] = row[1]
-            elif parse_string[0] == "AT":
-                self.awayTeam_formation_name[period] = row[1]
+            if offsets:
+                self.__read_sections__(offsets)
+        except Exception:
+            # leave the group unparsed, so the next access reads the file again instead of finding empty objects
+            for attribute in LAZY_GROUPS[group]:
+                self.__dict__.pop(attribute, None)
+            raise
+        self.__lazy_groups__.discard(group)
+        self.__lazy_sections__.pop(group, None)
+
+    def __read_sections__(self, offsets):
+        """Description: Parses the fields of a lazy game that start at the given byte offsets of the data file
+        Inputs: offsets - byte offsets of the first row of each field
+        Outputs:
+            Updates the attributes of the fields
+        """
+        encoding = locale.getpreferredencoding(False)
+        with open(self.file_name, "rb") as file_obj:
+            stat = os.fstat(file_obj.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != self.__file_stat__:
+                raise ValueError(self.file_name + " has changed since the lazy game was loaded")
+            for offset in offsets:
+                # the field runs from its first row up to the next row that doesn't start with an empty cell
+                file_obj.seek(offset)
+                records = __csv_records__(file_obj)
+                rows = [next(records)[1]]
+                for record_offset, record in records:
+                    if record[:1] not in (b",", b"\r", b"\n"):
+                        break
+                    rows.append(record)
+                self.__parse_rows__(csv.reader(__decode_record__(record, encoding) for record in rows))
+
+    def materialize(self):
+        """Description: Parses every group of a lazy game that has not been parsed yet (e.g. before the data file changes)
+        Inputs: None
+        Outputs:
+            Creates the attributes of every group
+        """
+        for group in list(self.__lazy_groups__):
+            self.__materialize__(group)
+
+    # Data file parsing functions
+    # each parse function is called with the target resolved by __resolve_field__ (the objects named by the
+    # target attributes in DATA_FILE_FIELDS followed by the target key) and the row to parse
+    def __resolve_field__(self, header):
+        """Description: Looks up how to parse a field once when its header row is found
+        Inputs: header - the row that starts the field (header[0] is the field key)
+        Outputs:
+            Returns - tuple (parse function, skip first line, only one line, target)
+        """
+        parser_name, skip_first, only_one, target_attributes, target_key = DATA_FILE_FIELDS[header[0]]
+        if parser_name == None:
+            return((None, skip_first, only_one, None))
+        target = tuple(getattr(self, attribute) for attribute in target_attributes) + (target_key,)
+        if parser_name == "__parse_heat_map__":
+            target = target + (self.__heat_map_columns__(header),)
+        return((getattr(self, parser_name), skip_first, only_one, target))
+
+    def __heat_map_columns__(self, header):
+        return(__heat_map_header_columns__(header))
+
+    def __parse_text__(self, target, row):
+        setattr(self, target[0], row[1])
+
+    def __parse_duration__(self, target, row):
+        setattr(self, target[0], __row_int__(row, 1))
+
+    def __parse_stat__(self, target, row):
+        target[0][target[1]] = __row_int__(row, 1)
+
+    def __parse_possession__(self, target, row):
+        target[0].possession_instances = __row_int__(row, 1)
+
+    def __parse_max_passes__(self, target, row):
+        target[0].max_consecutive_passes = __row_int__(row, 1)
+
+    def __parse_formation__(self, target, row):
+        formation_name, formation, passing_graph, period = target
+        if (row[0] != ""):                  # this is the first row
+            formation_name[period] = row[1]
         else:                               # this is a row after the first row so add the nodes
-            if (parse_string[0] == "HT" and period == "H1"):
-                self.homeTeamH1Formation[row[2]] = np.array([float(row[3]),float(row[4])])
-                self.homeTeamH1Passing_graph.add_nodes_from([row[2]])
-            elif (parse_string[0] == "AT" and period == "H1"):
-                self.awayTeamH1Formation[row[2]] = np.array([float(row[3]),float(row[4])])
-                self.awayTeamH1Passing_graph.add_nodes_from([row[2]])
-            elif (parse_string[0] == "HT" and period == "H2"):
-                self.homeTeamH2Formation[row[2]] = np.array([float(row[3]),float(row[4])])
-                self.homeTeamH2Passing_graph.add_nodes_from([row[2]])
-            elif (parse_string[0] == "AT" and period == "H2"):
-                self.awayTeamH2Formation[row[2]] = np.array([float(row[3]),float(row[4])])
-                self.awayTeamH2Passing_graph.add_nodes_from([row[2]])
-
-    def __parse_passing_graph__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Passing_graph.add_weighted_edges_from([(row[1],row[2],float(row[3]))])
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Passing_graph.add_weighted_edges_from([(row[1],row[2],float(row[3]))])
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Passing_graph.add_weighted_edges_from([(row[1],row[2],float(row[3]))])
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Passing_graph.add_weighted_edges_from([(row[1],row[2],float(row[3]))])
-
-    def __parse_passing_tree__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Passing_stats.process_tree_branch(self.homeTeamH1Passing_graph, row[1:len(row)])
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Passing_stats.process_tree_branch(self.awayTeamH1Passing_graph, row[1:len(row)])
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Passing_stats.process_tree_branch(self.homeTeamH2Passing_graph, row[1:len(row)])
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Passing_stats.process_tree_branch(self.awayTeamH2Passing_graph, row[1:len(row)])
-    
-    def __parse_team_defending_zone__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Heat_map_stats.set_team_defending_zone(int(row[1]))
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Heat_map_stats.set_team_defending_zone(int(row[1]))
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Heat_map_stats.set_team_defending_zone(int(row[1]))
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Heat_map_stats.set_team_defending_zone(int(row[1]))
-
-    def __parse_heat_map__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[1]
-        
-        # set default column numbers
-        zone_col = 1
-        passes_col = 2
-        assists_col = 3
-        possessions_col = 4
-        shots_off_target_col = 5
-        shots_on_target_col = 6
-        shots_scored_col = 7
-        own_goals_col = 8
-        lost_possession_col = 9
-        
-        # update column numbers based on header row
-        i = 0
-        for heading in key_val:
-            if heading.upper() == "PASSES COMPLETED":
-                passes_col = i
-            elif heading.upper() == "ASSISTS":
-                assists_col = i
-            elif heading.upper() == "3RD CONSECUTIVE PASS INSTANCES":
-                possessions_col = i
-            elif heading.upper() == "SHOTS OFF TARGET":
-                shots_off_target_col = i
-            elif heading.upper() == "SHOTS ON TARGET":
-                shots_on_target_col = i
-            elif heading.upper() == "SHOTS SCORED":
-                shots_scored_col = i
-            elif heading.upper() == "OWN GOALS SCORED":
-                own_goals_col = i
-            elif heading.upper() == "LOST POSSESSION":
-                lost_possession_col = i
-            i = i + 1
-        try:
-            passes = int(row[passes_col])
-        except:
-            passes = 0
-        try:
-            assists = int(row[assists_col])
-        except:
-            assists = 0
-        try:
-            possessions = int(row[possessions_col])
-        except:
-            possessions = 0
-        try:
-            shots_off_target = int(row[shots_off_target_col])
-        except:
-            shots_off_target = 0
-        try:
-            shots_on_target = int(row[shots_on_target_col])
-        except:
-            shots_on_target = 0
-        try:
-            shots_scored = int(row[shots_scored_col])
-        except:
-            shots_scored = 0
-        try:
-            own_goals = int(row[own_goals_col])
-        except:
-            own_goals = 0
-        try:
-            lost_possession = int(row[lost_possession_col])
-        except:
-            lost_possession = 0
-            
-        if (parse_string[0] == "HT" and period == "H1"):
-            self.homeTeamH1Heat_map_stats.add_zone(int(row[zone_col]), shots_off_target, shots_on_target, shots_scored, own_goals, assists, passes, possessions, lost_possession)
-        elif (parse_string[0] == "AT" and period == "H1"):
-            self.awayTeamH1Heat_map_stats.add_zone(int(row[zone_col]), shots_off_target, shots_on_target, shots_scored, own_goals, assists, passes, possessions, lost_possession)
-        elif (parse_string[0] == "HT" and period == "H2"):
-            self.homeTeamH2Heat_map_stats.add_zone(int(row[zone_col]), shots_off_target, shots_on_target, shots_scored, own_goals, assists, passes, possessions, lost_possession)
-        elif (parse_string[0] == "AT" and period == "H2"):
-            self.awayTeamH2Heat_map_stats.add_zone(int(row[zone_col]), shots_off_target, shots_on_target, shots_scored, own_goals, assists, passes, possessions, lost_possession)
-
-    def __parse_pk_shootout__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        try:
-            value = int(row[1])
-        except:
-            value = 0
-        if parse_string[0] == "HT":
-            self.homeTeamPenalty_shootout_goals = value
-        elif parse_string[0] == "AT":
-            self.awayTeamPenalty_shootout_goals = value
-        
-    def __parse_comments__(self, key_val, row):
-        parse_string = key_val[0].split(' ')
-        period = parse_string[0]
-        if period == "H1":
-            if (row[1] == "HT"):
-                self.homeTeamH1Comments.append(row[2])
-            elif (row[1] == "AT"):
-                self.awayTeamH1Comments.append(row[2])
-        elif period == "H2":
-            if (row[1] == "HT"):
-                self.homeTeamH2Comments.append(row[2])
-            elif (row[1] == "AT"):
-                self.awayTeamH2Comments.append(row[2])
-    
+            formation[row[2]] = np.array([float(row[3]),float(row[4])])
+            passing_graph.add_nodes_from([row[2]])
+
+    def __parse_passing_graph__(self, target, row):
+        target[0].add_weighted_edges_from([(row[1],row[2],float(row[3]))])
+
+    def __parse_passing_tree__(self, target, row):
+        target[0].process_tree_branch(target[1], row[1:])
+
+    def __parse_team_defending_zone__(self, target, row):
+        target[0].set_team_defending_zone(int(row[1]))
+
+    def __parse_heat_map__(self, target, row):
+        heat_map_stats, _, columns = target
+        zone_col, passes_col, assists_col, possessions_col, shots_off_target_col, shots_on_target_col, shots_scored_col, own_goals_col, lost_possession_col = columns
+        heat_map_stats.add_zone(int(row[zone_col]), __row_int__(row, shots_off_target_col), __row_int__(row, shots_on_target_col),
+                                __row_int__(row, shots_scored_col), __row_int__(row, own_goals_col), __row_int__(row, assists_col),
+                                __row_int__(row, passes_col), __row_int__(row, possessions_col), __row_int__(row, lost_possession_col))
+
+    def __parse_pk_shootout__(self, target, row):
+        setattr(self, target[0], __row_int__(row, 1))
+
+    def __parse_comments__(self, target, row):
+        if (row[1] == "HT"):
+            target[0].append(row[2])
+        elif (row[1] == "AT"):
+            target[1].append(row[2])
+
     def __read_file__(self,file_name):
-        csv_file_obj = open(file_name)
-        reader_obj = csv.reader(csv_file_obj)
-        current_field = None
-        first_row = True
+        with open(file_name) as csv_file_obj:
+            reader_obj = csv.reader(csv_file_obj)
+            self.__parse_rows__(reader_obj)
+
+    def __parse_rows__(self, reader_obj):
+        parse = None                        # parse function for the rows after the first row of the current field
         for row in reader_obj:
-            if row[0] in self.__dataFileFields__:
+            if not row:
+                continue
+            if row[0] in DATA_FILE_FIELDS:
                 # start of new field to parse
-                current_field = row
-                first_row = True
-                valid_entry = True
+                parse, skip_first, only_one, target = self.__resolve_field__(row)
+                if (parse != None and skip_first == False):
+                    parse(target, row)
+                if only_one == True:
+                    parse = None
             elif row[0] != "":
-                valid_entry = False
-            else:
-                first_row = False
-
-            if valid_entry == True:
-                if (first_row == True and self.__dataFileFields__[current_field[0]][1] == False):
-                    self.__dataFileFields__[current_field[0]][0](current_field, row)
-                    first_row = False
-                elif (first_row == False and self.__dataFileFields__[current_field[0]][2] == False):
-                    self.__dataFileFields__[current_field[0]][0](current_field, row)
-
+                parse = None
+            elif parse != None:
+                parse(target, row)
 
     def __draw_passing_sequence_histogram__(self, homeTeam_passing_stats, awayTeam_passing_stats, histogram_min_range, histogram_max_range, plot_title):
         """Description: Public API function to draw a histogram of number of passes in sequence
@@ -761,17 +1368,48 @@ class Game_Data(object):
             plot_title = plot_title + ", for 2nd Half"
             self.__draw_passing_sequence_histogram__(self.homeTeamH2Passing_stats, self.awayTeamH2Passing_stats, histogram_min_range, histogram_max_range, plot_title)
             
-    def __draw_passing_graph__(self,graph,formation,elarge,esmall,plot_title):
+    def __draw_passing_graph__(self,graph,formation,elarge,esmall,plot_title,filename=None,dpi=600,figsize=None):
+        if filename != None or figsize != None:
+            plt.figure(figsize=figsize)
         nx.draw_networkx_nodes(graph, formation)
         nx.draw_networkx_labels(graph, formation)
         nx.draw_networkx_edges(graph, formation, edgelist=elarge, width=1)
         nx.draw_networkx_edges(graph, formation, edgelist=esmall, width=1, alpha=0.5, edge_color='b', style='dashed')
         plt.title(plot_title)
-        plt.show()
+        self.__output_figure__(filename, dpi, False)
+
+    def __output_figure__(self,filename,dpi,tight_layout=True):
+        """Description: Shows the current figure or writes it out as a PNG image
+        Inputs: filename - name of a graphics file or a binary file object (e.g. io.BytesIO) to write the figure to
+                           (if None, then will open the figure in a window on screen)
+                dpi - resolution of the image
+                tight_layout - True to fit the figure to the image before writing it
+        Outputs:
+            shows or writes out the figure, a written figure is closed
+        """
+        if filename == None:
+            plt.show()
+        else:
+            if tight_layout:
+                plt.tight_layout()
+            if isinstance(filename, (str, bytes, os.PathLike)):
+                plt.savefig(filename,dpi=dpi)
+            else:
+                plt.savefig(filename,dpi=dpi,format="png")
+            plt.close()
+
+    def __figure_image__(self,draw,*args,dpi=100,figsize=None):
+        # draws a figure with one of the draw_ functions into an in memory PNG image
+        image = io.BytesIO()
+        draw(*args,filename=image,dpi=dpi,figsize=figsize)
+        image.seek(0)
+        return(image)
     
-    def draw_passing_graph(self,team,half,weight,omit):
+    def draw_passing_graph(self,team,half,weight,omit,filename=None,dpi=600,figsize=None):
         # weight is the value for number passes >= to display prominently and < to either not display or display less prominently
         # omit: true = don't display passes < weight at all
+        # filename: optional file name or binary file object to write a PNG of the graph to instead of opening a window
+        # dpi, figsize: resolution and (width, height) in inches of the figure when it is written out
         if team == 'H':
             if half == 1:
                 formation = self.homeTeamH1Formation
@@ -798,269 +1436,188 @@ class Game_Data(object):
                 esmall=[(u,v) for (u,v,d) in self.awayTeamH2Passing_graph.edges(data=True) if d['weight'] < weight]
                 graph = self.awayTeamH2Passing_graph
                 plot_title = "Passing Graph - " + self.home_team + " vs. " + self.away_team + ", for " + self.away_team + ", 2nd Half"
+        if isinstance(graph, Dense_Passing_Graph):
+            graph = graph.to_networkx()
         if omit == False:
-            self.__draw_passing_graph__(graph,formation,elarge,esmall,plot_title)
+            self.__draw_passing_graph__(graph,formation,elarge,esmall,plot_title,filename,dpi,figsize)
         else:
             no_small = []
-            self.__draw_passing_graph__(graph,formation,elarge,no_small,plot_title)
+            self.__draw_passing_graph__(graph,formation,elarge,no_small,plot_title,filename,dpi,figsize)
+
+    def passing_graph_image(self,team,half,weight,omit,dpi=100,figsize=None):
+        """Description: Draws a passing graph (see draw_passing_graph) into an in memory PNG image
+        Inputs: team, half, weight, omit - see draw_passing_graph
+                dpi - resolution of the image
+                figsize - optional (width, height) of the figure in inches
+        Outputs:
+            Returns - io.BytesIO object with the PNG image, positioned at the start
+        """
+        return(self.__figure_image__(self.draw_passing_graph,team,half,weight,omit,dpi=dpi,figsize=figsize))
 
             
-    def __draw_pitch__(self):
+    def __draw_pitch__(self,figsize=None):
         """Description: Draws a diagram of a field split into zones
-        Inputs: 
+        Inputs: figsize - optional (width, height) of the figure in inches (default 7 x 8)
         Outputs:
             Returns - list of x,y coordinates by zone ([zone][x,y]) for the center point of each zone
             plots a graph of the pitch with zones labeled
         """
-        #TODO: these currently can't be changed without messing up the plot because not all parameters are calculated off of them
-        PITCH_LENGTH = 150
-        PITCH_WIDTH = 90
-        
         #Create figure
-        fig=plt.figure(figsize=(7,8))
+        if figsize == None:
+            figsize = (7,8)
+        fig=plt.figure(figsize=figsize)
         ax=fig.add_subplot(1,1,1)
-
-        #Pitch Outline & Centre Line
-        plt.plot([0,0],[0,PITCH_LENGTH], color="black")
-        plt.plot([0,PITCH_WIDTH],[PITCH_LENGTH,PITCH_LENGTH], color="black")
-        plt.plot([PITCH_WIDTH,PITCH_WIDTH],[PITCH_LENGTH,0], color="black")
-        plt.plot([PITCH_WIDTH,0],[0,0], color="black")
-        plt.plot([0,PITCH_WIDTH],[PITCH_LENGTH/2,PITCH_LENGTH/2], color="black")
-
-        #Left Penalty Area
-        plt.plot([65,25],[21,21],color="black")
-        plt.plot([65,65],[0,21],color="black")
-        plt.plot([25,25],[21,0],color="black")
-
-        #Right Penalty Area
-        plt.plot([65,65],[PITCH_LENGTH,129],color="black")
-        plt.plot([65,25],[129,129],color="black")
-        plt.plot([25,25],[129,PITCH_LENGTH],color="black")
-
-        #Prepare Circles
-        centre_circle = plt.Circle((PITCH_WIDTH/2,PITCH_LENGTH/2),9.15,color="black",fill=False)
-
-        #Draw Circles
-        ax.add_patch(centre_circle)
-
-        #Prepare Arcs
-        left_arc = Arc((45,17),height=18.3,width=18.3,angle=0,theta1=28,theta2=152,color="black")
-        right_arc = Arc((45,133),height=18.3,width=18.3,angle=0,theta1=208,theta2=332,color="black")
-
-        #Draw Arcs
-        ax.add_patch(left_arc)
-        ax.add_patch(right_arc)
-
-        # Draw zones
-        plt.plot([PITCH_WIDTH/3,PITCH_WIDTH/3],[0,PITCH_LENGTH],color="red")
-        plt.plot([2*PITCH_WIDTH/3,2*PITCH_WIDTH/3],[0,PITCH_LENGTH],color="red")
-        plt.plot([0,PITCH_WIDTH],[PITCH_LENGTH/6,PITCH_LENGTH/6],color="red")
-        plt.plot([0,PITCH_WIDTH],[2*PITCH_LENGTH/6,2*PITCH_LENGTH/6],color="red")
-        plt.plot([0,PITCH_WIDTH],[3*PITCH_LENGTH/6,3*PITCH_LENGTH/6],color="red")
-        plt.plot([0,PITCH_WIDTH],[4*PITCH_LENGTH/6,4*PITCH_LENGTH/6],color="red")
-        plt.plot([0,PITCH_WIDTH],[5*PITCH_LENGTH/6,5*PITCH_LENGTH/6],color="red")
-
-        #Tidy Axes
-        plt.axis('off')
-
-        #create zone map points
-        zone_map = []
-        zoneX = PITCH_WIDTH / 3 / 2
-        zoneY = PITCH_LENGTH / 6 / 2
-        zone_width = PITCH_WIDTH / 3
-        zone_length = PITCH_LENGTH / 6
-        zone_zero = [zone_width*zone_length, zone_width, zone_length]
-        zone_map.append(zone_zero)                                                # No Zone 0, but this element contains the following list: 
-                                                                                #   [0] = the maximum bubble size (area) that can be plotted in any of the zones, 
-                                                                                #   [1] = the zone width
-                                                                                #   [2] = the zone length
-        zone_map.append([zoneX, zoneY])                                          # Zone 1 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 2 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 3 [x,y]
-        zoneY = zoneY + PITCH_LENGTH/6
-        zone_map.append([zoneX, zoneY])                                          # Zone 4 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 5 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 6 [x,y]
-        zoneY = zoneY + PITCH_LENGTH/6
-        zone_map.append([zoneX, zoneY])                                          # Zone 7 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 8 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 9 [x,y]
-        zoneY = zoneY + PITCH_LENGTH/6
-        zone_map.append([zoneX, zoneY])                                          # Zone 10 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 11 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 12 [x,y]
-        zoneY = zoneY + PITCH_LENGTH/6
-        zone_map.append([zoneX, zoneY])                                          # Zone 13 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 14 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 15 [x,y]
-        zoneY = zoneY + PITCH_LENGTH/6
-        zone_map.append([zoneX, zoneY])                                          # Zone 16 [x,y]
-        zone_map.append([zoneX + PITCH_WIDTH/3, zoneY])                          # Zone 17 [x,y]
-        zone_map.append([zoneX + 2*PITCH_WIDTH/3, zoneY])                        # Zone 18 [x,y]
+        __draw_pitch_lines__(ax)
         
-        return(zone_map)
+        return(ZONE_MAP)
 
-    def __draw_heat_map__(self,zone_map,homeTeamHeat_map_stats,awayTeamHeat_map_stats,map_type,plot_title,filename):
+    def __draw_heat_map__(self,zone_map,homeTeamHeat_map_stats,awayTeamHeat_map_stats,map_type,plot_title,filename,dpi=600,pitch=None):
         """Description: Draws a diagram of a field split into zones
-        Preconditions: Assumes that __draw_pitch__ has been called ahead of this function being called
+        Preconditions: Assumes that __draw_pitch__ has been called ahead of this function being called (unless pitch is given)
         Inputs: zone_map - a list of x and y coordinates of the center point in each zone ([zone#][x,y])
                           zone_map[0] contains the radius of the zone
                 homeTeamHeat_map_stats - a Heat_Map_Stats object containing the stats to be plotted
                 awayTeamHeat_map_stats - a Heat_Map_Stats object containing the stats to be plotted
                 map_type - the type of map to draw (either "S" for shot, "P" for pass, "G" for goal, "L" for lost possession)
                 plot_title - string with title to place on the map
-                filename - name of a graphics file to output the heat map to (if None, then will open the heat map in a window on screen)
+                filename - name of a graphics file or a binary file object to output the heat map to (if None, then will open the heat map in a window on screen)
+                dpi - resolution of the image written to filename
+                pitch - optional Pitch_Figure to draw the heat map on instead of the current pyplot figure, it is reset after the image is written
         Outputs:
             plots a graph of the pitch with zones labeled
         """
-        home_team_color = "green"
-        away_team_color = "blue"
-        # if multiple heat maps are to be plotted on the same graph, set the offset for each one in each zone
-        if homeTeamHeat_map_stats == None:
-            offset = 0
-            total_passes = awayTeamHeat_map_stats.total_passes()
-            total_lost_possession = awayTeamHeat_map_stats.total_lost_possession_instances()
-        elif awayTeamHeat_map_stats == None:
-            offset = 0
-            total_passes = homeTeamHeat_map_stats.total_passes()
-            total_lost_possession = homeTeamHeat_map_stats.total_lost_possession_instances()
+        if pitch == None:
+            ax = plt.gca()
         else:
-            offset = 5
-            total_passes = homeTeamHeat_map_stats.total_passes() + awayTeamHeat_map_stats.total_passes()
-            total_lost_possession = homeTeamHeat_map_stats.total_lost_possession_instances() + awayTeamHeat_map_stats.total_lost_possession_instances()               
+            ax = pitch.axes
+        # the kept pitch figure is reset even if drawing fails, so a failed heat map is not left on later images
+        try:
+            zone_centers = np.array(zone_map[1:])
+            home_team_color = "green"
+            away_team_color = "blue"
+            # if multiple heat maps are to be plotted on the same graph, set the offset for each one in each zone
+            if homeTeamHeat_map_stats == None:
+                offset = 0
+                total_passes = awayTeamHeat_map_stats.total_passes()
+                total_lost_possession = awayTeamHeat_map_stats.total_lost_possession_instances()
+            elif awayTeamHeat_map_stats == None:
+                offset = 0
+                total_passes = homeTeamHeat_map_stats.total_passes()
+                total_lost_possession = homeTeamHeat_map_stats.total_lost_possession_instances()
+            else:
+                offset = 5
+                total_passes = homeTeamHeat_map_stats.total_passes() + awayTeamHeat_map_stats.total_passes()
+                total_lost_possession = homeTeamHeat_map_stats.total_lost_possession_instances() + awayTeamHeat_map_stats.total_lost_possession_instances()               
  
-        if map_type == "P":
-            # plot home team heat map pass stats
-            if total_passes > 0:                     # only plot this if there is no danger of divide by 0
-                if homeTeamHeat_map_stats:
-                    for i in range (1, len(zone_map)):
-                        # TODO with the 3x factor it's possible to have the bubbles exceed the area of a zone.  Consider some other implementation or maybe maxing out at the maximum area
-                        size_val = 3 * zone_map[0][0] * homeTeamHeat_map_stats.zone_passes[i] / total_passes
-                        plt.scatter(x=zone_map[i][0]+offset, y=zone_map[i][1], s=size_val, alpha=0.5, color=home_team_color)
-    
-                # plot away team heat map pass stats
-                if awayTeamHeat_map_stats:
-                    for i in range (1, len(zone_map)):
-                        # TODO with the 3x factor it's possible to have the bubbles exceed the area of a zone.  Consider some other implementation or maybe maxing out at the maximum area
-                        size_val = 3 * zone_map[0][0] * awayTeamHeat_map_stats.zone_passes[i] / total_passes
-                        plt.scatter(x=zone_map[i][0]-offset, y=zone_map[i][1], s=size_val, alpha=0.5, color=away_team_color)
-
-            # Print the Legend
-            legXVal = zone_map[1][0]
-            legYVal = zone_map[1][1] - 50
-            plt.text(legXVal,legYVal,"Legend")
-            plt.text(legXVal+10,legYVal-15,self.home_team)
-            plt.text(legXVal+10,legYVal-30,self.away_team)
-            plt.scatter(x=legXVal+5, y=legYVal-12, s=10, color=home_team_color)
-            plt.scatter(x=legXVal+5, y=legYVal-27, s=10, color=away_team_color)
-
-        if map_type == "L":
-            # plot home team heat map lost possession stats
-            if total_lost_possession > 0:                 # only plot this if no danger of divide by 0
-                if homeTeamHeat_map_stats:
-                    for i in range (1, len(zone_map)):
-                        # TODO with the 3x factor it's possible to have the bubbles exceed the area of a zone.  Consider some other implementation or maybe maxing out at the maximum area
-                        size_val = 3 * zone_map[0][0] * homeTeamHeat_map_stats.zoneLost_possession_instances[i] / total_lost_possession
-                        plt.scatter(x=zone_map[i][0]+offset, y=zone_map[i][1], s=size_val, alpha=0.5, color=home_team_color)
-    
-                # plot away team heat map lost possession stats
-                if awayTeamHeat_map_stats:
-                    for i in range (1, len(zone_map)):
-                        # TODO with the 3x factor it's possible to have the bubbles exceed the area of a zone.  Consider some other implementation or maybe maxing out at the maximum area
-                        size_val = 3 * zone_map[0][0] * awayTeamHeat_map_stats.zoneLost_possession_instances[i] / total_lost_possession
-                        plt.scatter(x=zone_map[i][0]-offset, y=zone_map[i][1], s=size_val, alpha=0.5, color=away_team_color)
-
-            # Print the Legend
-            legXVal = zone_map[1][0]
-            legYVal = zone_map[1][1] - 50
-            plt.text(legXVal,legYVal,"Legend")
-            plt.text(legXVal+10,legYVal-15,self.home_team)
-            plt.text(legXVal+10,legYVal-30,self.away_team)
-            plt.scatter(x=legXVal+5, y=legYVal-12, s=10, color=home_team_color)
-            plt.scatter(x=legXVal+5, y=legYVal-27, s=10, color=away_team_color)
-            
-        elif map_type == "S":
-            # plot home team heat map shooting stats
-            if homeTeamHeat_map_stats:
-                for i in range (1, len(zone_map)):
-                    if (homeTeamHeat_map_stats.zone_own_goals[i] > 0 or homeTeamHeat_map_stats.zone_shots_scored[i] > 0 or
-                       homeTeamHeat_map_stats.zoneShots_off_target[i] > 0 or homeTeamHeat_map_stats.zoneShots_on_target[i] > 0):
-                        x_val = zone_map[i][0] + offset
-                        y_val = zone_map[i][1]
-                        plt.text(x_val,y_val+5,"OG: " + str(homeTeamHeat_map_stats.zone_own_goals[i]), fontsize=6, color=home_team_color)
-                        plt.text(x_val,y_val+1,"SS: " + str(homeTeamHeat_map_stats.zone_shots_scored[i]), fontsize=6, color=home_team_color)
-                        plt.text(x_val,y_val-3,"ON: " + str(homeTeamHeat_map_stats.zoneShots_on_target[i]), fontsize=6, color=home_team_color)
-                        plt.text(x_val,y_val-7,"OFF: " + str(homeTeamHeat_map_stats.zoneShots_off_target[i]), fontsize=6, color=home_team_color)
+            if map_type == "P" or map_type == "L":
+                if map_type == "P":
+                    column = Heat_Map_Stats.PASSES
+                    total = total_passes
+                else:
+                    column = Heat_Map_Stats.LOST_POSSESSION_INSTANCES
+                    total = total_lost_possession
+                # plot the heat map stats with one scatter per team
+                if total > 0:                            # only plot this if there is no danger of divide by 0
+                    # TODO with the 3x factor it's possible to have the bubbles exceed the area of a zone.  Consider some other implementation or maybe maxing out at the maximum area
+                    if homeTeamHeat_map_stats:
+                        sizes = 3 * zone_map[0][0] * homeTeamHeat_map_stats.zone_stats[1:, column] / total
+                        ax.scatter(x=zone_centers[:,0]+offset, y=zone_centers[:,1], s=sizes, alpha=0.5, color=home_team_color)
+                    if awayTeamHeat_map_stats:
+                        sizes = 3 * zone_map[0][0] * awayTeamHeat_map_stats.zone_stats[1:, column] / total
+                        ax.scatter(x=zone_centers[:,0]-offset, y=zone_centers[:,1], s=sizes, alpha=0.5, color=away_team_color)
 
-            if awayTeamHeat_map_stats:
-                for i in range (1, len(zone_map)):
-                    if (awayTeamHeat_map_stats.zone_own_goals[i] > 0 or awayTeamHeat_map_stats.zone_shots_scored[i] > 0 or
-                       awayTeamHeat_map_stats.zoneShots_off_target[i] > 0 or awayTeamHeat_map_stats.zoneShots_on_target[i] > 0):
-                        x_val = zone_map[i][0] - offset
-                        y_val = zone_map[i][1]
-                        plt.text(x_val,y_val+5,"OG: " + str(awayTeamHeat_map_stats.zone_own_goals[i]), fontsize=6, color=away_team_color)
-                        plt.text(x_val,y_val+1,"SS: " + str(awayTeamHeat_map_stats.zone_shots_scored[i]), fontsize=6, color=away_team_color)
-                        plt.text(x_val,y_val-3,"ON: " + str(awayTeamHeat_map_stats.zoneShots_on_target[i]), fontsize=6, color=away_team_color)
-                        plt.text(x_val,y_val-7,"OFF: " + str(awayTeamHeat_map_stats.zoneShots_off_target[i]), fontsize=6, color=away_team_color)
+                # Print the Legend
+                legXVal = zone_map[1][0]
+                legYVal = zone_map[1][1] - 50
+                ax.text(legXVal,legYVal,"Legend")
+                ax.text(legXVal+10,legYVal-15,self.home_team)
+                ax.text(legXVal+10,legYVal-30,self.away_team)
+                ax.scatter(x=legXVal+5, y=legYVal-12, s=10, color=home_team_color)
+                ax.scatter(x=legXVal+5, y=legYVal-27, s=10, color=away_team_color)
+            
+            elif map_type == "S":
+                # plot the shooting stats of each zone that has shots
+                for stats, x_offset, color in ((homeTeamHeat_map_stats, offset, home_team_color), (awayTeamHeat_map_stats, -offset, away_team_color)):
+                    if stats:
+                        shots = stats.zone_stats[:, [Heat_Map_Stats.OWN_GOALS, Heat_Map_Stats.SHOTS_SCORED, Heat_Map_Stats.SHOTS_ON_TARGET, Heat_Map_Stats.SHOTS_OFF_TARGET]]
+                        for i in np.flatnonzero((shots[1:len(zone_map)] > 0).any(axis=1)) + 1:
+                            x_val = zone_map[i][0] + x_offset
+                            y_val = zone_map[i][1]
+                            for label, value, y_offset in zip(("OG: ", "SS: ", "ON: ", "OFF: "), shots[i].tolist(), (5, 1, -3, -7)):
+                                ax.text(x_val,y_val+y_offset,label + str(value), fontsize=6, color=color)
                        
-            # Print the Legend
-            legXVal = zone_map[1][0]
-            legYVal = zone_map[1][1] - 50
-            plt.text(legXVal,legYVal,"Legend")
-            plt.text(legXVal+10,legYVal-15,self.home_team + " Shots", color=home_team_color)
-            plt.text(legXVal+10,legYVal-30,self.away_team + " Shots", color=away_team_color)
-            plt.text(legXVal+50,legYVal-10,"OG: Own Goals", fontsize=6)
-            plt.text(legXVal+50,legYVal-14,"SS: Shots Scored", fontsize=6)
-            plt.text(legXVal+50,legYVal-18,"ON: Shots On Target", fontsize=6)
-            plt.text(legXVal+50,legYVal-22,"OFF: Shots Off Target", fontsize=6)
-
-            # set extents of plot so legend is visible
-            plotYLimits = [legYVal-30, zone_map[18][1] + zone_map[0][2] + 10]
-            plt.ylim(plotYLimits)
+                # Print the Legend
+                legXVal = zone_map[1][0]
+                legYVal = zone_map[1][1] - 50
+                ax.text(legXVal,legYVal,"Legend")
+                ax.text(legXVal+10,legYVal-15,self.home_team + " Shots", color=home_team_color)
+                ax.text(legXVal+10,legYVal-30,self.away_team + " Shots", color=away_team_color)
+                ax.text(legXVal+50,legYVal-10,"OG: Own Goals", fontsize=6)
+                ax.text(legXVal+50,legYVal-14,"SS: Shots Scored", fontsize=6)
+                ax.text(legXVal+50,legYVal-18,"ON: Shots On Target", fontsize=6)
+                ax.text(legXVal+50,legYVal-22,"OFF: Shots Off Target", fontsize=6)
+
+                # set extents of plot so legend is visible
+                plotYLimits = [legYVal-30, zone_map[18][1] + zone_map[0][2] + 10]
+                ax.set_ylim(plotYLimits)
             
                 
-        # Print team defending each goal
-        if homeTeamHeat_map_stats:
-            defending_zone = homeTeamHeat_map_stats.team_defending_zone
-            x_val = zone_map[defending_zone][0] - zone_map[0][1] / 2
-            if defending_zone <= 9:
-                y_val = zone_map[defending_zone][1] - zone_map[0][2]
-            else:
-                y_val = zone_map[defending_zone][1] + zone_map[0][2]
-            plt.text(x_val,y_val,self.home_team)
-
-        if awayTeamHeat_map_stats:
-            defending_zone = awayTeamHeat_map_stats.team_defending_zone
-            x_val = zone_map[defending_zone][0] - zone_map[0][1] / 2
-            if defending_zone <= 9:
-                y_val = zone_map[defending_zone][1] - zone_map[0][2]
-            else:
-                y_val = zone_map[defending_zone][1] + zone_map[0][2]
-            plt.text(x_val,y_val,self.away_team)
+            # Print team defending each goal
+            if homeTeamHeat_map_stats:
+                defending_zone = homeTeamHeat_map_stats.team_defending_zone
+                x_val = zone_map[defending_zone][0] - zone_map[0][1] / 2
+                if defending_zone <= 9:
+                    y_val = zone_map[defending_zone][1] - zone_map[0][2]
+                else:
+                    y_val = zone_map[defending_zone][1] + zone_map[0][2]
+                ax.text(x_val,y_val,self.home_team)
+
+            if awayTeamHeat_map_stats:
+                defending_zone = awayTeamHeat_map_stats.team_defending_zone
+                x_val = zone_map[defending_zone][0] - zone_map[0][1] / 2
+                if defending_zone <= 9:
+                    y_val = zone_map[defending_zone][1] - zone_map[0][2]
+                else:
+                    y_val = zone_map[defending_zone][1] + zone_map[0][2]
+                ax.text(x_val,y_val,self.away_team)
                     
 
 
-        plt.title(plot_title,pad=30)
+            ax.set_title(plot_title,pad=30)
         
-        if filename == None:
-            #Display Heat Map
-            plt.show()
-        else:
-            plt.tight_layout()
-            plt.savefig(filename,dpi=600)
-            plt.close()
+            if pitch == None:
+                self.__output_figure__(filename, dpi)
+            else:
+                pitch.figure.tight_layout()
+                if isinstance(filename, (str, bytes, os.PathLike)):
+                    pitch.figure.savefig(filename,dpi=dpi)
+                else:
+                    pitch.figure.savefig(filename,dpi=dpi,format="png")
+        finally:
+            if pitch != None:
+                pitch.reset()
 
 
-    def draw_heat_map(self,team,half,map_type,filename=None):
+    def draw_heat_map(self,team,half,map_type,filename=None,dpi=600,figsize=None):
         """Description: Draws a heat map graph for the specified team in the specified half of the game
         Inputs: team - the team to draw the map for (either "H" for home team or "A" for away team or "B" for both on same graph)
                 half - the half to draw the map for (either 1 for first half or 2 for second half)
                 map_type - the type of map to draw (either "S" for shot, "P" for pass, "L" for lost possession)
-                filename - optional parameter if you want the map output to a file instead of opening a window
+                filename - optional file name or binary file object (e.g. io.BytesIO) if you want the map output as a PNG instead of opening a window
+                dpi - resolution of the image written to filename
+                figsize - optional (width, height) of the figure in inches
         Outputs:
             plots a graph
         """
-        zone_map = self.__draw_pitch__()
+        if map_type not in ("S", "P", "L"):
+            return
+        if filename == None:
+            pitch = None
+            zone_map = self.__draw_pitch__(figsize)
+        else:
+            # images are drawn on a kept pitch figure, so only the heat map itself has to be drawn
+            pitch = pitch_figure(figsize)
+            zone_map = ZONE_MAP
         if map_type == "S":
             plot_title = "Shot Heat Map - "
         elif map_type == "P":
@@ -1073,25 +1630,35 @@ class Game_Data(object):
         if team == 'H':
             if half == 1:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for " + self.home_team + ", 1st Half"
-                self.__draw_heat_map__(zone_map, self.homeTeamH1Heat_map_stats, None, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, self.homeTeamH1Heat_map_stats, None, map_type, plot_title, filename, dpi, pitch)
             elif half == 2:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for " + self.home_team + ", 2nd Half"
-                self.__draw_heat_map__(zone_map, self.homeTeamH2Heat_map_stats, None, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, self.homeTeamH2Heat_map_stats, None, map_type, plot_title, filename, dpi, pitch)
         elif team == 'A':
             if half == 1:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for " + self.away_team + ", 1st Half"
-                self.__draw_heat_map__(zone_map, None, self.awayTeamH1Heat_map_stats, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, None, self.awayTeamH1Heat_map_stats, map_type, plot_title, filename, dpi, pitch)
             elif half == 2:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for " + self.away_team + ", 2nd Half"
-                self.__draw_heat_map__(zone_map, None, self.awayTeamH2Heat_map_stats, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, None, self.awayTeamH2Heat_map_stats, map_type, plot_title, filename, dpi, pitch)
         elif team == 'B':
             if half == 1:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for both teams, 1st Half"
-                self.__draw_heat_map__(zone_map, self.homeTeamH1Heat_map_stats, self.awayTeamH1Heat_map_stats, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, self.homeTeamH1Heat_map_stats, self.awayTeamH1Heat_map_stats, map_type, plot_title, filename, dpi, pitch)
             elif half == 2:
                 plot_title = plot_title + self.home_team + " vs. " + self.away_team + ",for both teams, 2nd Half"
-                self.__draw_heat_map__(zone_map, self.homeTeamH2Heat_map_stats, self.awayTeamH2Heat_map_stats, map_type, plot_title, filename)
+                self.__draw_heat_map__(zone_map, self.homeTeamH2Heat_map_stats, self.awayTeamH2Heat_map_stats, map_type, plot_title, filename, dpi, pitch)
+
 
+    def heat_map_image(self,team,half,map_type,dpi=100,figsize=None):
+        """Description: Draws a heat map (see draw_heat_map) into an in memory PNG image
+        Inputs: team, half, map_type - see draw_heat_map
+                dpi - resolution of the image
+                figsize - optional (width, height) of the figure in inches
+        Outputs:
+            Returns - io.BytesIO object with the PNG image, positioned at the start
+        """
+        return(self.__figure_image__(self.draw_heat_map,team,half,map_type,dpi=dpi,figsize=figsize))
          
     def final_home_team_score(self):
         score = 0
@@ -1105,21 +1672,19 @@ class Game_Data(object):
             score = score + self.away_team_goals[period]
         return score
     
+    def __passing_metrics__(self, passing_graph):
+        if isinstance(passing_graph, (Passing_Graph, Dense_Passing_Graph)):
+            return passing_graph.metrics()
+        return Passing_Graph.calculate_metrics(passing_graph)
+
     def __total_passes__(self, passing_graph):
-        passes = 0
-        for u,v,weight in passing_graph.edges(data=True):
-            passes = passes + weight['weight']
-        return passes
+        return self.__passing_metrics__(passing_graph)["total_passes"]
         
     def __top_passer__(self, passing_graph):
-        degrees = passing_graph.out_degree(weight='weight')
-        passers = sorted(degrees, key=lambda x: x[1], reverse=True)
-        return passers[0]
+        return self.__passing_metrics__(passing_graph)["top_passer"]
 
     def __hub_player__(self, passing_graph):
-        degrees = passing_graph.degree(weight='weight')
-        passers = sorted(degrees, key=lambda x: x[1], reverse=True)
-        return passers[0]
+        return self.__passing_metrics__(passing_graph)["hub_player"]
     
     def home_team_passing_rate(self, period):
         if (period == "H1"):
@@ -0,0 +1,247 @@
+import argparse
+import csv
+import datetime
+import os
+import numpy as np
+import football_game_data as fgd
+
+MAX_TREE_NODES = 20                                   # the passing tree section has columns for 20 nodes
+TEAM_NAMES = ("Lawrence", "Marion", "Belmont", "Sockers FC", "Fusion SC", "SC43", "Bavarians", "Sheboygan",
+              "Oshkosh", "Howards Grove", "Xavier", "Shawano", "Flash", "Eagan Wave", "Wright State", "UWGB")
+
+# formation name: list of (node, x position, y position, line)
+FORMATIONS = {"4-4-2": [("1", 0.5, 0.1, "Defense"), ("2", 0.8, 0.3, "Defense"), ("3", 0.2, 0.3, "Defense"),
+                        ("4", 0.6, 0.25, "Defense"), ("5", 0.4, 0.25, "Defense"), ("6", 0.4, 0.5, "Midfield"),
+                        ("7", 0.9, 0.55, "Midfield"), ("8", 0.6, 0.5, "Midfield"), ("11", 0.1, 0.55, "Midfield"),
+                        ("9", 0.6, 0.85, "Forward"), ("10", 0.4, 0.85, "Forward")],
+              "4-3-3": [("1", 0.5, 0.1, "Defense"), ("2", 0.8, 0.3, "Defense"), ("3", 0.2, 0.3, "Defense"),
+                        ("4", 0.6, 0.25, "Defense"), ("5", 0.4, 0.25, "Defense"), ("6", 0.5, 0.45, "Midfield"),
+                        ("8", 0.65, 0.6, "Midfield"), ("10", 0.35, 0.6, "Midfield"), ("7", 0.9, 0.8, "Forward"),
+                        ("9", 0.5, 0.9, "Forward"), ("11", 0.1, 0.8, "Forward")],
+              "4-5-1": [("1", 0.5, 0.1, "Defense"), ("2", 0.95, 0.45, "Defense"), ("3", 0.05, 0.45, "Defense"),
+                        ("4", 0.65, 0.3, "Defense"), ("5", 0.35, 0.3, "Defense"), ("6", 0.5, 0.55, "Midfield"),
+                        ("8", 0.65, 0.7, "Midfield"), ("10", 0.35, 0.7, "Midfield"), ("7", 0.95, 0.8, "Forward"),
+                        ("9", 0.5, 0.9, "Forward"), ("11", 0.05, 0.8, "Forward")]}
+
+HEAT_MAP_HEADER = ["Zone", "PASSES COMPLETED", "ASSISTS", "3RD CONSECUTIVE PASS INSTANCES", "SHOTS OFF TARGET",
+                   "SHOTS ON TARGET", "SHOTS SCORED", "OWN GOALS SCORED", "LOST POSSESSION"]
+
+COMMENTS = ("playing very narrow, space on the flanks", "back line cannot connect to the midfield",
+            "quick to the ball in the middle third", "good triangles between fullback, wing and midfielder",
+            "most sequences end with the ball lost in the middle third", "pressing high after losing possession")
+
+def sequence_length_weights(mean_passes=3.0):
+    """Description: Creates a geometric distribution of passing sequence lengths (the usual shape of real games)
+    Inputs: mean_passes - the mean number of passes in a sequence
+    Outputs:
+        Returns - array of probabilities of a sequence having 0 to MAX_TREE_NODES-1 passes
+    """
+    p = 1.0 / (1.0 + mean_passes)
+    weights = p * (1.0 - p) ** np.arange(MAX_TREE_NODES)
+    return(weights / weights.sum())
+
+def __pad__(row, length=MAX_TREE_NODES + 1):
+    return(row + [""] * (length - len(row)))
+
+def __passing_tree__(rng, nodes, possessions, weights):
+    """Description: Creates the branches of a passing tree
+    Inputs: rng - numpy random Generator
+            nodes - list of the team's nodes
+            possessions - number of branches to create
+            weights - probabilities of a branch having 0, 1, 2, ... passes
+    Outputs:
+        Returns - list of branches (lists of nodes, the first node is the root, the last node is the tip)
+    """
+    lengths = rng.choice(len(weights), size=possessions, p=weights) + 1
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    # each pass moves 1 to len(nodes)-1 places around the team so it goes to another player than the one passing,
+    # the root of each branch is a random player
+    steps = rng.integers(1, len(nodes), size=lengths.sum())
+    steps[starts] = rng.integers(len(nodes), size=possessions)
+    positions = np.cumsum(steps)
+    positions = (positions - np.repeat(positions[starts] - steps[starts], lengths)) % len(nodes)
+    names = np.array(nodes, dtype=object)[positions]
+    return([names[start:start + length].tolist() for start, length in zip(starts.tolist(), lengths.tolist())])
+
+def __heat_map__(rng, passes, shots, goals, assists, lost_possession, defending_zone):
+    """Description: Spreads a team's half of the game over the 18 zones, attacking away from defending_zone
+    Inputs: rng - numpy random Generator
+            passes, shots, goals, assists, lost_possession - totals to spread over the zones
+            defending_zone - the zone the team defends (2 or 17)
+    Outputs:
+        Returns - array (18 zones x 8 HEAT_MAP_HEADER columns after Zone) of zone stats
+    """
+    zones = np.arange(1, fgd.Heat_Map_Stats.NUM_ZONES + 1)
+    # rows of the pitch from the team's own goal (0) to the opponent's goal (5)
+    attacking_row = (zones - 1) // 3 if defending_zone <= 9 else 5 - (zones - 1) // 3
+    pass_weights = 1.0 + (attacking_row > 0) + (zones % 3 == 2)
+    shot_weights = np.where(attacking_row >= 4, 1.0 + (attacking_row == 5), 0.0)
+    lost_weights = 1.0 + attacking_row
+    stats = np.zeros((fgd.Heat_Map_Stats.NUM_ZONES, len(HEAT_MAP_HEADER) - 1), dtype=np.int64)
+    stats[:, 0] = rng.multinomial(passes, pass_weights / pass_weights.sum())
+    stats[:, 1] = rng.multinomial(assists, shot_weights / shot_weights.sum())
+    stats[:, 2] = stats[:, 0] // 3
+    shots_in_zone = rng.multinomial(shots, shot_weights / shot_weights.sum())
+    # the goals are picked from the shots of the zones, so the zone goals add up to the GOALS rows
+    stats[:, 5] = rng.multivariate_hypergeometric(shots_in_zone, goals)
+    stats[:, 4] = rng.binomial(shots_in_zone - stats[:, 5], 0.5)
+    stats[:, 3] = shots_in_zone - stats[:, 5] - stats[:, 4]
+    stats[:, 7] = rng.multinomial(lost_possession, lost_weights / lost_weights.sum())
+    return(stats)
+
+def generate_game(file_name, seed=None, possessions=60, sequence_lengths=None, home_team=None, away_team=None,
+                  game_date=None, extra_time=False, heat_maps=True, comments=2):
+    """Description: Writes a synthetic game data file in the layout Game_Data reads
+    Inputs: file_name - the game data file to write
+            seed - seed of the random numbers (the same seed and options always give the same file)
+            possessions - number of passing sequences (passing tree rows) per team per half
+            sequence_lengths - probabilities of a sequence having 0, 1, 2, ... passes, at most MAX_TREE_NODES-1
+                               (None = sequence_length_weights())
+            home_team, away_team - team names (None = picked at random from TEAM_NAMES)
+            game_date - datetime.date of the game (None = no GAME DATE field)
+            extra_time - True to also write two periods of extra time and a penalty shootout
+            heat_maps - True to write the defending zones and heat maps of each team and half
+            comments - number of comments per team per half
+    Outputs:
+        Returns - number of passing tree rows written
+    """
+    if possessions < 1:
+        raise ValueError("possessions must be at least 1: " + str(possessions))
+    rng = np.random.default_rng(seed)
+    if sequence_lengths is None:
+        weights = sequence_length_weights()
+    else:
+        weights = np.asarray(sequence_lengths, dtype=float)[:MAX_TREE_NODES]
+        weights = weights / weights.sum()
+    if home_team == None or away_team == None:
+        picked = rng.choice(len(TEAM_NAMES), size=2, replace=False)
+        home_team = TEAM_NAMES[picked[0]] if home_team == None else home_team
+        away_team = TEAM_NAMES[picked[1]] if away_team == None else away_team
+    periods = fgd.PERIODS if extra_time else fgd.HALVES
+    formation_names = list(FORMATIONS)
+    formations = {"HT": formation_names[rng.integers(len(formation_names))], "AT": formation_names[rng.integers(len(formation_names))]}
+
+    rows = [["HOME TEAM", home_team], ["AWAY TEAM", away_team]]
+    if game_date != None:
+        rows.append(["GAME DATE", game_date.isoformat()])
+    for period, duration in zip(fgd.PERIODS, (45, 45, 10, 10)):
+        rows.append([period + " DURATION", duration if period in periods else 0])
+
+    # period statistics, the passing trees are made first so the possession and max passes rows match them
+    trees = {}
+    period_rows = []
+    for period in fgd.PERIODS:
+        for team in ("HT", "AT"):
+            prefix = team + " " + period + " "
+            if period not in periods:
+                for stat in fgd.PERIOD_STATS:
+                    period_rows.append([prefix + stat, 0])
+                continue
+            shots = int(rng.poisson(6 if period in fgd.HALVES else 2))
+            goals = int(rng.binomial(shots, 0.2))
+            stats = {"GOALS": goals, "ASSISTS": int(rng.binomial(goals, 0.6)), "SHOTS": shots,
+                     "SAVES": int(rng.poisson(2)), "CORNERS": int(rng.poisson(3)),
+                     "YELLOW CARDS": int(rng.poisson(0.8)), "RED CARDS": int(rng.random() < 0.05)}
+            branches = __passing_tree__(rng, [node for node, x, y, line in FORMATIONS[formations[team]]],
+                                        possessions if period in fgd.HALVES else max(1, possessions // 4), weights)
+            trees[(team, period)] = (branches, stats)
+            for stat in ("GOALS", "ASSISTS", "SHOTS", "SAVES"):
+                period_rows.append([prefix + stat, stats[stat]])
+            # a possession instance is every 3rd consecutive pass of a sequence (see Passing_Stats.process_tree_branch)
+            period_rows.append([prefix + "POSSESSION", sum((len(branch) - 1) // 3 for branch in branches)])
+            period_rows.append([prefix + "MAX PASSES", max(len(branch) - 1 for branch in branches)])
+            for stat in ("CORNERS", "YELLOW CARDS", "RED CARDS"):
+                period_rows.append([prefix + stat, stats[stat]])
+    rows.extend(period_rows)
+
+    for period in fgd.HALVES:
+        for team in ("HT", "AT"):
+            rows.append([team + " " + period + " FORMATION", formations[team], "node", "x position", "y position", "Line"])
+            for node, x, y, line in FORMATIONS[formations[team]]:
+                rows.append(["", "", node, x, y, line])
+
+    tree_rows = 0
+    tree_header = ["Node " + str(i) for i in range(1, MAX_TREE_NODES + 1)]
+    for period in fgd.HALVES:
+        for team in ("HT", "AT"):
+            branches, stats = trees[(team, period)]
+            rows.append([team + " " + period + " PASSING TREE"] + tree_header)
+            for branch in branches:
+                rows.append(__pad__([""] + branch))
+            tree_rows = tree_rows + len(branches)
+
+    if heat_maps:
+        for period in fgd.HALVES:
+            for team in ("HT", "AT"):
+                branches, stats = trees[(team, period)]
+                # the home team defends zone 2 in the first half, the teams change ends at half time
+                defending_zone = 2 if (team == "HT") == (period == "H1") else 17
+                passes = sum(len(branch) - 1 for branch in branches)
+                zone_stats = __heat_map__(rng, passes, stats["SHOTS"], stats["GOALS"], stats["ASSISTS"], len(branches), defending_zone)
+                rows.append([team + " " + period + " DEFENDING ZONE", defending_zone])
+                rows.append([team + " " + period + " HEAT MAP"] + HEAT_MAP_HEADER)
+                for zone in range(fgd.Heat_Map_Stats.NUM_ZONES):
+                    rows.append(["", zone + 1] + zone_stats[zone].tolist())
+
+    for period in fgd.HALVES:
+        rows.append([period + " COMMENTS"])
+        for team in ("HT", "AT"):
+            for i in range(comments):
+                rows.append(["", team, COMMENTS[rng.integers(len(COMMENTS))]])
+
+    if extra_time:
+        rows.append(["HT PENALTY SHOOTOUT GOALS", int(rng.integers(6))])
+        rows.append(["AT PENALTY SHOOTOUT GOALS", int(rng.integers(6))])
+
+    with open(file_name, "w", newline="") as file_obj:
+        csv.writer(file_obj).writerows(rows)
+    return(tree_rows)
+
+def generate_games(folder, games=10, seed=0, first_date=datetime.date(2018, 9, 1), **options):
+    """Description: Writes a batch of synthetic game data files, one game a week, named like the real game files
+    (e.g. 2018-09-01_Xavier_vs_Oshkosh.csv)
+    Inputs: folder - folder to write the games to (created if it doesn't exist)
+            games - number of games to write
+            seed - seed of the batch, each game gets its own seed derived from it
+            first_date - date of the first game
+            options - passed to generate_game
+    Outputs:
+        Returns - list of the game data files written
+    """
+    os.makedirs(folder, exist_ok=True)
+    game_seeds = np.random.SeedSequence(seed).spawn(games)
+    rng = np.random.default_rng(seed)
+    game_files = []
+    for i in range(games):
+        home, away = rng.choice(len(TEAM_NAMES), size=2, replace=False)
+        game_date = first_date + datetime.timedelta(weeks=i)
+        file_name = os.path.join(folder, game_date.isoformat() + "_" + TEAM_NAMES[home].replace(" ", "") + "_vs_" + TEAM_NAMES[away].replace(" ", "") + ".csv")
+        generate_game(file_name, game_seeds[i], home_team=TEAM_NAMES[home], away_team=TEAM_NAMES[away], game_date=game_date, **options)
+        game_files.append(file_name)
+    return(game_files)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic football game data files for load and scale testing")
+    parser.add_argument("folder", help="folder to write the game data files to")
+    parser.add_argument("-n", "--games", type=int, default=10, help="number of games")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="random seed")
+    parser.add_argument("-p", "--possessions", type=int, default=60, help="passing sequences per team per half")
+    parser.add_argument("--mean-passes", type=float, default=3.0, help="mean passes per sequence (geometric distribution)")
+    parser.add_argument("--sequence-lengths", type=float, nargs="+", help="relative frequency of sequences with 0, 1, 2, ... passes (overrides --mean-passes)")
+    parser.add_argument("--extra-time", action="store_true", help="also write extra time and a penalty shootout")
+    parser.add_argument("--no-heat-maps", action="store_true", help="don't write defending zones and heat maps")
+    parser.add_argument("--comments", type=int, default=2, help="comments per team per half")
+    args = parser.parse_args(argv)
+    if args.possessions < 1:
+        parser.error("--possessions must be at least 1")
+
+    sequence_lengths = args.sequence_lengths
+    if sequence_lengths == None:
+        sequence_lengths = sequence_length_weights(args.mean_passes).tolist()
+    game_files = generate_games(args.folder, args.games, args.seed, possessions=args.possessions, sequence_lengths=sequence_lengths,
+                                extra_time=args.extra_time, heat_maps=not args.no_heat_maps, comments=args.comments)
+    print("wrote %d games to %s" % (len(game_files), args.folder))
+    return(0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
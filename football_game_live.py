@@ -0,0 +1,222 @@
+import asyncio
+import pickle
+from collections import namedtuple
+import numpy as np
+import football_game_data as fgd
+
+TEAMS = {"HT": "homeTeam", "AT": "awayTeam"}
+
+# Live events, in addition to the fgd events read_game_events yields (a game data file can be replayed as a feed).
+# team is "HT" or "AT" and period is one of fgd.PERIODS (fgd.HALVES for the passing and heat map events)
+Stat_Increment = namedtuple("Stat_Increment", ["team", "period", "stat", "amount"])              # stat is a fgd.PERIOD_STATS key, e.g. "GOALS"
+Zone_Increment = namedtuple("Zone_Increment", ["team", "period", "zone", "stat", "amount"])      # stat is a fgd.HEAT_MAP_STATS name, e.g. "passes"
+
+class Live_Game(object):
+    """Description: This class is used to build a Game_Data object during a game, one event at a time. Each event
+    updates the Passing_Stats, passing graphs, Heat_Map_Stats and period stats of the game in place, so the work per
+    event does not grow with the length of the game and nothing is parsed again.
+    """
+    def __init__(self, home_team="", away_team="", game_date="", keep_tree_lists=True, dense_graphs=False):
+        """Description: Creates an empty game
+        Inputs: home_team, away_team, game_date - the header fields of the game
+                keep_tree_lists, dense_graphs - passed to Game_Data
+        """
+        self.game = fgd.Game_Data(None, keep_tree_lists, dense_graphs)
+        self.game.home_team = home_team
+        self.game.away_team = away_team
+        self.game.game_date = game_date
+        self.events = 0                               # number of events applied to the game
+        self.__targets__ = {}                         # dictionary (field key: target resolved by Game_Data.__resolve_field__)
+
+    def __half_attribute__(self, team, period, name):
+        # the Formation, Passing_graph, Passing_stats or Heat_map_stats object of a team in a half
+        if team not in TEAMS:
+            raise ValueError("unknown team: " + str(team))
+        if period not in fgd.HALVES:
+            raise ValueError("no " + name + " for period " + str(period))
+        return(getattr(self.game, TEAMS[team] + period + name))
+
+    def __field__(self, key):
+        # the parse function and target of a data file field, resolved once per field
+        if key not in self.__targets__:
+            if key not in fgd.DATA_FILE_FIELDS:
+                raise ValueError("unknown field: " + str(key))
+            parse, skip_first, only_one, target = self.game.__resolve_field__([key])
+            self.__targets__[key] = (parse, target)
+        return(self.__targets__[key])
+
+    def add_passing_branch(self, team, period, nodes):
+        """Description: Adds a passing sequence
+        Inputs: team - "HT" or "AT"
+                period - "H1" or "H2"
+                nodes - passing nodes of the sequence from the root to the tip
+        Outputs:
+            Updates the team's Passing_Stats and passing graph of the half
+        """
+        passing_stats = self.__half_attribute__(team, period, "Passing_stats")
+        passing_stats.process_tree_branch(self.__half_attribute__(team, period, "Passing_graph"), list(nodes))
+        self.events = self.events + 1
+
+    def increment_zone(self, team, period, zone, stat, amount=1):
+        """Description: Adds to a heat map statistic of a zone
+        Inputs: team - "HT" or "AT"
+                period - "H1" or "H2"
+                zone - zone number (1 - 18)
+                stat - one of fgd.HEAT_MAP_STATS (e.g. "passes", "shots_on_target")
+                amount - the number to add
+        Outputs:
+            Updates the team's Heat_Map_Stats of the half
+        """
+        if stat not in fgd.HEAT_MAP_STATS:
+            raise ValueError("unknown heat map stat: " + str(stat))
+        self.__half_attribute__(team, period, "Heat_map_stats").increment_zone(zone, fgd.HEAT_MAP_STATS.index(stat), amount)
+        self.events = self.events + 1
+
+    def increment_stat(self, team, period, stat, amount=1):
+        """Description: Adds to a period statistic, e.g. a goal, shot or card
+        Inputs: team - "HT" or "AT"
+                period - one of fgd.PERIODS
+                stat - one of fgd.PERIOD_STATS (e.g. "GOALS", "YELLOW CARDS")
+                amount - the number to add
+        Outputs:
+            Updates the period statistic of the team
+        """
+        if team not in TEAMS:
+            raise ValueError("unknown team: " + str(team))
+        if stat not in fgd.PERIOD_STATS or period not in fgd.PERIODS:
+            raise ValueError("unknown stat or period: " + str(stat) + ", " + str(period))
+        values = getattr(self.game, fgd.PERIOD_STATS[stat][0 if team == "HT" else 1])
+        values[period] = values[period] + amount
+        self.events = self.events + 1
+
+    def apply(self, event):
+        """Description: Applies one event to the game
+        Inputs: event - Stat_Increment, Zone_Increment or one of the fgd events yielded by read_game_events (file
+                        events set values the way the data file does, e.g. a Heat_Map_Zone replaces the zone)
+        Outputs:
+            Updates the game
+        """
+        if isinstance(event, Stat_Increment):
+            self.increment_stat(event.team, event.period, event.stat, event.amount)
+        elif isinstance(event, Zone_Increment):
+            self.increment_zone(event.team, event.period, event.zone, event.stat, event.amount)
+        elif isinstance(event, fgd.Passing_Branch):
+            self.add_passing_branch(event.team, event.period, event.nodes)
+        elif isinstance(event, fgd.Heat_Map_Zone):
+            self.__half_attribute__(event.team, event.period, "Heat_map_stats").add_zone(event.zone, *event.stats)
+            self.events = self.events + 1
+        elif isinstance(event, fgd.Passing_Edge):
+            self.__half_attribute__(event.team, event.period, "Passing_graph").add_weighted_edges_from([(event.from_node, event.to_node, event.weight)])
+            self.events = self.events + 1
+        elif isinstance(event, fgd.Formation_Node):
+            self.__half_attribute__(event.team, event.period, "Formation")[event.node] = np.array([event.x, event.y])
+            self.__half_attribute__(event.team, event.period, "Passing_graph").add_nodes_from([event.node])
+            self.events = self.events + 1
+        elif isinstance(event, fgd.Comment):
+            getattr(self.game, TEAMS[event.team] + event.period + "Comments").append(event.text)
+            self.events = self.events + 1
+        elif isinstance(event, fgd.Header_Field):
+            parse, target = self.__field__(event.key)
+            if parse != None:
+                parse(target, [event.key, str(event.value)])
+            self.events = self.events + 1
+        else:
+            raise ValueError("unknown event: " + repr(event))
+
+    def snapshot(self):
+        """Description: Copies the game as it is now, so it can be read (e.g. by a dashboard or report) while events
+        keep being applied to the live game
+        Inputs: None
+        Outputs:
+            Returns - Game_Data object
+        """
+        return(pickle.loads(pickle.dumps(self.game, pickle.HIGHEST_PROTOCOL)))
+
+    def summary(self):
+        """Description: Gets the score and the main totals of each team without copying the game
+        Inputs: None
+        Outputs:
+            Returns - dictionary with the events applied, the teams, the score and per half passing and heat map totals
+        """
+        game = self.game
+        summary = {"events": self.events, "home_team": game.home_team, "away_team": game.away_team,
+                   "score": {"home": game.final_home_team_score(), "away": game.final_away_team_score()}}
+        for team in TEAMS:
+            for half in fgd.HALVES:
+                passing_stats = getattr(game, TEAMS[team] + half + "Passing_stats")
+                heat_map_stats = getattr(game, TEAMS[team] + half + "Heat_map_stats")
+                summary[team + " " + half] = {"total_passes": passing_stats.total_passes,
+                                              "possession_instances": passing_stats.possession_instances,
+                                              "max_consecutive_passes": passing_stats.max_consecutive_passes,
+                                              "shots": heat_map_stats.total_shots(), "goals": heat_map_stats.total_goals()}
+        return(summary)
+
+class Live_Feed(object):
+    """Description: This class is used to feed events to a Live_Game through an asyncio queue. Producers (e.g. the
+    connections of the people recording the game) put events on the queue and run() applies them in order. Since the
+    events are applied by one task, a snapshot is always taken between two events.
+    """
+    def __init__(self, live_game=None, max_events=0):
+        """Description: Creates the feed
+        Inputs: live_game - Live_Game to apply the events to (None = a new empty game)
+                max_events - maximum number of events waiting in the queue before put waits (0 = no limit)
+        """
+        self.live_game = live_game if live_game != None else Live_Game()
+        self.queue = asyncio.Queue(max_events)
+        self.errors = []                              # list of (event, error message) of the events that could not be applied
+
+    async def put(self, event):
+        await self.queue.put(event)
+
+    def put_nowait(self, event):
+        self.queue.put_nowait(event)
+
+    async def close(self):
+        """Description: Stops run() once the events already on the queue have been applied"""
+        await self.queue.put(None)
+
+    async def run(self):
+        """Description: Applies the events on the queue until close() is called. An event that can't be applied is
+        recorded in self.errors and does not stop the feed.
+        Inputs: None
+        Outputs:
+            Returns - the Live_Game
+        """
+        while True:
+            event = await self.queue.get()
+            try:
+                if event == None:
+                    break
+                self.live_game.apply(event)
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                self.errors.append((event, type(e).__name__ + ": " + str(e)))
+            finally:
+                self.queue.task_done()
+        return(self.live_game)
+
+    async def snapshot(self, drain=True):
+        """Description: Copies the game (see Live_Game.snapshot)
+        Inputs: drain - True to wait until the events already on the queue have been applied (e.g. at half time),
+                        False to copy the game as it is now
+        Outputs:
+            Returns - Game_Data object
+        """
+        if drain:
+            await self.queue.join()
+        return(self.live_game.snapshot())
+
+async def replay(file_name, feed, delay=0):
+    """Description: Puts the events of a game data file on a feed, e.g. to test a dashboard with a recorded game
+    Inputs: file_name - the game data file
+            feed - Live_Feed
+            delay - seconds to wait between events
+    Outputs:
+        Returns - number of events put on the feed
+    """
+    events = 0
+    for event in fgd.read_game_events(file_name):
+        await feed.put(event)
+        events = events + 1
+        if delay > 0:
+            await asyncio.sleep(delay)
+    return(events)
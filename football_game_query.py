@@ -0,0 +1,187 @@
+import numpy as np
+import football_game_data as fgd
+import football_game_season as fgs
+import football_game_table as fgt
+
+# columns Game_Query keeps a value index for (column: value index of that column)
+INDEXED_COLUMNS = ("team", "opponent", "formation", "opponent_formation", "period", "home")
+# columns made from the date column that can be grouped by, in addition to the stats table columns
+DATE_GROUPS = {"year": "datetime64[Y]", "month": "datetime64[M]", "week": "datetime64[W]", "day": "datetime64[D]"}
+AGGREGATE_FUNCTIONS = ("sum", "mean", "count", "min", "max")
+
+def __value_index__(values, inverse):
+    """Description: Builds the index of one column
+    Inputs: values, inverse - the sorted unique values of the column and the number of each row's value (as returned
+                              by np.unique(column, return_inverse=True))
+    Outputs:
+        Returns - dictionary (value: sorted numpy array of the rows with that value)
+    """
+    order = np.argsort(inverse, kind="stable")
+    groups = np.split(order, np.cumsum(np.bincount(inverse, minlength=len(values)))[:-1])
+    return(dict(zip(values.tolist(), groups)))
+
+class Game_Query(object):
+    """Description: This class is used to filter and group the per period stats of a collection of games. The games are
+    flattened into a stats table (see football_game_table) once and the team, opponent, formation, opponent formation,
+    period, home and date columns are indexed, so a query only looks at the rows that match its filters.
+    """
+    def __init__(self, games=None, table=None, periods=fgd.PERIODS, passing_stats=True):
+        """Description: Creates the query object and its indexes
+        Inputs: games - iterable of Game_Data objects (e.g. a football_game_season.Season)
+                table - stats table (numpy structured array, e.g. from football_game_table.read_stats_table) to use
+                        instead of games
+                periods - periods to make rows for when games is given
+                passing_stats - passed to football_game_table.stats_table when games is given
+        """
+        if table is None:
+            table = fgt.stats_table(games if games != None else [], periods, passing_stats)
+        self.table = table
+        self.columns = {name: table[name] for name in table.dtype.names}
+        self.columns["opponent_formation"] = self.__opponent_column__("formation")
+        for name in DATE_GROUPS:
+            self.columns[name] = table["date"].astype(DATE_GROUPS[name])
+
+        self.__codes__ = {}                           # dictionary (column: value numbers of the column), see __column_codes__
+        self.indexes = {name: __value_index__(*self.__column_codes__(name)) for name in INDEXED_COLUMNS}
+        # rows with a known date in date order, for date range filters
+        dated_rows = np.flatnonzero(~np.isnat(table["date"]))
+        self.date_rows = dated_rows[np.argsort(table["date"][dated_rows], kind="stable")]
+        self.sorted_dates = table["date"][self.date_rows]
+
+    def __opponent_column__(self, name):
+        """Description: Makes a column with the value of another column for the opponent's row of the same game and period
+        Inputs: name - the column
+        Outputs:
+            Returns - numpy array
+        """
+        table = self.table
+        # each game and period has a home and an away row, which are next to each other in this order
+        order = np.lexsort((table["home"], table["period"], table["game"]))
+        if (len(order) % 2 != 0 or np.any(table["game"][order[0::2]] != table["game"][order[1::2]]) or
+                np.any(table["period"][order[0::2]] != table["period"][order[1::2]])):
+            raise ValueError("the stats table must have a home and an away row for every game and period")
+        opponent_rows = np.empty(len(table), dtype=np.int64)
+        opponent_rows[order[0::2]] = order[1::2]
+        opponent_rows[order[1::2]] = order[0::2]
+        return(table[name][opponent_rows])
+
+    def __column_codes__(self, name):
+        """Description: Numbers the values of a column once, so grouping by it doesn't have to sort the column again
+        Inputs: name - the column
+        Outputs:
+            Returns - tuple (sorted unique values, numpy array of the number of each row's value)
+        """
+        if name not in self.__codes__:
+            if name not in self.columns:
+                raise ValueError("unknown column: " + str(name))
+            self.__codes__[name] = np.unique(self.columns[name], return_inverse=True)
+        return(self.__codes__[name])
+
+    def __len__(self):
+        return(len(self.table))
+
+    def __index_rows__(self, name, value):
+        # rows of an indexed column with value, or with any of the values if value is a list, tuple or set
+        index = self.indexes[name]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            rows = [index[v] for v in value if v in index]
+            return(np.unique(np.concatenate(rows)) if rows else np.zeros(0, dtype=np.int64))
+        return(index.get(value, np.zeros(0, dtype=np.int64)))
+
+    def __date_rows__(self, start_date, end_date):
+        # rows with start_date <= date <= end_date, in row order
+        first = 0
+        last = len(self.sorted_dates)
+        if start_date != None:
+            first = np.searchsorted(self.sorted_dates, np.datetime64(fgs.__as_date__(start_date), "D"), side="left")
+        if end_date != None:
+            last = np.searchsorted(self.sorted_dates, np.datetime64(fgs.__as_date__(end_date), "D"), side="right")
+        return(np.sort(self.date_rows[first:last]))
+
+    def select(self, start_date=None, end_date=None, **filters):
+        """Description: Finds the rows that match the filters
+        Inputs: start_date, end_date - optional first and last date (datetime.date or date string) of the games to
+                                       include, games without a known date are left out when either is given
+                filters - column=value filters on the INDEXED_COLUMNS (e.g. team="Lawrence University", period="H1",
+                          opponent_formation="4-5-1"), a list / tuple / set of values matches any of them
+        Outputs:
+            Returns - sorted numpy array of the matching row numbers of self.table
+        """
+        row_sets = []
+        for name in filters:
+            if name not in self.indexes:
+                raise ValueError("can't filter on " + name + ", indexed columns are " + ", ".join(INDEXED_COLUMNS))
+            row_sets.append(self.__index_rows__(name, filters[name]))
+        if start_date != None or end_date != None:
+            row_sets.append(self.__date_rows__(start_date, end_date))
+        if not row_sets:
+            return(np.arange(len(self.table)))
+        # intersect the smallest sets first so the work stays proportional to the rows that match
+        row_sets.sort(key=len)
+        rows = row_sets[0]
+        for other_rows in row_sets[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other_rows, assume_unique=True)
+        return(rows)
+
+    def rows(self, start_date=None, end_date=None, **filters):
+        """Description: Returns the stats table rows that match the filters (see select)"""
+        return(self.table[self.select(start_date, end_date, **filters)])
+
+    def aggregate(self, stat, group_by=None, function="sum", start_date=None, end_date=None, **filters):
+        """Description: Aggregates a stat over the rows that match the filters, e.g. shots per half for a team against a
+        formation by month: aggregate("shots", ("month", "period"), team=name, opponent_formation="4-5-1")
+        Inputs: stat - stats table column to aggregate (for "count" only used to leave out the rows without passing
+                       stats when it is one of the passing columns)
+                group_by - None for one total, or a column name or tuple of column names to group by (the stats table
+                           columns, "opponent_formation" and the DATE_GROUPS "year", "month", "week" and "day")
+                function - one of AGGREGATE_FUNCTIONS
+                start_date, end_date, filters - see select
+        Outputs:
+            Returns - the aggregate if group_by is None, else dictionary (group: aggregate) in group order, where
+                      group is a value or a tuple of values (one per group_by column)
+        """
+        if function not in AGGREGATE_FUNCTIONS:
+            raise ValueError("unknown aggregate function: " + str(function))
+        rows = self.select(start_date, end_date, **filters)
+        if stat in fgt.PASSING_COLUMNS:
+            # rows without passing stats (extra time, or a table made without them) hold -1 and are left out
+            rows = rows[self.columns[stat][rows] >= 0]
+        values = self.columns[stat][rows].astype(np.float64) if function != "count" else np.ones(len(rows))
+        if group_by == None:
+            if function == "mean":
+                return(values.mean().item() if len(values) > 0 else float("nan"))
+            if function in ("min", "max"):
+                return(getattr(values, function)().item() if len(values) > 0 else None)
+            return(values.sum().item() if function == "sum" else len(values))
+
+        group_names = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+        # number each group (lexsort order of the group columns) and reduce each group with bincount / ufunc.at
+        keys = np.zeros(len(rows), dtype=np.int64)
+        group_values = []
+        for name in group_names:
+            unique_values, codes = self.__column_codes__(name)
+            keys = keys * len(unique_values) + codes[rows]
+            group_values.append(unique_values)
+        group_keys, group_numbers = np.unique(keys, return_inverse=True)
+        if function in ("sum", "mean", "count"):
+            results = np.bincount(group_numbers, weights=values, minlength=len(group_keys))
+            if function == "mean":
+                results = results / np.bincount(group_numbers, minlength=len(group_keys))
+        else:
+            ufunc = np.minimum if function == "min" else np.maximum
+            results = np.full(len(group_keys), np.inf if function == "min" else -np.inf)
+            ufunc.at(results, group_numbers, values)
+        if function == "count":
+            results = results.astype(np.int64)
+
+        aggregates = {}
+        for key, result in zip(group_keys.tolist(), results.tolist()):
+            group = []
+            for unique_values in reversed(group_values):
+                key, value_number = divmod(key, len(unique_values))
+                group.append(unique_values[value_number].item())
+            group.reverse()
+            aggregates[group[0] if len(group) == 1 else tuple(group)] = result
+        return(aggregates)
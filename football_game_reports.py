@@ -1,14 +1,39 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import docx
 import docxtpl
+import matplotlib
+
+REPORT_TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "game_report_template.docx")
+REPORT_STAGES = ("parse", "context", "images", "render", "save")
+
+# image resolution (dots per inch) and figure size ((width, height) in inches) for each kind of report output
+IMAGE_TARGETS = {"screen": {"dpi": 100, "figsize": (7, 8)},
+                 "print": {"dpi": 300, "figsize": (7, 8)},
+                 "archive": {"dpi": 600, "figsize": (7, 8)}}
 
 class football_game_reports(object):
     """Description: This class is used to create reports based off data in
     Game_Data object of football_game_data.py file
     """
     
-    def __init__(self, game_object):
+    def __init__(self, game_object, report_template_file="game_report_template.docx", image_target="screen", dpi=None, figsize=None, image_dir=None, image_cache=None):
+        # game_object - Game_Data object to report on
+        # report_template_file - docxtpl template of the report
+        # image_target - name of the IMAGE_TARGETS entry the heat map resolution and size are taken from
+        # dpi, figsize - optional overrides of the image_target resolution and figure size
+        # image_dir - optional folder to also keep the heat map images in as PNG files (None = images only kept in memory)
+        # image_cache - optional football_game_cache.Image_Cache so heat maps that were already rendered are not drawn again
         self.game_object = game_object
-        self.report_template_file = "game_report_template.docx"
+        self.report_template_file = report_template_file
+        self.dpi = IMAGE_TARGETS[image_target]["dpi"] if dpi == None else dpi
+        self.figsize = IMAGE_TARGETS[image_target]["figsize"] if figsize == None else figsize
+        self.image_dir = image_dir
+        self.image_cache = image_cache
+        self.timings = {}                             # dictionary (stage name: seconds) of the last report created
 
     def __create_template_dictionary__(self, template):
         """Description: Creates a dictionary context for docxtpl to use
@@ -17,6 +42,7 @@ class football_game_reports(object):
             returns - template_dict - dictionary that contains all the values in the template file that will be updated
         """
         # create dictionary of values in the template
+        start_time = time.perf_counter()
         template_dict = {}
         template_dict["home_team"] = self.game_object.home_team
         template_dict["away_team"] = self.game_object.away_team
@@ -106,33 +132,158 @@ class football_game_reports(object):
         template_dict["hm_lost_possession"]["away_h1"] = self.game_object.awayTeamH1Heat_map_stats.total_lost_possession_instances()
         template_dict["hm_lost_possession"]["away_h2"] = self.game_object.awayTeamH2Heat_map_stats.total_lost_possession_instances()
 
-        self.game_object.draw_heat_map('B',1,'P','hm_h1_pass.png')
-        self.game_object.draw_heat_map('B',2,'P','hm_h2_pass.png')
-        self.game_object.draw_heat_map('B',1,'S','hm_h1_shot.png')
-        self.game_object.draw_heat_map('B',2,'S','hm_h2_shot.png')
-        self.game_object.draw_heat_map('B',1,'L','hm_h1_lost_possession.png')
-        self.game_object.draw_heat_map('B',2,'L','hm_h2_lost_possession.png')
-        
-        h1_pass_heat_map = docxtpl.Inline_image(template, 'hm_h1_pass.png')
-        template_dict["h1_pass_heat_map"] = h1_pass_heat_map
-        h2_pass_heat_map = docxtpl.Inline_image(template, 'hm_h2_pass.png')
-        template_dict["h2_pass_heat_map"] = h2_pass_heat_map
-        h1_shot_heat_map = docxtpl.Inline_image(template, 'hm_h1_shot.png')
-        template_dict["h1_shot_heat_map"] = h1_shot_heat_map
-        h2_shot_heat_map = docxtpl.Inline_image(template, 'hm_h2_shot.png')
-        template_dict["h2_shot_heat_map"] = h2_shot_heat_map
-        h1_lost_possession_heat_map = docxtpl.Inline_image(template, 'hm_h1_lost_possession.png')
-        template_dict["h1_lost_possession_heat_map"] = h1_lost_possession_heat_map
-        h2_lost_possession_heat_map = docxtpl.Inline_image(template, 'hm_h2_lost_possession.png')
-        template_dict["h2_lost_possession_heat_map"] = h2_lost_possession_heat_map
+        self.timings["context"] = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        images = {}
+        for key, half, map_type, file_name in (("h1_pass_heat_map", 1, 'P', 'hm_h1_pass.png'),
+                                               ("h2_pass_heat_map", 2, 'P', 'hm_h2_pass.png'),
+                                               ("h1_shot_heat_map", 1, 'S', 'hm_h1_shot.png'),
+                                               ("h2_shot_heat_map", 2, 'S', 'hm_h2_shot.png'),
+                                               ("h1_lost_possession_heat_map", 1, 'L', 'hm_h1_lost_possession.png'),
+                                               ("h2_lost_possession_heat_map", 2, 'L', 'hm_h2_lost_possession.png')):
+            if self.image_cache != None:
+                images[key] = self.image_cache.heat_map_image(self.game_object,'B',half,map_type,self.dpi,self.figsize)
+            else:
+                images[key] = self.game_object.heat_map_image('B',half,map_type,self.dpi,self.figsize)
+            if self.image_dir != None:
+                with open(os.path.join(self.image_dir, file_name), "wb") as image_obj:
+                    image_obj.write(images[key].getvalue())
+        for key in images:
+            template_dict[key] = docxtpl.InlineImage(template, images[key])
+        self.timings["images"] = time.perf_counter() - start_time
         
         return template_dict
         
     def create_report_from_template(self, output_file):
-        template = docxtpl.Docx_template(self.report_template_file)
+        """Description: Creates the report for the game
+        Inputs: output_file - the .docx file to write the report to
+        Outputs:
+            writes the report and fills self.timings with the time taken by each stage
+        """
+        self.timings = {}
+        template = docxtpl.DocxTemplate(self.report_template_file)
         
         template_dict = self.__create_template_dictionary__(template)
     
+        start_time = time.perf_counter()
         template.render(template_dict)
+        self.timings["render"] = time.perf_counter() - start_time
 
+        start_time = time.perf_counter()
         template.save(output_file)
+        self.timings["save"] = time.perf_counter() - start_time
+
+# image cache of each cache folder used by the reports created in this process
+__image_caches__ = {}
+
+def __init_report_worker__():
+    # reports are only written to files, so never open windows (and don't need a display)
+    matplotlib.use("Agg")
+
+def __create_report__(file_name, output_dir, report_template_file, image_target="screen", dpi=None, image_cache_dir=None):
+    """Description: Worker function that creates the report for one game data file
+    Inputs: file_name - the game data file
+            output_dir - folder to write the report to, named after the game data file
+            report_template_file - docxtpl template of the report
+            image_target, dpi - resolution of the report images (see football_game_reports)
+            image_cache_dir - optional football_game_cache.Image_Cache folder for the report images
+    Outputs:
+        Returns - tuple (file_name, report file, None, timings) if the report was created or
+                  tuple (file_name, None, error message, timings) if it could not be created
+    """
+    import football_game_data as fgd
+    timings = {}
+    try:
+        start_time = time.perf_counter()
+        game = fgd.Game_Data(file_name)
+        timings["parse"] = time.perf_counter() - start_time
+        output_file = os.path.join(output_dir, os.path.splitext(os.path.basename(file_name))[0] + ".docx")
+        # the images are kept in memory, so jobs never share any files but their own report
+        image_cache = None
+        if image_cache_dir != None:
+            if image_cache_dir not in __image_caches__:
+                import football_game_cache
+                __image_caches__[image_cache_dir] = football_game_cache.Image_Cache(image_cache_dir)
+            image_cache = __image_caches__[image_cache_dir]
+        report = football_game_reports(game, report_template_file, image_target, dpi, image_cache=image_cache)
+        report.create_report_from_template(output_file)
+        timings.update(report.timings)
+        return((file_name, output_file, None, timings))
+    except Exception as e:
+        return((file_name, None, type(e).__name__ + ": " + str(e), timings))
+
+def create_reports(game_files, output_dir, jobs=None, report_template_file=REPORT_TEMPLATE_FILE, image_target="screen", dpi=None, image_cache_dir=None):
+    """Description: Creates the reports for a batch of games, in parallel if more than one job is allowed
+    Inputs: game_files - list of game data files
+            output_dir - folder to write the reports to (created if it doesn't exist)
+            jobs - number of worker processes (None = one per CPU, 1 = create the reports in this process)
+            report_template_file - docxtpl template of the reports
+            image_target - name of the IMAGE_TARGETS entry to use for the report images
+            dpi - optional override of the image_target resolution
+            image_cache_dir - optional folder of rendered images shared by the jobs, so the heat maps of games that
+                              did not change since they were last reported are not drawn again
+    Outputs:
+        Returns - list of tuples returned by __create_report__, in game_files order. A game that fails does not stop
+                  the rest of the batch.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if jobs == None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(game_files)))
+    arguments = (game_files, repeat(output_dir), repeat(report_template_file), repeat(image_target), repeat(dpi), repeat(image_cache_dir))
+    if jobs == 1:
+        __init_report_worker__()
+        return(list(map(__create_report__, *arguments)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=__init_report_worker__) as executor:
+        return(list(executor.map(__create_report__, *arguments)))
+
+def stage_totals(results):
+    """Description: Adds up the stage timings of a batch of reports
+    Inputs: results - list of tuples returned by create_reports
+    Outputs:
+        Returns - dictionary (stage name: total seconds over every report)
+    """
+    totals = dict.fromkeys(REPORT_STAGES, 0.0)
+    for file_name, output_file, error, timings in results:
+        for stage in timings:
+            totals[stage] = totals.get(stage, 0.0) + timings[stage]
+    return(totals)
+
+def main(argv=None):
+    import football_game_season as fgs
+    parser = argparse.ArgumentParser(description="Create the .docx reports for a batch of game data files")
+    parser.add_argument("games", nargs="+", help="game data files or folders of game data files")
+    parser.add_argument("-o", "--output-dir", default="reports", help="folder to write the reports to")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default one per CPU)")
+    parser.add_argument("-t", "--template", default=REPORT_TEMPLATE_FILE, help="docxtpl report template")
+    parser.add_argument("--image-target", choices=sorted(IMAGE_TARGETS), default="screen", help="resolution and size of the report images")
+    parser.add_argument("--dpi", type=int, default=None, help="override the resolution of the report images")
+    parser.add_argument("--image-cache", default=None, help="folder to keep rendered images in between runs")
+    args = parser.parse_args(argv)
+
+    game_files = []
+    for path in args.games:
+        if os.path.isdir(path):
+            game_files.extend(fgs.find_game_files(path))
+        else:
+            game_files.append(path)
+
+    start_time = time.perf_counter()
+    results = create_reports(game_files, args.output_dir, args.jobs, args.template, args.image_target, args.dpi, args.image_cache)
+    elapsed = time.perf_counter() - start_time
+
+    failed = 0
+    for file_name, output_file, error, timings in results:
+        if error == None:
+            print(output_file + "  " + "  ".join(stage + " %.2fs" % timings[stage] for stage in REPORT_STAGES if stage in timings))
+        else:
+            failed = failed + 1
+            print(file_name + "  FAILED: " + error)
+    totals = stage_totals(results)
+    print("%d reports, %d failed, %.2fs elapsed" % (len(results) - failed, failed, elapsed))
+    print("stage totals: " + "  ".join(stage + " %.2fs" % totals[stage] for stage in REPORT_STAGES))
+    return(1 if failed else 0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
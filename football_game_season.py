@@ -0,0 +1,415 @@
+import os
+import datetime
+from collections import Counter
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import football_game_data as fgd
+try:
+    from scipy import sparse
+except ImportError:                                   # scipy is optional, Passing_Network falls back to a NumPy matrix
+    sparse = None
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%Y%m%d")
+
+def find_game_files(folder, recursive=True):
+    """Description: Finds every game data file (*.csv) in a folder
+    Inputs: folder - the folder to search
+            recursive - True to also search the sub folders of folder
+    Outputs:
+        Returns - sorted list of paths to the game data files
+    """
+    game_files = []
+    if recursive:
+        for dir_path, dir_names, file_names in os.walk(folder):
+            dir_names.sort()
+            for f in file_names:
+                if f.lower().endswith(".csv"):
+                    game_files.append(os.path.join(dir_path, f))
+    else:
+        for f in os.listdir(folder):
+            if f.lower().endswith(".csv") and os.path.isfile(os.path.join(folder, f)):
+                game_files.append(os.path.join(folder, f))
+    game_files.sort()
+    return(game_files)
+
+def __parse_date__(text):
+    for date_format in DATE_FORMATS:
+        try:
+            return(datetime.datetime.strptime(text.strip(), date_format).date())
+        except ValueError:
+            pass
+    return(None)
+
+def game_date(game):
+    """Description: Finds the date of a game, from the GAME DATE field or else from the date the game data file name
+    starts with (e.g. 2018-05-19_U15BNEWUnitedSC_vs_SC43.csv)
+    Inputs: game - Game_Data object
+    Outputs:
+        Returns - datetime.date of the game or None if the date is not known
+    """
+    date = __parse_date__(game.game_date)
+    if date == None and game.file_name != None:
+        date = __parse_date__(os.path.basename(game.file_name).split("_")[0])
+    return(date)
+
+def __as_date__(date):
+    if isinstance(date, str):
+        parsed = __parse_date__(date)
+        if parsed == None:
+            raise ValueError("unrecognized date: " + date)
+        return(parsed)
+    if isinstance(date, datetime.datetime):
+        return(date.date())
+    return(date)
+
+class Passing_Network(object):
+    """Description: This class is used to combine the passing graphs of many games into one passing network. Each
+    player / position label gets a global index the first time it is seen and the passes are accumulated into a
+    scipy.sparse matrix (a NumPy matrix if scipy isn't installed) indexed (from node, to node).
+    """
+    def __init__(self, nodes=None):
+        """Description: Creates an empty network
+        Inputs: nodes - optional list of nodes to give the first indexes, so several networks can share the same index
+        """
+        self.node_index = {}                          # dictionary (node: global index of the node)
+        self.nodes = []                               # nodes in global index order
+        self.graphs = 0                               # number of passing graphs added to the network
+        self.__from_nodes__ = []                      # list of arrays of from node indexes, one array per graph added
+        self.__to_nodes__ = []                        # list of arrays of to node indexes, one array per graph added
+        self.__weights__ = []                         # list of arrays of edge weights, one array per graph added
+        self.__matrix__ = None                        # accumulated pass matrix, None until matrix is called after a change
+        if nodes != None:
+            for node in nodes:
+                self.__node__(node)
+
+    def __node__(self, node):
+        index = self.node_index.get(node)
+        if index == None:
+            index = len(self.nodes)
+            self.node_index[node] = index
+            self.nodes.append(node)
+        return(index)
+
+    def add_graph(self, graph):
+        """Description: Adds the passes of a passing graph to the network
+        Inputs: graph - Passing_Graph, Dense_Passing_Graph or networkx DiGraph with 'weight' edge attributes
+        Outputs:
+            Updates the network
+        """
+        for node in graph.nodes:
+            self.__node__(node)
+        edges = list(graph.edges(data=True))
+        self.__from_nodes__.append(np.array([self.node_index[u] for u, v, d in edges], dtype=np.int64))
+        self.__to_nodes__.append(np.array([self.node_index[v] for u, v, d in edges], dtype=np.int64))
+        self.__weights__.append(np.array([d.get('weight', 1) for u, v, d in edges], dtype=np.float64))
+        self.graphs = self.graphs + 1
+        self.__matrix__ = None
+
+    def matrix(self):
+        """Description: Returns the accumulated pass matrix, only building it again if graphs were added since the last call
+        Inputs: None
+        Outputs:
+            Returns - n x n scipy.sparse CSR matrix (NumPy array if scipy isn't installed) of the number of passes
+                      (from node, to node), with n = len(self.nodes)
+        """
+        if self.__matrix__ is None:
+            n = len(self.nodes)
+            from_nodes = np.concatenate(self.__from_nodes__) if self.__from_nodes__ else np.zeros(0, dtype=np.int64)
+            to_nodes = np.concatenate(self.__to_nodes__) if self.__to_nodes__ else np.zeros(0, dtype=np.int64)
+            weights = np.concatenate(self.__weights__) if self.__weights__ else np.zeros(0)
+            if sparse != None:
+                # duplicate (from node, to node) entries are added together when converting to CSR
+                self.__matrix__ = sparse.coo_matrix((weights, (from_nodes, to_nodes)), shape=(n, n)).tocsr()
+            else:
+                matrix = np.zeros((n, n))
+                np.add.at(matrix, (from_nodes, to_nodes), weights)
+                self.__matrix__ = matrix
+        return(self.__matrix__)
+
+    def __node_values__(self, values):
+        return(dict(zip(self.nodes, np.asarray(values).ravel().tolist())))
+
+    def total_passes(self):
+        return(self.matrix().sum().item())
+
+    def out_degree(self):
+        """Description: Returns the weighted out degree (number of passes made) of each node"""
+        return(self.__node_values__(self.matrix().sum(axis=1)))
+
+    def in_degree(self):
+        """Description: Returns the weighted in degree (number of passes received) of each node"""
+        return(self.__node_values__(self.matrix().sum(axis=0)))
+
+    def degree(self):
+        """Description: Returns the weighted degree (number of passes made and received) of each node"""
+        matrix = self.matrix()
+        return(self.__node_values__(np.asarray(matrix.sum(axis=1)).ravel() + np.asarray(matrix.sum(axis=0)).ravel()))
+
+    def top_edges(self, k=10):
+        """Description: Returns the edges with the most passes
+        Inputs: k - number of edges to return (None = every edge)
+        Outputs:
+            Returns - list of (from node, to node, passes) tuples, most passes first
+        """
+        matrix = self.matrix()
+        if sparse != None:
+            coo = matrix.tocoo()
+            from_nodes, to_nodes, weights = coo.row, coo.col, coo.data
+        else:
+            from_nodes, to_nodes = np.nonzero(matrix)
+            weights = matrix[from_nodes, to_nodes]
+        if k != None and k < len(weights):
+            # only sort the k largest
+            top = np.argpartition(-weights, k)[:k]
+        else:
+            top = np.arange(len(weights))
+        top = top[np.lexsort((to_nodes[top], from_nodes[top], -weights[top]))]
+        return([(self.nodes[from_nodes[i]], self.nodes[to_nodes[i]], weights[i].item()) for i in top])
+
+    def centrality(self, alpha=0.85, max_iterations=100, tolerance=1.0e-10):
+        """Description: Calculates the weighted PageRank centrality of each node, i.e. how much the passing flows through
+        a player when passes are followed in proportion to their number
+        Inputs: alpha - damping factor
+                max_iterations - maximum number of power iterations
+                tolerance - iterations stop when the total change is less than tolerance times the number of nodes
+        Outputs:
+            Returns - dictionary (node: centrality), the centralities add up to 1
+        """
+        n = len(self.nodes)
+        if n == 0:
+            return({})
+        matrix = self.matrix()
+        out_degree = np.asarray(matrix.sum(axis=1)).ravel()
+        dangling = out_degree == 0
+        scale = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        rank = np.full(n, 1.0 / n)
+        for i in range(max_iterations):
+            # passes out of each node are shared in proportion to the edge weights, dangling nodes are spread evenly
+            flow = np.asarray(matrix.T.dot(rank * scale)).ravel()
+            new_rank = alpha * (flow + rank[dangling].sum() / n) + (1.0 - alpha) / n
+            change = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if change < n * tolerance:
+                break
+        return(self.__node_values__(rank))
+
+    def to_networkx(self):
+        """Description: Converts the network to a fgd.Passing_Graph (e.g. to draw it or for other networkx algorithms)
+        Inputs: None
+        Outputs:
+            Returns - Passing_Graph with every node and the combined edge weights
+        """
+        graph = fgd.Passing_Graph()
+        graph.add_nodes_from(self.nodes)
+        graph.add_weighted_edges_from(self.top_edges(None))
+        return(graph)
+
+    def __len__(self):
+        return(len(self.nodes))
+
+def passing_sequence_histograms(game_files, halves=fgd.HALVES):
+    """Description: Counts the passing sequence lengths of each team over many games by streaming through the game
+    data files (see fgd.read_game_events), without building Game_Data objects or passing graphs
+    Inputs: game_files - list of game data files
+            halves - the halves to include
+    Outputs:
+        Returns - dictionary (team name: Counter (number of passes in the sequence: number of sequences))
+    """
+    histograms = {}
+    for file_name in game_files:
+        teams = {}
+        for event in fgd.read_game_events(file_name, (fgd.Header_Field, fgd.Passing_Branch)):
+            if type(event) is fgd.Passing_Branch:
+                if event.period in halves:
+                    histograms.setdefault(teams.get(event.team), Counter())[len(event.nodes) - 1] += 1
+            elif event.key == "HOME TEAM":
+                teams["HT"] = event.value
+            elif event.key == "AWAY TEAM":
+                teams["AT"] = event.value
+    return(histograms)
+
+def __load_game__(file_name, cache=None, keep_tree_lists=True, dense_graphs=False, lazy=False):
+    """Description: Worker function that parses one game data file
+    Inputs: file_name - the game data file to parse
+            cache - optional Game_Cache object to load the game through
+            keep_tree_lists - passed to Game_Data
+            dense_graphs - passed to Game_Data
+            lazy - passed to Game_Data, lazy games are not loaded through the cache since indexing the file is
+                   about as fast as reading the cache entry
+    Outputs:
+        Returns - tuple (file_name, Game_Data object, None, cache hit) if the file was parsed or
+                  tuple (file_name, None, error message, cache hit) if the file could not be parsed
+    """
+    try:
+        if cache == None or lazy:
+            return((file_name, fgd.Game_Data(file_name, keep_tree_lists, dense_graphs, lazy), None, False))
+        hits = cache.hits
+        game = cache.load(file_name, evict=False, keep_tree_lists=keep_tree_lists, dense_graphs=dense_graphs)
+        return((file_name, game, None, cache.hits > hits))
+    except Exception as e:
+        return((file_name, None, type(e).__name__ + ": " + str(e), False))
+
+def __defending_zone__(game, team_prefix, half):
+    """Description: Finds the zone a team defended in a half. If the data file has no DEFENDING ZONE row for it, the
+    zone is inferred from the opponent in the same half or from the team in the other half (each is the goal at the
+    other end of the pitch, i.e. zone 19 - z)
+    Inputs: game - Game_Data object
+            team_prefix - "homeTeam" or "awayTeam"
+            half - "H1" or "H2"
+    Outputs:
+        Returns - zone number (1 - 18), or None if it can't be found
+    """
+    opponent_prefix = "awayTeam" if team_prefix == "homeTeam" else "homeTeam"
+    other_half = "H2" if half == "H1" else "H1"
+    for prefix, check_half, mirror in ((team_prefix, half, False), (opponent_prefix, half, True), (team_prefix, other_half, True)):
+        zone = getattr(game, prefix + check_half + "Heat_map_stats").team_defending_zone
+        if 1 <= zone <= fgd.Heat_Map_Stats.NUM_ZONES:
+            return(fgd.Heat_Map_Stats.NUM_ZONES + 1 - zone if mirror else zone)
+    return(None)
+
+class Season(object):
+    """Description: This class is used to load a collection of games (e.g. a season) from a folder of game data files
+    """
+    def __init__(self, folder=None, files=None, jobs=None, cache=None, keep_tree_lists=True, dense_graphs=False, lazy=False):
+        """Description: Creates the collection, call load() to parse the game data files
+        Inputs: folder - folder to search for game data files (*.csv), including sub folders
+                files - optional list of game data files to load instead of (or in addition to) the files in folder
+                jobs - number of worker processes to parse with (None = one per CPU, 1 = parse in this process)
+                cache - optional football_game_cache.Game_Cache object so unchanged files are not parsed again
+                keep_tree_lists - False to not keep the list of every passing tree root and tip in each game, which
+                                  bounds the memory used per game in large batches (the root and tip counts are kept)
+                dense_graphs - True to keep each game's passing graphs as fgd.Dense_Passing_Graph objects, which are
+                               smaller and faster to build and pickle than networkx graphs
+                lazy - True to only index each game data file and parse a section the first time it is used, which
+                       makes loading a batch only to list scores or headers nearly instant
+        """
+        self.folder = folder
+        self.jobs = jobs
+        self.cache = cache
+        self.keep_tree_lists = keep_tree_lists
+        self.dense_graphs = dense_graphs
+        self.lazy = lazy
+        self.game_files = []                          # list of game data files to load, in the order the games are returned
+        if folder != None:
+            self.game_files.extend(find_game_files(folder))
+        if files != None:
+            self.game_files.extend(files)
+        self.games = []                               # list of Game_Data objects that were loaded, in game_files order
+        self.errors = {}                              # dictionary of files that failed to load (file name: error message)
+        self.skipped_heat_maps = []                   # (file name, team, half) of the heat maps team_heat_maps left out
+
+    def load(self):
+        """Description: Parses all of the game data files, in parallel if more than one job is allowed
+        Inputs: None
+        Outputs:
+            Fills self.games with the Game_Data objects in the same order as self.game_files and self.errors
+            with the files that could not be parsed. A bad file does not stop the rest of the batch.
+            Returns - self.games
+        """
+        self.games = []
+        self.errors = {}
+        jobs = self.jobs
+        if jobs == None:
+            jobs = os.cpu_count() or 1
+        jobs = max(1, min(jobs, len(self.game_files)))
+
+        if jobs == 1:
+            results = map(__load_game__, self.game_files, repeat(self.cache), repeat(self.keep_tree_lists), repeat(self.dense_graphs), repeat(self.lazy))
+            self.__collect_results__(results, False)
+        else:
+            # hand the files out in chunks so the per task overhead stays small for big batches
+            chunk_size = max(1, len(self.game_files) // (jobs * 4))
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                results = executor.map(__load_game__, self.game_files, repeat(self.cache), repeat(self.keep_tree_lists), repeat(self.dense_graphs), repeat(self.lazy), chunksize=chunk_size)
+                self.__collect_results__(results, True)
+        if self.cache != None:
+            self.cache.evict()
+        return(self.games)
+
+    def __collect_results__(self, results, worker_processes):
+        """Description: Collects the worker results into self.games and self.errors
+        Inputs: results - iterable of tuples returned by __load_game__, in game_files order
+                worker_processes - True if the results came from worker processes, which count cache hits and
+                                   misses on their own copies of the cache
+        Outputs:
+            Appends to self.games and self.errors and updates the cache counters
+        """
+        hits = 0
+        total = 0
+        for file_name, game, error, cache_hit in results:
+            if error == None:
+                self.games.append(game)
+            else:
+                self.errors[file_name] = error
+            if cache_hit:
+                hits = hits + 1
+            total = total + 1
+        if self.cache != None and worker_processes:
+            self.cache.hits = self.cache.hits + hits
+            self.cache.misses = self.cache.misses + total - hits
+
+    def team_heat_maps(self, average=False, halves=fgd.HALVES):
+        """Description: Combines the heat maps of every game into one heat map per team, with every half turned so the
+        team attacks in the same direction (see Heat_Map_Stats.aggregate)
+        Inputs: average - False to add the heat maps, True to average them over the team's halves
+                halves - the halves to include
+        Outputs:
+            Returns - dictionary (team name: Heat_Map_Stats object); halves without heat map data are left out, and
+                      so are halves whose defending zone isn't known (listed in self.skipped_heat_maps)
+        """
+        heat_maps = {}
+        self.skipped_heat_maps = []
+        for game in self.games:
+            for half in halves:
+                for team, team_prefix in ((game.home_team, "homeTeam"), (game.away_team, "awayTeam")):
+                    heat_map = getattr(game, team_prefix + half + "Heat_map_stats")
+                    if not heat_map.zones.any():
+                        continue
+                    defending_zone = __defending_zone__(game, team_prefix, half)
+                    if defending_zone == None:
+                        self.skipped_heat_maps.append((game.file_name, team, half))
+                        continue
+                    if defending_zone != heat_map.team_defending_zone:
+                        # a copy with the inferred zone, the game's heat map is left as it was read
+                        inferred = fgd.Heat_Map_Stats()
+                        inferred.zone_stats = heat_map.zone_stats
+                        inferred.zones = heat_map.zones
+                        inferred.set_team_defending_zone(defending_zone)
+                        heat_map = inferred
+                    heat_maps.setdefault(team, []).append(heat_map)
+        return({team: fgd.Heat_Map_Stats.aggregate(heat_maps[team], average) for team in heat_maps})
+
+    def passing_network(self, team=None, halves=fgd.HALVES, start_date=None, end_date=None, nodes=None):
+        """Description: Combines the passing graphs of the games into one passing network
+        Inputs: team - name of the team to include (None = include both teams of every game)
+                halves - the halves to include
+                start_date - optional first game date to include (datetime.date or string such as 2018-05-19)
+                end_date - optional last game date to include (datetime.date or string such as 2018-05-19)
+                nodes - optional list of nodes to give the first indexes in the network (see Passing_Network)
+        Outputs:
+            Returns - Passing_Network object; games without a known date are left out if a date range is given
+        """
+        start_date = __as_date__(start_date)
+        end_date = __as_date__(end_date)
+        network = Passing_Network(nodes)
+        for game in self.games:
+            if start_date != None or end_date != None:
+                date = game_date(game)
+                if date == None or (start_date != None and date < start_date) or (end_date != None and date > end_date):
+                    continue
+            for team_name, team_prefix in ((game.home_team, "homeTeam"), (game.away_team, "awayTeam")):
+                if team != None and team_name != team:
+                    continue
+                for half in halves:
+                    network.add_graph(getattr(game, team_prefix + half + "Passing_graph"))
+        return(network)
+
+    def __len__(self):
+        return(len(self.games))
+
+    def __iter__(self):
+        return(iter(self.games))
+
+    def __getitem__(self, index):
+        return(self.games[index])
@@ -0,0 +1,287 @@
+import argparse
+import numpy as np
+import football_game_data as fgd
+import football_game_season as fgs
+
+TEAMS = ("homeTeam", "awayTeam")
+# largest key of the node number rows (n-grams or chains) packed into one int64, longer rows are compared column by column
+__MAX_PACKED_KEY__ = 2 ** 62
+
+class Passing_Sequences(object):
+    """Description: This class is used to analyze the passing sequences (the full passing tree branches) of many team
+    halves at once. The sequences of every Passing_Stats added are renumbered into one node numbering and kept in one
+    flat array with offsets, so the analyses are numpy operations over all the sequences instead of Python loops.
+    """
+    def __init__(self):
+        self.nodes = []                               # nodes in node number order
+        self.node_numbers = {}                        # dictionary (node: node number)
+        self.sources = []                             # label of each Passing_Stats added, e.g. (file name, team, half)
+        self.__data_parts__ = []                      # node number arrays of each Passing_Stats added
+        self.__length_parts__ = []                    # sequence length arrays of each Passing_Stats added
+        self.__arrays__ = None                        # (data, offsets, source) built from the parts, None after add
+
+    def __node_number__(self, node):
+        if node not in self.node_numbers:
+            self.node_numbers[node] = len(self.nodes)
+            self.nodes.append(node)
+        return(self.node_numbers[node])
+
+    def add(self, passing_stats, label=None):
+        """Description: Adds the passing sequences of one team half
+        Inputs: passing_stats - fgd.Passing_Stats object (made with keep_tree_lists, otherwise it has no sequences)
+                label - label of the sequences, e.g. (file name, team, half)
+        Outputs:
+            Returns - number of sequences added
+        """
+        nodes, numbers, offsets = passing_stats.passing_sequences()
+        # renumber the nodes of the Passing_Stats into this object's numbering with one lookup array
+        renumber = np.array([self.__node_number__(node) for node in nodes], dtype=np.int32)
+        self.__data_parts__.append(renumber[numbers] if len(numbers) > 0 else np.zeros(0, dtype=np.int32))
+        self.__length_parts__.append(np.diff(offsets))
+        self.sources.append(label)
+        self.__arrays__ = None
+        return(len(offsets) - 1)
+
+    def add_game(self, game, team=None, halves=fgd.HALVES):
+        """Description: Adds the passing sequences of a game
+        Inputs: game - Game_Data object
+                team - name of the team to add the sequences of, None for both teams
+                halves - halves to add
+        Outputs:
+            Returns - number of sequences added
+        """
+        count = 0
+        for team_attribute, team_name in zip(TEAMS, (game.home_team, game.away_team)):
+            if team != None and team != team_name:
+                continue
+            for half in halves:
+                count = count + self.add(getattr(game, team_attribute + half + "Passing_stats"), (game.file_name, team_name, half))
+        return(count)
+
+    def arrays(self):
+        """Description: Gets the sequences as flat arrays
+        Inputs: None
+        Outputs:
+            Returns - tuple (int32 array of node numbers, int64 array of sequence offsets, int32 array of the number of
+                      the source (index of self.sources) of each sequence), sequence i is
+                      data[offsets[i]:offsets[i+1]] from the root to the tip
+        """
+        if self.__arrays__ == None:
+            lengths = [np.asarray(part, dtype=np.int64) for part in self.__length_parts__]
+            data = np.concatenate(self.__data_parts__) if self.__data_parts__ else np.zeros(0, dtype=np.int32)
+            offsets = np.concatenate(([0], np.cumsum(np.concatenate(lengths)))) if lengths else np.zeros(1, dtype=np.int64)
+            source = np.repeat(np.arange(len(lengths), dtype=np.int32), [len(part) for part in lengths])
+            self.__arrays__ = (data.astype(np.int32, copy=False), offsets.astype(np.int64, copy=False), source)
+        return(self.__arrays__)
+
+    def __len__(self):
+        return(len(self.arrays()[1]) - 1)
+
+    def lengths(self):
+        """Description: Returns the number of nodes of each sequence (the passes of a sequence are one less)"""
+        offsets = self.arrays()[1]
+        return(np.diff(offsets))
+
+    def sequence(self, i):
+        """Description: Returns sequence i as a list of nodes from the root to the tip"""
+        data, offsets, source = self.arrays()
+        return([self.nodes[n] for n in data[offsets[i]:offsets[i + 1]].tolist()])
+
+    def subset(self, indexes):
+        """Description: Makes a Passing_Sequences object with some of the sequences, e.g. the sequences ending_with
+        returns, to run the other analyses on
+        Inputs: indexes - sequence numbers or boolean mask of the sequences to keep
+        Outputs:
+            Returns - Passing_Sequences object with the same nodes and sources
+        """
+        data, offsets, source = self.arrays()
+        indexes = np.arange(len(self))[indexes]
+        lengths = np.diff(offsets)[indexes]
+        starts = offsets[indexes]
+        # positions of the nodes of the kept sequences: the start of each sequence repeated, plus 0 to length - 1
+        new_offsets = np.concatenate(([0], np.cumsum(lengths)))
+        positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+        sequences = Passing_Sequences()
+        sequences.nodes = list(self.nodes)
+        sequences.node_numbers = dict(self.node_numbers)
+        sequences.sources = list(self.sources)
+        sequences.__arrays__ = (data[positions], new_offsets.astype(np.int64), source[indexes])
+        sequences.__data_parts__ = [sequences.__arrays__[0]]
+        sequences.__length_parts__ = [lengths]
+        return(sequences)
+
+    def ending_with(self, end_nodes):
+        """Description: Finds the sequences whose tip is one of the end nodes
+        Inputs: end_nodes - nodes the sequences have to end with, e.g. the forwards ("9", "11") or the node the recorder
+                            uses for a shot (the data files have no shot node of their own)
+        Outputs:
+            Returns - sorted int64 array of the sequence numbers, raises ValueError if there are sequences but none of
+                      the end nodes is in any of them
+        """
+        data, offsets, source = self.arrays()
+        end_numbers = [self.node_numbers[node] for node in end_nodes if node in self.node_numbers]
+        if not end_numbers and self.nodes:
+            raise ValueError("none of the end nodes are in the passing sequences: " + ", ".join(str(node) for node in end_nodes))
+        lengths = np.diff(offsets)
+        tips = np.full(len(lengths), -1, dtype=np.int32)
+        tips[lengths > 0] = data[offsets[1:][lengths > 0] - 1]
+        return(np.flatnonzero(np.isin(tips, end_numbers)))
+
+    def shot_sequences(self, end_nodes):
+        """Description: Returns the sequences that end in a shot, i.e. with one of end_nodes, as a Passing_Sequences
+        object (see ending_with)"""
+        return(self.subset(self.ending_with(end_nodes)))
+
+    def __count_rows__(self, rows):
+        """Description: Counts the distinct rows of a 2D array of node numbers
+        Inputs: rows - rows x n array of node numbers
+        Outputs:
+            Returns - tuple (distinct rows x n int32 array in node number order, int64 array of the number of times each
+                      occurs)
+        """
+        n = rows.shape[1]
+        base = max(len(self.nodes), 1)
+        if base ** n < __MAX_PACKED_KEY__:
+            # pack each row into one int64 so counting is one sort of a flat array
+            keys = np.zeros(len(rows), dtype=np.int64)
+            for j in range(n):
+                keys = keys * base + rows[:, j]
+            unique_keys, counts = np.unique(keys, return_counts=True)
+            unique_rows = np.zeros((len(unique_keys), n), dtype=np.int32)
+            for j in reversed(range(n)):
+                unique_keys, unique_rows[:, j] = np.divmod(unique_keys, base)
+            return((unique_rows, counts))
+        unique_rows, counts = np.unique(rows, axis=0, return_counts=True)
+        return((unique_rows.astype(np.int32), counts))
+
+    def ngrams(self, n):
+        """Description: Counts every run of n consecutive nodes within the sequences (n-gram motifs), e.g. n=3 counts
+        each two pass combination such as ("6A", "8A", "9A")
+        Inputs: n - number of nodes in the n-grams
+        Outputs:
+            Returns - tuple (n-grams x n int32 array of node numbers, int64 array of the number of times each occurs),
+                      n-grams in node number order
+        """
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        data, offsets, source = self.arrays()
+        # an n-gram starts at every position that has n - 1 more nodes in its sequence
+        ends = np.repeat(offsets[1:], np.diff(offsets))
+        starts = np.flatnonzero(np.arange(len(data)) + n <= ends)
+        return(self.__count_rows__(data[starts[:, None] + np.arange(n)]))
+
+    def __top__(self, grams, counts, k, min_count):
+        # the k most frequent rows of grams as (tuple of nodes, count), ties in node number order
+        keep = np.flatnonzero(counts >= min_count)
+        order = keep[np.argsort(-counts[keep], kind="stable")]
+        if k != None:
+            order = order[:k]
+        return([(tuple(self.nodes[n] for n in grams[i] if n >= 0), int(counts[i])) for i in order.tolist()])
+
+    def motifs(self, n=3, k=10, min_count=1):
+        """Description: Finds the most frequent n-gram motifs (see ngrams)
+        Inputs: n - number of nodes in the motifs
+                k - number of motifs to return, None for all
+                min_count - least number of times a motif has to occur
+        Outputs:
+            Returns - list of (tuple of nodes, number of times it occurs), most frequent first
+        """
+        grams, counts = self.ngrams(n)
+        return(self.__top__(grams, counts, k, min_count))
+
+    def frequent_chains(self, min_passes=2, k=10, min_count=2):
+        """Description: Finds the most frequent complete passing chains (whole sequences from the root to the tip)
+        Inputs: min_passes - least number of passes in a chain
+                k - number of chains to return, None for all
+                min_count - least number of times a chain has to occur
+        Outputs:
+            Returns - list of (tuple of nodes, number of times it occurs), most frequent first
+        """
+        data, offsets, source = self.arrays()
+        lengths = np.diff(offsets)
+        all_grams = []
+        all_counts = []
+        # sequences of one length are rows of a 2D array, so each length is counted with one np.unique
+        for length in np.unique(lengths[lengths >= min_passes + 1]).tolist():
+            starts = offsets[:-1][lengths == length]
+            chains, counts = self.__count_rows__(data[starts[:, None] + np.arange(length)])
+            padded = np.full((len(chains), lengths.max()), -1, dtype=np.int32)
+            padded[:, :length] = chains
+            all_grams.append(padded)
+            all_counts.append(counts)
+        if not all_grams:
+            return([])
+        return(self.__top__(np.concatenate(all_grams), np.concatenate(all_counts), k, min_count))
+
+    def mean_length_by_root(self, min_sequences=1):
+        """Description: Gets the average number of passes of the sequences started by each node (player or position)
+        Inputs: min_sequences - least number of sequences a node has to start to be included
+        Outputs:
+            Returns - list of (node, number of sequences started, mean passes per sequence), most sequences first
+        """
+        data, offsets, source = self.arrays()
+        lengths = np.diff(offsets)
+        started = lengths > 0
+        roots = data[offsets[:-1][started]]
+        sequences = np.bincount(roots, minlength=len(self.nodes))
+        passes = np.bincount(roots, weights=lengths[started] - 1, minlength=len(self.nodes))
+        order = np.argsort(-sequences, kind="stable")
+        return([(self.nodes[n], int(sequences[n]), float(passes[n] / sequences[n])) for n in order.tolist()
+                if sequences[n] >= max(min_sequences, 1)])
+
+    def by_source(self):
+        """Description: Counts the sequences of each source
+        Inputs: None
+        Outputs:
+            Returns - dictionary (source label: number of sequences)
+        """
+        counts = np.bincount(self.arrays()[2], minlength=len(self.sources))
+        return({self.sources[i]: int(count) for i, count in enumerate(counts.tolist())})
+
+def from_games(games, team=None, halves=fgd.HALVES):
+    """Description: Collects the passing sequences of a collection of games
+    Inputs: games - iterable of Game_Data objects (e.g. a football_game_season.Season)
+            team, halves - see Passing_Sequences.add_game
+    Outputs:
+        Returns - Passing_Sequences object
+    """
+    sequences = Passing_Sequences()
+    for game in games:
+        sequences.add_game(game, team, halves)
+    return(sequences)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the frequent passing chains and motifs of a folder of football games")
+    parser.add_argument("folder", help="folder of game data files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes to parse with")
+    parser.add_argument("--team", default=None, help="only use the sequences of this team")
+    parser.add_argument("--half", choices=fgd.HALVES, default=None, help="only use the sequences of this half")
+    parser.add_argument("-n", type=int, default=3, help="number of nodes in the motifs")
+    parser.add_argument("-k", type=int, default=10, help="number of motifs and chains to print")
+    parser.add_argument("--end-nodes", nargs="*", default=None, help="only use the sequences ending with one of these nodes (e.g. the forwards)")
+    args = parser.parse_args(argv)
+
+    season = fgs.Season(args.folder, jobs=args.jobs)
+    season.load()
+    for file_name in season.errors:
+        print(file_name + ": " + season.errors[file_name])
+    sequences = from_games(season, args.team, (args.half,) if args.half != None else fgd.HALVES)
+    if args.end_nodes != None:
+        try:
+            sequences = sequences.shot_sequences(args.end_nodes)
+        except ValueError as e:
+            parser.error(str(e))
+    print(str(len(sequences)) + " passing sequences")
+    print("\nMost frequent " + str(args.n) + " node motifs:")
+    for nodes, count in sequences.motifs(args.n, args.k):
+        print("  " + " -> ".join(nodes) + ": " + str(count))
+    print("\nMost frequent passing chains:")
+    for nodes, count in sequences.frequent_chains(k=args.k):
+        print("  " + " -> ".join(nodes) + ": " + str(count))
+    print("\nMean passes by starting node:")
+    for node, count, mean_passes in sequences.mean_length_by_root():
+        print("  " + node + ": " + str(count) + " sequences, " + str(round(mean_passes, 2)) + " passes")
+    return(0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
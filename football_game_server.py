@@ -0,0 +1,408 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+import football_game_data as fgd
+import football_game_season as fgs
+import football_game_analysis as fga
+import football_game_cache as fgc
+
+MAX_HEADER_BYTES = 16384                              # requests with a longer request line and headers are refused
+FIND_GAMES_INTERVAL = 5.0                             # least seconds between two searches of the game folder for new games
+GAME_CHECK_INTERVAL = 1.0                             # least seconds between two checks of a cached game's data file
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+# game routes that return JSON (route: football_game_analysis results function)
+STATS_ROUTES = {"score": fga.score_results,
+                "stats": fga.stats_results,
+                "passing": fga.passing_results,
+                "heatmap": fga.heat_map_results}
+
+class Game_LRU(object):
+    """Description: This class is used to keep the most recently used Game_Data objects in memory. A game is parsed
+    again if its data file changed since it was loaded.
+    """
+    def __init__(self, max_games=64, check_interval=0):
+        """Description: Creates the cache
+        Inputs: max_games - maximum number of games to keep, the least recently used game is dropped first
+                check_interval - least seconds between two checks of a cached game's data file for changes (0 = check
+                                 every time the game is used)
+        """
+        self.max_games = max_games
+        self.check_interval = check_interval
+        self.games = OrderedDict()                    # dictionary (file name: [file size and mtime, Game_Data, time checked]), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def __file_stat__(self, file_name):
+        stat = os.stat(file_name)
+        return((stat.st_size, stat.st_mtime_ns))
+
+    def get(self, file_name):
+        """Description: Returns a cached game if its data file has not changed
+        Inputs: file_name - the game data file
+        Outputs:
+            Returns - Game_Data object or None if the game is not cached
+        """
+        entry = self.games.get(file_name)
+        if entry == None:
+            return(None)
+        now = time.monotonic()
+        if now - entry[2] >= self.check_interval:
+            if entry[0] != self.__file_stat__(file_name):
+                return(None)
+            entry[2] = now
+        self.games.move_to_end(file_name)
+        self.hits = self.hits + 1
+        return(entry[1])
+
+    def load(self, file_name):
+        """Description: Returns a game, parsing it and adding it to the cache if it is not cached
+        Inputs: file_name - the game data file
+        Outputs:
+            Returns - Game_Data object
+        """
+        game = self.get(file_name)
+        if game == None:
+            file_stat = self.__file_stat__(file_name)
+            game = fgd.Game_Data(file_name)
+            self.put(file_name, file_stat, game)
+        return(game)
+
+    def put(self, file_name, file_stat, game):
+        """Description: Adds a parsed game to the cache
+        Inputs: file_name - the game data file
+                file_stat - (size, mtime in ns) of the file before it was parsed
+                game - Game_Data object
+        Outputs:
+            Adds the game, dropping the least recently used games over max_games
+        """
+        self.misses = self.misses + 1
+        self.games[file_name] = [file_stat, game, time.monotonic()]
+        self.games.move_to_end(file_name)
+        while len(self.games) > self.max_games:
+            self.games.popitem(last=False)
+
+    def stats(self):
+        return({"games": len(self.games), "max_games": self.max_games, "hits": self.hits, "misses": self.misses})
+
+def __parse_game__(file_name):
+    # reads the file stat and parses a game, run on a thread so the event loop keeps answering other connections
+    stat = os.stat(file_name)
+    return(((stat.st_size, stat.st_mtime_ns), fgd.Game_Data(file_name)))
+
+# Render worker processes
+# each worker keeps its own small game cache, so a game that is rendered again is not parsed again
+__worker_games__ = None
+
+def __init_render_worker__(max_games):
+    global __worker_games__
+    import matplotlib
+    matplotlib.use("Agg")
+    __worker_games__ = Game_LRU(max_games)
+
+def __render_image__(file_name, image_type, options):
+    """Description: Worker function that renders a PNG image of a game
+    Inputs: file_name - the game data file
+            image_type - "heatmap" or "passing"
+            options - dictionary of the image options (team, half, dpi and map_type or weight and omit)
+    Outputs:
+        Returns - the PNG image (bytes)
+    """
+    game = __worker_games__.load(file_name)
+    if image_type == "heatmap":
+        image = game.heat_map_image(options["team"], options["half"], options["map_type"], dpi=options["dpi"])
+    else:
+        image = game.passing_graph_image(options["team"], options["half"], options["weight"], options["omit"], dpi=options["dpi"])
+    return(image.getvalue())
+
+class Request_Error(Exception):
+    """Description: Raised while handling a request to answer with an HTTP error status"""
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+def __query_value__(query, name, default, values=None, convert=str):
+    # one query string value, converted and checked against the allowed values
+    if name not in query:
+        return(default)
+    try:
+        value = convert(query[name][-1])
+    except ValueError:
+        raise Request_Error(400, "bad value for " + name + ": " + query[name][-1])
+    if values != None and value not in values:
+        raise Request_Error(400, name + " must be one of " + ", ".join(str(v) for v in values))
+    return(value)
+
+class Stats_Server(object):
+    """Description: This class is a local HTTP service that serves the stats of a folder of games as JSON and their
+    heat maps and passing graphs as PNG images. Stats are answered from a Game_LRU in the event loop (games that are
+    not cached are parsed on a thread), images are rendered by a pool of worker processes so they don't hold up the
+    stats requests.
+
+    Routes (GET, game is the name of a game data file without .csv):
+        /games                                  list of the games
+        /games/<game>/score, /stats, /passing, /heatmap
+                                                results of the football_game_analysis command of the same name
+        /games/<game>/heatmap.png?team=B&half=1&type=P&dpi=100
+        /games/<game>/passing.png?team=H&half=1&weight=1&omit=0&dpi=100
+        /status                                 cache and request counters
+    """
+    def __init__(self, game_folder, host="127.0.0.1", port=8080, max_games=64, render_jobs=None, image_cache_dir=None, max_image_bytes=64*1024*1024):
+        """Description: Creates the service, call start() or serve_forever() to start it
+        Inputs: game_folder - folder of the game data files to serve (searched with its sub folders)
+                host, port - address to listen on
+                max_games - number of parsed games kept in memory
+                render_jobs - number of image render worker processes (None = one per CPU)
+                image_cache_dir - optional folder to keep the rendered images in between runs
+                max_image_bytes - maximum total size of the rendered images kept in memory
+        """
+        self.game_folder = game_folder
+        self.host = host
+        self.port = port
+        # cached games are checked for changes at most every GAME_CHECK_INTERVAL, so most requests don't stat a file
+        self.games = Game_LRU(max_games, GAME_CHECK_INTERVAL)
+        self.images = fgc.Image_Cache(image_cache_dir, max_image_bytes)
+        self.__rendering__ = {}                       # dictionary (image key: task rendering the image)
+        self.__loading__ = {}                         # dictionary (file name: task parsing the game)
+        self.render_jobs = render_jobs if render_jobs != None else (os.cpu_count() or 1)
+        self.game_files = {}                          # dictionary (game name: game data file)
+        self.requests = 0
+        self.errors = 0
+        self.server = None
+        self.render_pool = None
+        self.__games_found__ = 0                      # time.monotonic() of the last search of the game folder
+        self.__finding__ = None                       # task searching the game folder, None when no search is running
+        self.find_games()
+
+    def find_games(self):
+        """Description: Finds the game data files in the game folder again, e.g. after games were added"""
+        self.__games_found__ = time.monotonic()
+        self.game_files = {os.path.splitext(os.path.basename(f))[0]: f for f in fgs.find_game_files(self.game_folder)}
+
+    async def refresh_games(self):
+        """Description: Searches the game folder again on a thread, at most once every FIND_GAMES_INTERVAL seconds, so
+        requests for unknown games don't each walk the folder in the event loop. Requests that come while a search is
+        running wait for that search.
+        """
+        if self.__finding__ == None:
+            if time.monotonic() - self.__games_found__ < FIND_GAMES_INTERVAL:
+                return
+            self.__finding__ = asyncio.ensure_future(asyncio.get_running_loop().run_in_executor(None, self.find_games))
+            self.__finding__.add_done_callback(lambda task: setattr(self, "__finding__", None))
+        await asyncio.shield(self.__finding__)
+
+    async def start(self):
+        # the workers are started by a fork server (or spawned) instead of forked from the service, so they don't
+        # inherit its listening and client sockets and keep connections open after the service closes them
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.render_pool = ProcessPoolExecutor(max_workers=self.render_jobs, mp_context=multiprocessing.get_context(start_method),
+                                               initializer=__init_render_worker__, initargs=(8,))
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return(self.server)
+
+    async def serve_forever(self):
+        if self.server == None:
+            await self.start()
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self.server != None:
+            self.server.close()
+        if self.render_pool != None:
+            self.render_pool.shutdown(wait=False, cancel_futures=True)
+            self.render_pool = None
+
+    async def __game_file__(self, name):
+        if name not in self.game_files:
+            await self.refresh_games()
+        if name not in self.game_files:
+            raise Request_Error(404, "unknown game: " + name)
+        return(self.game_files[name])
+
+    async def load_game(self, file_name):
+        """Description: Returns a game from the game cache, parsing it on a thread if it is not cached so other
+        connections are answered meanwhile. Requests for a game that is already being parsed wait for that parse.
+        Inputs: file_name - the game data file
+        Outputs:
+            Returns - Game_Data object
+        """
+        game = self.games.get(file_name)
+        if game != None:
+            return(game)
+        if file_name not in self.__loading__:
+            self.__loading__[file_name] = asyncio.ensure_future(self.__load__(file_name))
+        return(await asyncio.shield(self.__loading__[file_name]))
+
+    async def __load__(self, file_name):
+        # parses a game on the default thread pool and adds it to the game cache
+        try:
+            file_stat, game = await asyncio.get_running_loop().run_in_executor(None, __parse_game__, file_name)
+            self.games.put(file_name, file_stat, game)
+            return(game)
+        finally:
+            del self.__loading__[file_name]
+
+    async def route(self, path, query):
+        """Description: Answers one GET request
+        Inputs: path - the URL path
+                query - dictionary of the query string values (parse_qs)
+        Outputs:
+            Returns - tuple (content type, body bytes), raises Request_Error for errors
+        """
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts == ["games"]:
+            await self.refresh_games()
+            games = [{"game": name, "date": str(fgs.__parse_date__(name.split("_")[0]) or "")} for name in sorted(self.game_files)]
+            return(self.__json__(games))
+        if parts == ["status"]:
+            return(self.__json__({"requests": self.requests, "errors": self.errors, "games": len(self.game_files),
+                                  "cache": self.games.stats(), "image_cache": self.images.stats(), "render_jobs": self.render_jobs}))
+        if len(parts) != 3 or parts[0] != "games":
+            raise Request_Error(404, "unknown route: " + path)
+
+        file_name = await self.__game_file__(parts[1])
+        resource = parts[2]
+        if resource in STATS_ROUTES:
+            game = await self.load_game(file_name)
+            return(self.__json__(STATS_ROUTES[resource](game)))
+        if resource in ("heatmap.png", "passing.png"):
+            half = __query_value__(query, "half", 1, (1, 2), int)
+            dpi = __query_value__(query, "dpi", 100, None, int)
+            if dpi < 10 or dpi > 600:
+                raise Request_Error(400, "dpi must be from 10 to 600")
+            if resource == "heatmap.png":
+                image_type = "heatmap"
+                options = {"team": __query_value__(query, "team", "B", ("H", "A", "B")), "half": half, "dpi": dpi,
+                           "map_type": __query_value__(query, "type", "P", ("S", "P", "L"))}
+            else:
+                image_type = "passing"
+                options = {"team": __query_value__(query, "team", "H", ("H", "A")), "half": half, "dpi": dpi,
+                           "weight": __query_value__(query, "weight", 1, None, int),
+                           "omit": __query_value__(query, "omit", 0, (0, 1), int) == 1}
+            # images that were rendered before are answered from the image cache without going to the workers, the
+            # game file hash and the cache folder reads are done on a thread so they don't hold up the event loop
+            game = await self.load_game(file_name)
+            key, image = await asyncio.get_running_loop().run_in_executor(None, self.__cached_image__, game, image_type, options)
+            if image == None:
+                # requests for an image that is already being rendered wait for that render
+                if key not in self.__rendering__:
+                    self.__rendering__[key] = asyncio.ensure_future(self.__render__(key, file_name, image_type, options))
+                image = await asyncio.shield(self.__rendering__[key])
+            return(("image/png", image))
+        raise Request_Error(404, "unknown route: " + path)
+
+    def __cached_image__(self, game, image_type, options):
+        # the image cache key of an image and the image if it is cached (None if not)
+        if image_type == "heatmap":
+            key = self.images.heat_map_key(game, options["team"], options["half"], options["map_type"], options["dpi"])
+        else:
+            key = self.images.passing_graph_key(game, options["team"], options["half"], options["weight"], options["omit"], options["dpi"])
+        return((key, self.images.get(key)))
+
+    async def __render__(self, key, file_name, image_type, options):
+        # renders an image on the worker pool and adds it to the image cache (written to the cache folder on a thread)
+        try:
+            loop = asyncio.get_running_loop()
+            image = await loop.run_in_executor(self.render_pool, __render_image__, file_name, image_type, options)
+            await loop.run_in_executor(None, self.images.put, key, image)
+            return(image)
+        finally:
+            del self.__rendering__[key]
+
+    def __json__(self, value):
+        return(("application/json", json.dumps(value, default=fga.__json_value__).encode("utf-8")))
+
+    async def handle_connection(self, reader, writer):
+        """Description: Answers the requests of one connection, which is kept open between requests (HTTP/1.1) until
+        the client closes it or asks for it to be closed
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.__respond__(writer, 400, "text/plain", b"request too long", False)
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    await self.__respond__(writer, 400, "text/plain", b"request too long", False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                request_line = lines[0].split(" ")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if len(request_line) != 3:
+                    await self.__respond__(writer, 400, "text/plain", b"bad request line", False)
+                    break
+                method, target, version = request_line
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                # request bodies are not used, but are read so the next request on the connection starts in the right place
+                body_length = int(headers.get("content-length", "0") or 0)
+                if body_length > 0:
+                    await reader.readexactly(body_length)
+
+                self.requests = self.requests + 1
+                if method != "GET":
+                    status, content_type, body = 405, "text/plain", b"only GET is supported"
+                else:
+                    url = urlsplit(target)
+                    try:
+                        content_type, body = await self.route(url.path, parse_qs(url.query))
+                        status = 200
+                    except Request_Error as e:
+                        status, content_type, body = e.status, "text/plain", str(e).encode("utf-8")
+                    except Exception as e:
+                        status, content_type, body = 500, "text/plain", (type(e).__name__ + ": " + str(e)).encode("utf-8")
+                if status != 200:
+                    self.errors = self.errors + 1
+                await self.__respond__(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # the connection is dropped (cancelled when the service is closed with connections still open)
+            pass
+        finally:
+            writer.close()
+
+    async def __respond__(self, writer, status, content_type, body, keep_alive):
+        head = ("HTTP/1.1 " + str(status) + " " + HTTP_REASONS.get(status, "") + "\r\n" +
+                "Content-Type: " + content_type + "\r\n" +
+                "Content-Length: " + str(len(body)) + "\r\n" +
+                "Connection: " + ("keep-alive" if keep_alive else "close") + "\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the stats, heat maps and passing graphs of a folder of football games over HTTP")
+    parser.add_argument("folder", nargs="?", default=fga.DATA_FILE_FOLDER, help="folder of game data files")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--max-games", type=int, default=64, help="number of parsed games kept in memory")
+    parser.add_argument("--render-jobs", type=int, default=None, help="number of image render worker processes (default one per CPU)")
+    parser.add_argument("--image-cache", default=None, help="folder to keep rendered images in between runs")
+    args = parser.parse_args(argv)
+
+    server = Stats_Server(args.folder, args.host, args.port, args.max_games, args.render_jobs, args.image_cache)
+    print("Serving " + str(len(server.game_files)) + " games on http://" + args.host + ":" + str(args.port) + "/games")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return(0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+import argparse
+import os
+import numpy as np
+import football_game_data as fgd
+import football_game_season as fgs
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:                                   # pyarrow is optional, tables are written as NumPy .npy files without it
+    pyarrow = None
+
+# Season stats table, one row per game x team x period:
+#   game                    int32          - index of the game in the games the table was made from
+#   file                    str            - game data file name ("" if the game was not read from a file)
+#   date                    datetime64[D]  - date of the game (NaT if it is not known, see football_game_season.game_date)
+#   team, opponent          str
+#   home                    bool           - True for the home team row
+#   period                  str            - one of fgd.PERIODS
+#   formation               str            - formation name of the team in the period
+#   duration                int32          - period duration in minutes
+#   goals ... red_cards     int32          - the team's fgd.PERIOD_STATS stats in the period (lower case, "_" for " ")
+#   goals_against           int32          - the opponent's goals in the period
+#   total_passes, possession_instances, max_consecutive_passes
+#                           int32          - the team's Passing_Stats in the period, -1 for periods without passing
+#                                            stats (extra time) or if the table was made without passing stats
+STAT_COLUMNS = tuple(stat.lower().replace(" ", "_") for stat in fgd.PERIOD_STATS)
+PASSING_COLUMNS = ("total_passes", "possession_instances", "max_consecutive_passes")
+TEXT_COLUMNS = ("file", "team", "opponent", "period", "formation")
+TABLE_COLUMNS = (("game", np.int32), ("file", np.str_), ("date", "datetime64[D]"), ("team", np.str_),
+                 ("opponent", np.str_), ("home", np.bool_), ("period", np.str_), ("formation", np.str_),
+                 ("duration", np.int32)) + \
+                tuple((name, np.int32) for name in STAT_COLUMNS) + \
+                (("goals_against", np.int32),) + \
+                tuple((name, np.int32) for name in PASSING_COLUMNS)
+TABLE_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow", ".npy": "numpy"}
+
+PERIOD_DURATIONS = {"H1": "h1Duration", "H2": "h2Duration", "OT1": "ot1Duration", "OT2": "ot2Duration"}
+
+def stats_columns(games, periods=fgd.PERIODS, passing_stats=True):
+    """Description: Flattens the per period stats of a collection of games into typed columns
+    Inputs: games - iterable of Game_Data objects (e.g. a football_game_season.Season)
+            periods - periods to make rows for
+            passing_stats - False to leave the passing stats columns at -1, which keeps lazy games from parsing their
+                            passing trees
+    Outputs:
+        Returns - dictionary (column name: numpy array) with the columns in TABLE_COLUMNS order
+    """
+    columns = {name: [] for name, dtype in TABLE_COLUMNS}
+    for game_index, game in enumerate(games):
+        date = fgs.game_date(game)
+        file_name = game.file_name if game.file_name != None else ""
+        for team_index, team_prefix in enumerate(("homeTeam", "awayTeam")):
+            team = (game.home_team, game.away_team)[team_index]
+            opponent = (game.away_team, game.home_team)[team_index]
+            formation_names = getattr(game, team_prefix + "_formation_name")
+            goals_against = getattr(game, fgd.PERIOD_STATS["GOALS"][1 - team_index])
+            stats = [getattr(game, fgd.PERIOD_STATS[stat][team_index]) for stat in fgd.PERIOD_STATS]
+            for period in periods:
+                columns["game"].append(game_index)
+                columns["file"].append(file_name)
+                columns["date"].append(date)
+                columns["team"].append(team)
+                columns["opponent"].append(opponent)
+                columns["home"].append(team_index == 0)
+                columns["period"].append(period)
+                columns["formation"].append(formation_names.get(period, ""))
+                columns["duration"].append(getattr(game, PERIOD_DURATIONS[period]))
+                for name, values in zip(STAT_COLUMNS, stats):
+                    columns[name].append(values[period])
+                columns["goals_against"].append(goals_against[period])
+                if passing_stats and period in fgd.HALVES:
+                    passing = getattr(game, team_prefix + period + "Passing_stats")
+                    columns["total_passes"].append(passing.total_passes)
+                    columns["possession_instances"].append(passing.possession_instances)
+                    columns["max_consecutive_passes"].append(passing.max_consecutive_passes)
+                else:
+                    for name in PASSING_COLUMNS:
+                        columns[name].append(-1)
+
+    for name, dtype in TABLE_COLUMNS:
+        if name in TEXT_COLUMNS:
+            # fixed width strings so the columns compare and sort as arrays (at least 1 character wide)
+            width = max([len(value) for value in columns[name]] + [1])
+            columns[name] = np.array(columns[name], dtype="U" + str(width))
+        else:
+            columns[name] = np.array(columns[name], dtype=dtype)
+    return(columns)
+
+def columns_to_table(columns):
+    """Description: Makes a NumPy structured array from a dictionary of columns
+    Inputs: columns - dictionary (column name: numpy array) as returned by stats_columns
+    Outputs:
+        Returns - numpy structured array with one field per column
+    """
+    rows = len(next(iter(columns.values()))) if columns else 0
+    table = np.zeros(rows, dtype=[(name, columns[name].dtype) for name in columns])
+    for name in columns:
+        table[name] = columns[name]
+    return(table)
+
+def stats_table(games, periods=fgd.PERIODS, passing_stats=True):
+    """Description: Flattens the per period stats of a collection of games into a NumPy structured array, so games
+    can be filtered and grouped with array operations (e.g. table[table["team"] == name]["goals"].sum())
+    Inputs: games - iterable of Game_Data objects (e.g. a football_game_season.Season)
+            periods - periods to make rows for
+            passing_stats - see stats_columns
+    Outputs:
+        Returns - numpy structured array with the TABLE_COLUMNS fields, one row per game x team x period
+    """
+    return(columns_to_table(stats_columns(games, periods, passing_stats)))
+
+def to_arrow(table):
+    """Description: Converts a stats table to a pyarrow Table (requires pyarrow)
+    Inputs: table - numpy structured array or dictionary of columns
+    Outputs:
+        Returns - pyarrow.Table with the same columns
+    """
+    if pyarrow == None:
+        raise ImportError("pyarrow is needed to make Arrow tables")
+    names = table.dtype.names if isinstance(table, np.ndarray) else list(table)
+    return(pyarrow.table({name: pyarrow.array(np.asarray(table[name])) for name in names}))
+
+def from_arrow(arrow_table):
+    """Description: Converts a pyarrow Table back to a NumPy structured array
+    Inputs: arrow_table - pyarrow.Table
+    Outputs:
+        Returns - numpy structured array
+    """
+    columns = {}
+    for name in arrow_table.column_names:
+        values = arrow_table.column(name).to_numpy(zero_copy_only=False)
+        if values.dtype == object:
+            values = np.array(values.tolist(), dtype=np.str_) if len(values) > 0 else np.zeros(0, dtype="U1")
+        columns[name] = values
+    return(columns_to_table(columns))
+
+def write_stats_table(table, file_name):
+    """Description: Writes a stats table to a file, as Parquet (.parquet) or Arrow IPC (.arrow / .feather) if pyarrow
+    is installed and as a NumPy .npy file otherwise
+    Inputs: table - numpy structured array or dictionary of columns
+            file_name - file to write, the format comes from the extension (see TABLE_FORMATS)
+    Outputs:
+        Returns - name of the file written, which has a .npy extension instead if pyarrow is not installed
+    """
+    base, extension = os.path.splitext(file_name)
+    table_format = TABLE_FORMATS.get(extension.lower())
+    if table_format == None:
+        raise ValueError("unknown stats table format: " + file_name)
+    if table_format != "numpy" and pyarrow == None:
+        table_format = "numpy"
+        file_name = base + ".npy"
+
+    if table_format == "parquet":
+        pyarrow.parquet.write_table(to_arrow(table), file_name)
+    elif table_format == "arrow":
+        pyarrow.feather.write_feather(to_arrow(table), file_name)
+    else:
+        if not isinstance(table, np.ndarray):
+            table = columns_to_table(table)
+        np.save(file_name, table, allow_pickle=False)
+    return(file_name)
+
+def read_stats_table(file_name):
+    """Description: Reads a stats table written by write_stats_table
+    Inputs: file_name - the stats table file
+    Outputs:
+        Returns - numpy structured array
+    """
+    table_format = TABLE_FORMATS.get(os.path.splitext(file_name)[1].lower())
+    if table_format == "parquet":
+        return(from_arrow(pyarrow.parquet.read_table(file_name)))
+    if table_format == "arrow":
+        return(from_arrow(pyarrow.feather.read_table(file_name)))
+    if table_format == "numpy":
+        return(np.load(file_name, allow_pickle=False))
+    raise ValueError("unknown stats table format: " + file_name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the per period stats of a folder of football games to a table")
+    parser.add_argument("folder", help="folder of game data files")
+    parser.add_argument("-o", "--output", default="season_stats.parquet", help="table file to write (.parquet, .arrow, .feather or .npy)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes to parse with")
+    parser.add_argument("--periods", nargs="*", choices=fgd.PERIODS, default=list(fgd.PERIODS), help="periods to make rows for")
+    parser.add_argument("--no-passing", action="store_true", help="leave out the passing stats, which only parses the one line fields of each game")
+    args = parser.parse_args(argv)
+
+    season = fgs.Season(args.folder, jobs=args.jobs, lazy=args.no_passing)
+    season.load()
+    for file_name in season.errors:
+        print(file_name + ": " + season.errors[file_name])
+    table = stats_table(season, args.periods, not args.no_passing)
+    output = write_stats_table(table, args.output)
+    print(str(len(table)) + " rows written to " + output)
+    return(0)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
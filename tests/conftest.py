@@ -0,0 +1,48 @@
+import glob
+import os
+import sys
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+@pytest.fixture
+def game_files():
+    """Description: The sample game data files in the game_files folder, in file name order"""
+    return(sorted(glob.glob(os.path.join(REPO_DIR, "game_files", "*.csv"))))
+
+def __game_contents__(game):
+    """Description: Collects the parsed contents of a game into plain values, so two games can be compared with ==
+    Inputs: game - Game_Data object
+    Outputs:
+        Returns - dictionary
+    """
+    import football_game_data as fgd
+    contents = {"teams": (game.home_team, game.away_team, game.game_date),
+                "durations": (game.h1Duration, game.h2Duration, game.ot1Duration, game.ot2Duration),
+                "penalty_shootout_goals": (game.homeTeamPenalty_shootout_goals, game.awayTeamPenalty_shootout_goals),
+                "formation_names": (dict(game.homeTeam_formation_name), dict(game.awayTeam_formation_name))}
+    for stat in fgd.PERIOD_STATS:
+        contents[stat] = [dict(getattr(game, name)) for name in fgd.PERIOD_STATS[stat]]
+    for team in ("homeTeam", "awayTeam"):
+        for half in ("H1", "H2"):
+            passing_stats = getattr(game, team + half + "Passing_stats")
+            heat_map_stats = getattr(game, team + half + "Heat_map_stats")
+            graph = getattr(game, team + half + "Passing_graph")
+            contents[team + half] = {
+                "comments": list(getattr(game, team + half + "Comments")),
+                "formation": {node: list(xy) for node, xy in getattr(game, team + half + "Formation").items()},
+                "passing_stats": (passing_stats.total_passes, passing_stats.possession_instances,
+                                  passing_stats.max_consecutive_passes, dict(passing_stats.passing_sequence_histogram),
+                                  list(passing_stats.tree_roots), list(passing_stats.tree_tips)),
+                "defending_zone": heat_map_stats.team_defending_zone,
+                "heat_map": [dict(getattr(heat_map_stats, "zone_" + stat)) for stat in
+                             ("shots_off_target", "shots_on_target", "shots_scored", "own_goals", "assists", "passes",
+                              "possession_instances", "lost_possession_instances")],
+                "graph": (sorted(graph.nodes), sorted(graph.edges(data="weight")))}
+    return(contents)
+
+@pytest.fixture
+def game_contents():
+    """Description: Function that collects the contents of a game into plain values (see __game_contents__)"""
+    return(__game_contents__)
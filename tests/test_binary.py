@@ -0,0 +1,36 @@
+import os
+import pytest
+import football_game_binary as fgb
+import football_game_data as fgd
+
+def __add_heat_maps__(game):
+    # the sample games have no heat maps, add one for each team in the first half the way a data file lists them
+    for team, defending_zone in (("homeTeam", 2), ("awayTeam", 17)):
+        heat_map_stats = getattr(game, team + "H1Heat_map_stats")
+        heat_map_stats.set_team_defending_zone(defending_zone)
+        for zone in range(1, 19):
+            heat_map_stats.add_zone(zone, zone % 2, zone % 3, int(zone == 16), 0, zone % 4, zone * 3, zone, 18 - zone)
+
+def test_round_trip(tmp_path, game_files, game_contents):
+    for file_name in game_files:
+        game = fgd.Game_Data(file_name)
+        __add_heat_maps__(game)
+        binary_file = str(tmp_path / (os.path.basename(file_name) + fgb.FILE_EXTENSION))
+        fgb.write_game(game, binary_file)
+        binary_game = fgb.Binary_Game(binary_file)
+        assert binary_game.final_score() == (game.final_home_team_score(), game.final_away_team_score())
+        copy = binary_game.to_game_data()
+        assert copy.file_name == game.file_name
+        assert game_contents(copy) == game_contents(game), file_name
+
+def test_archive(tmp_path, game_files):
+    games = [fgd.Game_Data(file_name) for file_name in game_files[:3]]
+    written = fgb.write_archive(games, str(tmp_path / "archive"))
+    scanned = list(fgb.scan_archive(str(tmp_path / "archive")))
+    assert sorted(written) == [binary_game.file_name for binary_game in scanned]
+    assert sorted((game.home_team, game.away_team) for game in games) == \
+           sorted((binary_game.home_team, binary_game.away_team) for binary_game in scanned)
+
+def test_not_a_binary_game(game_files):
+    with pytest.raises(ValueError):
+        fgb.Binary_Game(game_files[0])
@@ -0,0 +1,62 @@
+import os
+import shutil
+import football_game_cache as fgc
+
+def test_miss_then_hit(tmp_path, game_files):
+    cache = fgc.Game_Cache(str(tmp_path / "cache"))
+    first = cache.load(game_files[0])
+    second = cache.load(game_files[0])
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["entries"] == 1
+    assert (second.home_team, second.away_team, second.game_date) == (first.home_team, first.away_team, first.game_date)
+    assert second.final_home_team_score() == first.final_home_team_score()
+    assert sorted(second.homeTeamH1Passing_graph.edges(data="weight")) == sorted(first.homeTeamH1Passing_graph.edges(data="weight"))
+
+def test_changed_file_is_parsed_again(tmp_path, game_files):
+    file_name = str(tmp_path / os.path.basename(game_files[0]))
+    shutil.copy(game_files[0], file_name)
+    cache = fgc.Game_Cache(str(tmp_path / "cache"))
+    cache.load(file_name)
+    with open(file_name, "a") as file_obj:
+        file_obj.write("\n")
+    cache.load(file_name)
+    assert (cache.hits, cache.misses) == (0, 2)
+    # the entry for the old contents of the file is replaced
+    assert cache.stats()["entries"] == 1
+
+def test_invalidate(tmp_path, game_files):
+    cache = fgc.Game_Cache(str(tmp_path / "cache"))
+    cache.load(game_files[0])
+    cache.load(game_files[1])
+    assert cache.invalidate(game_files[0]) == 1
+    assert cache.stats()["entries"] == 1
+    cache.load(game_files[0])
+    assert (cache.hits, cache.misses) == (0, 3)
+    assert cache.invalidate() == 2
+    assert cache.stats()["entries"] == 0
+
+def test_stale_entry_is_parsed_again(tmp_path, game_files):
+    cache_dir = str(tmp_path / "cache")
+    cache = fgc.Game_Cache(cache_dir)
+    cache.load(game_files[0])
+    # an entry pickled from a class that no longer exists raises AttributeError when it is loaded
+    entry_path = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+    with open(entry_path, "wb") as entry_obj:
+        entry_obj.write(b"cfootball_game_data\nNo_Such_Class\n.")
+    game = cache.load(game_files[0])
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert game.home_team != ""
+    assert cache.load(game_files[0]).home_team == game.home_team
+    assert cache.hits == 1
+
+def test_evict_least_recently_used(tmp_path, game_files):
+    cache = fgc.Game_Cache(str(tmp_path / "cache"), max_entries=2)
+    cache.load(game_files[0])
+    cache.load(game_files[1])
+    entries = sorted(os.listdir(cache.cache_dir))
+    os.utime(os.path.join(cache.cache_dir, entries[0]), (1, 1))
+    os.utime(os.path.join(cache.cache_dir, entries[1]), (2, 2))
+    cache.load(game_files[2])
+    remaining = os.listdir(cache.cache_dir)
+    assert len(remaining) == 2
+    assert entries[0] not in remaining and entries[1] in remaining
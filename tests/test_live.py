@@ -0,0 +1,50 @@
+import asyncio
+import football_game_data as fgd
+import football_game_live as fgl
+
+async def __replay__(file_name):
+    feed = fgl.Live_Feed()
+    runner = asyncio.ensure_future(feed.run())
+    events = await fgl.replay(file_name, feed)
+    await feed.close()
+    live_game = await runner
+    return((events, live_game, feed.errors))
+
+def test_replay_matches_parse(game_files, game_contents):
+    for file_name in game_files:
+        events, live_game, errors = asyncio.run(__replay__(file_name))
+        assert errors == []
+        assert live_game.events == events
+        game = fgd.Game_Data(file_name)
+        assert game_contents(live_game.snapshot()) == game_contents(game), file_name
+
+def test_increments():
+    live_game = fgl.Live_Game("Home", "Away")
+    live_game.apply(fgl.Stat_Increment("HT", "H1", "GOALS", 2))
+    live_game.apply(fgl.Stat_Increment("AT", "OT1", "GOALS", 1))
+    live_game.add_passing_branch("HT", "H1", ["GK", "CB", "CM", "ST"])
+    live_game.increment_zone("AT", "H2", 5, "passes", 3)
+    live_game.increment_zone("AT", "H2", 5, "passes")
+    snapshot = live_game.snapshot()
+    live_game.increment_stat("HT", "H2", "GOALS")
+    assert (snapshot.final_home_team_score(), snapshot.final_away_team_score()) == (2, 1)
+    assert (live_game.game.final_home_team_score(), live_game.game.final_away_team_score()) == (3, 1)
+    assert snapshot.homeTeamH1Passing_stats.total_passes == 3
+    assert snapshot.homeTeamH1Passing_graph.has_edge("CB", "CM")
+    assert dict(snapshot.awayTeamH2Heat_map_stats.zone_passes) == {5: 4}
+    assert live_game.events == 6
+
+def test_bad_events_are_recorded():
+    async def feed_events():
+        feed = fgl.Live_Feed()
+        runner = asyncio.ensure_future(feed.run())
+        await feed.put(fgl.Stat_Increment("XX", "H1", "GOALS", 1))
+        await feed.put(fgl.Zone_Increment("HT", "OT1", 3, "passes", 1))
+        await feed.put(fgl.Stat_Increment("HT", "H1", "GOALS", 1))
+        snapshot = await feed.snapshot()
+        await feed.close()
+        await runner
+        return((feed, snapshot))
+    feed, snapshot = asyncio.run(feed_events())
+    assert len(feed.errors) == 2
+    assert snapshot.final_home_team_score() == 1
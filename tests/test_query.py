@@ -0,0 +1,85 @@
+import datetime
+import math
+import pytest
+import football_game_data as fgd
+import football_game_query as fgq
+import football_game_season as fgs
+
+@pytest.fixture
+def games(game_files):
+    return([fgd.Game_Data(file_name) for file_name in game_files])
+
+def __rows__(games):
+    # the per team and period rows of the games, made without the stats table
+    rows = []
+    for game in games:
+        for t, team_prefix in enumerate(("homeTeam", "awayTeam")):
+            opponent_prefix = ("awayTeam", "homeTeam")[t]
+            for period in fgd.PERIODS:
+                row = {"team": (game.home_team, game.away_team)[t], "opponent": (game.away_team, game.home_team)[t],
+                       "period": period, "date": fgs.game_date(game),
+                       "formation": getattr(game, team_prefix + "_formation_name").get(period, ""),
+                       "opponent_formation": getattr(game, opponent_prefix + "_formation_name").get(period, "")}
+                for stat in fgd.PERIOD_STATS:
+                    row[stat.lower().replace(" ", "_")] = getattr(game, fgd.PERIOD_STATS[stat][t])[period]
+                if period in fgd.HALVES:
+                    row["total_passes"] = getattr(game, team_prefix + period + "Passing_stats").total_passes
+                rows.append(row)
+    return(rows)
+
+def test_total_and_grouped(games):
+    query = fgq.Game_Query(games)
+    rows = __rows__(games)
+    assert len(query) == len(rows)
+    assert query.aggregate("goals") == sum(row["goals"] for row in rows)
+    by_team = {}
+    for row in rows:
+        by_team[row["team"]] = by_team.get(row["team"], 0) + row["shots"]
+    assert query.aggregate("shots", "team") == by_team
+    assert list(query.aggregate("shots", "team")) == sorted(by_team)
+
+def test_filters_and_month_groups(games):
+    query = fgq.Game_Query(games)
+    rows = __rows__(games)
+    shooting_row = [row for row in rows if row["shots"] > 0 and row["opponent_formation"] != ""][0]
+    team = shooting_row["team"]
+    formation = shooting_row["opponent_formation"]
+    expected = {}
+    for row in rows:
+        if row["team"] == team and row["opponent_formation"] == formation and row["period"] in fgd.HALVES:
+            month = row["date"].strftime("%Y-%m")
+            expected[(month, row["period"])] = expected.get((month, row["period"]), 0) + row["shots"]
+    result = query.aggregate("shots", ("month", "period"), team=team, opponent_formation=formation, period=["H1", "H2"])
+    assert sum(expected.values()) > 0
+    assert {(month.strftime("%Y-%m"), period): value for (month, period), value in result.items()} == expected
+
+def test_functions(games):
+    query = fgq.Game_Query(games)
+    rows = [row for row in __rows__(games) if row["period"] == "H1"]
+    shots = [row["shots"] for row in rows]
+    assert query.aggregate("shots", function="count", period="H1") == len(rows)
+    assert math.isclose(query.aggregate("shots", function="mean", period="H1"), sum(shots) / len(shots))
+    assert query.aggregate("shots", function="min", period="H1") == min(shots)
+    assert query.aggregate("shots", function="max", period="H1") == max(shots)
+    assert query.aggregate("shots", function="max", team="no such team") == None
+    with pytest.raises(ValueError):
+        query.aggregate("shots", function="median")
+    with pytest.raises(ValueError):
+        query.aggregate("shots", duration=45)
+
+def test_passing_columns_leave_out_extra_time(games):
+    query = fgq.Game_Query(games)
+    rows = [row for row in __rows__(games) if "total_passes" in row]
+    assert query.aggregate("total_passes") == sum(row["total_passes"] for row in rows)
+    assert query.aggregate("total_passes", function="count") == len(rows)
+    assert query.aggregate("total_passes", function="min") == min(row["total_passes"] for row in rows)
+
+def test_date_range(games):
+    query = fgq.Game_Query(games)
+    rows = __rows__(games)
+    start = datetime.date(2018, 5, 1)
+    end = datetime.date(2018, 9, 30)
+    expected = sum(row["goals"] for row in rows if row["date"] != None and start <= row["date"] <= end)
+    assert query.aggregate("goals", start_date=start, end_date=end) == expected
+    assert query.aggregate("goals", start_date="2018-05-01", end_date="2018-09-30") == expected
+    assert len(query.select(start_date=start, end_date=end)) == len([row for row in rows if row["date"] != None and start <= row["date"] <= end])